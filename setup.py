@@ -33,6 +33,11 @@ setup(
     package_dir={'': 'src'},
     include_package_data=True,
     zip_safe=False,
+    entry_points={
+        'console_scripts': [
+            'spinrewriter = spinrewriter.pipeline:main',
+        ],
+    },
     install_requires=[
         'setuptools',
     ],
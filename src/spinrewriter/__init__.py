@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
 
 import json
-import re
 import string
 import urllib
-import urllib2
 
 from collections import namedtuple
 
+from spinrewriter import batch
+from spinrewriter import chunking
 from spinrewriter import exceptions as ex
+from spinrewriter import spintax
+from spinrewriter import validation
+from spinrewriter.cache import cache_key
+from spinrewriter.pool import ConnectionPool
+from spinrewriter.singleflight import SingleFlight
+from spinrewriter.templates import TemplateStore
 
 
 class Api(object):
@@ -51,9 +57,68 @@ class Api(object):
         string.upper, _tmp_list))
     """possible response status strings returned by API"""
 
-    def __init__(self, email_address, api_key):
+    MIN_WORDS = 1
+    """minimum number of words in a text submitted to the API"""
+
+    MAX_WORDS = 4000
+    """maximum number of words in a text submitted to the API"""
+
+    CHUNK_WORKERS = 4
+    """number of chunks of a long text processed at the same time"""
+
+    PARAGRAPH_SEPARATOR = u'\n\n'
+    """separator of paragraphs sent in one incremental request"""
+
+    def __init__(self, email_address, api_key, pool_size=10, timeout=None,
+                 transport=None, cache=None, quota=None, scheduler=None,
+                 retry=None, breaker=None, validate=True, coalesce=True):
+        """
+        :param email_address: email address of the Spin Rewriter account
+        :type email_address: string
+        :param api_key: unique API key of the Spin Rewriter account
+        :type api_key: string
+        :param pool_size: (optional) number of keep-alive connections to
+            the API kept open for reuse
+        :type pool_size: int
+        :param timeout: (optional) socket timeout in seconds, defaults to
+            :func:`socket.getdefaulttimeout`
+        :type timeout: float
+        :param transport: (optional) transport used to send requests to
+            the API, defaults to a keep-alive connection pool
+        :type transport: spinrewriter.transport.Transport
+        :param cache: (optional) cache for text_with_spintax responses
+        :type cache: spinrewriter.cache.Cache
+        :param quota: (optional) tracker of the remaining API quota, updated
+            from every response, that stops requests once quota is used up
+        :type quota: spinrewriter.quota.QuotaTracker
+        :param scheduler: (optional) scheduler that paces submissions of new
+            text to stay within the API's frequency limit
+        :type scheduler: spinrewriter.rate.RateScheduler
+        :param retry: (optional) policy for repeating requests that failed
+            with transient errors
+        :type retry: spinrewriter.retry.RetryPolicy
+        :param breaker: (optional) circuit breaker suspending requests while
+            the API keeps failing
+        :type breaker: spinrewriter.retry.CircuitBreaker
+        :param validate: (optional) check requests locally and raise the
+            errors the API would return without sending them
+        :type validate: boolean
+        :param coalesce: (optional) let concurrent identical text_with_spintax
+            and api_quota calls share a single request
+        :type coalesce: boolean
+        """
         self.email_address = email_address
         self.api_key = api_key
+        if transport is None:
+            transport = ConnectionPool(self.URL, pool_size, timeout)
+        self.transport = transport
+        self.cache = cache
+        self.quota = quota
+        self.scheduler = scheduler
+        self.retry = retry
+        self.breaker = breaker
+        self.validate = validate
+        self.flights = SingleFlight() if coalesce else None
 
     def api_quota(self):
         """Return the number of made and remaining API calls for the 24-hour
@@ -67,13 +132,15 @@ class Api(object):
             (self.REQ_P_NAMES.api_key, self.api_key),
             (self.REQ_P_NAMES.action, self.ACTION.api_quota),
         )
-        response = self._send_request(params)
+        self._validate(params)
+        response = self._coalesce(params, self._send_request)
         return response
 
     def text_with_spintax(self, text, protected_terms=None,
                           confidence_level=CONFIDENCE_LVL.medium,
                           nested_spintax=False,
-                          spintax_format=SPINTAX_FORMAT.pipe_curly):
+                          spintax_format=SPINTAX_FORMAT.pipe_curly,
+                          chunk_words=None, incremental=False):
         """Return processed spun text with spintax.
 
         :param text: original text that needs to be changed
@@ -90,18 +157,35 @@ class Api(object):
         :param spintax_format: (optional) spintax format to use in
             returned text
         :type spintax_format: string
+        :param chunk_words: (optional) split texts longer than this many
+            words into chunks, e.g. Api.MAX_WORDS, which are processed
+            concurrently and joined back together; every chunk is new text
+            for the API's frequency limit, so splitting a text needs a
+            scheduler to pace them
+        :type chunk_words: int
+        :param incremental: (optional) process text paragraph by paragraph,
+            reusing cached spintax of paragraphs processed before and sending
+            only new or changed ones; needs a cache, and a scheduler when the
+            changed paragraphs take more than one request
+        :type incremental: boolean
 
         :return: processed text and some other meta info
         :rtype: dictionary
         """
-        response = self._transform_plain_text(
-            self.ACTION.text_with_spintax,
-            text,
-            protected_terms,
-            confidence_level,
-            nested_spintax,
-            spintax_format
-        )
+        if incremental:
+            response = self._transform_incremental(
+                chunk_words, text, protected_terms, confidence_level,
+                nested_spintax, spintax_format)
+        else:
+            response = self._transform_chunked(
+                chunk_words,
+                self.ACTION.text_with_spintax,
+                text,
+                protected_terms,
+                confidence_level,
+                nested_spintax,
+                spintax_format
+            )
 
         if response[self.RESP_P_NAMES.status] == self.STATUS.error:
             self._raise_error(response)
@@ -114,7 +198,8 @@ class Api(object):
             protected_terms=None,
             confidence_level=CONFIDENCE_LVL.medium,
             nested_spintax=False,
-            spintax_format=SPINTAX_FORMAT.pipe_curly
+            spintax_format=SPINTAX_FORMAT.pipe_curly,
+            chunk_words=None
     ):
         """Return a unique variation of the given text.
 
@@ -132,12 +217,18 @@ class Api(object):
         :param spintax_format: (optional) (probably not relevant here?
             But API documentation not clear here ...)
         :type spintax_format: string
+        :param chunk_words: (optional) split texts longer than this many
+            words into chunks, e.g. Api.MAX_WORDS, which are processed
+            concurrently and joined back together; every chunk is new text
+            for the API's frequency limit, so splitting a text needs a
+            scheduler to pace them
+        :type chunk_words: int
 
         :return: processed text and some other meta info
         :rtype: dictionary
         """
-        response = self._transform_plain_text(
-            self.ACTION.unique_variation, text, protected_terms,
+        response = self._transform_chunked(
+            chunk_words, self.ACTION.unique_variation, text, protected_terms,
             confidence_level, nested_spintax, spintax_format
         )
 
@@ -177,6 +268,7 @@ class Api(object):
             (self.REQ_P_NAMES.nested_spintax, nested_spintax),
             (self.REQ_P_NAMES.spintax_format, spintax_format),
         )
+        self._validate(params)
         response = self._send_request(params)
 
         if response[self.RESP_P_NAMES.status] == self.STATUS.error:
@@ -188,15 +280,130 @@ class Api(object):
         """Invoke Spin Rewriter API with given parameters and return its
         response.
 
+        If the Api has a scheduler, submissions of new text are spaced out
+        to respect the API's frequency limit and requests rejected for being
+        too frequent are repeated.
+
+        :param params: parameters to pass along with the request
+        :type params: tuple of 2-tuples
+
+        :return: API's response (already JSON-decoded)
+        :rtype: dictionary
+        """
+        params_dict = dict(params)
+        action = params_dict.get(self.REQ_P_NAMES.action)
+        counted = action != self.ACTION.api_quota
+        if self.scheduler is None or action not in (
+                self.ACTION.text_with_spintax, self.ACTION.unique_variation):
+            return self._post(params, counted)
+
+        text = params_dict[self.REQ_P_NAMES.text]
+        for _ in range(self.scheduler.max_retries + 1):
+            self.scheduler.wait(text)
+            response = self._post(params, counted)
+            if not self.scheduler.update(text, response):
+                break
+        return response
+
+    def _validate(self, params):
+        """Raise errors the API would return for the given parameters.
+
         :param params: parameters to pass along with the request
         :type params: tuple of 2-tuples
 
+        :raises spinrewriter.exceptions.MissingParameterError: when
+            credentials are missing
+        :raises spinrewriter.exceptions.ParamValueError: when the text is
+            too short, too long or has invalid spintax
+        """
+        if not self.validate:
+            return
+        params = dict(params)
+        validation.check_credentials(
+            params[self.REQ_P_NAMES.email_address],
+            params[self.REQ_P_NAMES.api_key])
+        if self.REQ_P_NAMES.text not in params:
+            return
+        text = params[self.REQ_P_NAMES.text].decode('utf-8')
+        spintax_format = params[self.REQ_P_NAMES.spintax_format]
+        if params[self.REQ_P_NAMES.action] == \
+                self.ACTION.unique_variation_from_spintax and \
+                spintax_format in spintax.FORMATS:
+            # words of a variation count, not those of all alternatives
+            text = validation.check_spintax(text, spintax_format).variation(0)
+        validation.check_text(text, self.MIN_WORDS, self.MAX_WORDS)
+
+    def _post(self, params, counted):
+        """Send the request through the transport, repeating it according
+        to the retry policy, if any.
+
+        :param params: parameters to pass along with the request
+        :type params: tuple of 2-tuples
+        :param counted: whether the request counts against the quota
+        :type counted: boolean
+
         :return: API's response (already JSON-decoded)
         :rtype: dictionary
         """
-        con = urllib2.urlopen(self.URL, urllib.urlencode(params))
-        response = con.read()
-        return json.loads(response)
+        if self.retry is None:
+            return self._attempt(params, counted)
+        return self.retry.call(self._attempt, params, counted)
+
+    def _attempt(self, params, counted):
+        """Send the request once, keeping the quota tracker and the circuit
+        breaker, if any, up to date.
+
+        Error responses the retry policy or the circuit breaker handle are
+        raised as exceptions, others are returned.
+
+        :return: API's response (already JSON-decoded)
+        :rtype: dictionary
+        """
+        # quota is checked first, so that a request stopped locally does not
+        # take the trial of a half-open circuit
+        if self.quota is not None and counted:
+            self.quota.acquire()
+        try:
+            try:
+                if self.breaker is not None:
+                    self.breaker.before()
+                response = json.loads(
+                    self.transport.post(urllib.urlencode(params)))
+            finally:
+                if self.quota is not None and counted:
+                    self.quota.release()
+            if self.quota is not None:
+                self.quota.update(response, counted)
+            if response.get(self.RESP_P_NAMES.status) == self.STATUS.error:
+                self._raise_transient(response)
+        except ex.CircuitOpenError:
+            raise
+        except Exception as error:
+            if self.breaker is not None:
+                if isinstance(error, self.breaker.errors):
+                    self.breaker.failure()
+                else:
+                    self.breaker.cancel()
+            raise
+        if self.breaker is not None:
+            self.breaker.success()
+        return response
+
+    def _raise_transient(self, api_response):
+        """Raise the error in the API response if the retry policy or the
+        circuit breaker handle it.
+
+        :param api_response: API's response fields
+        :type api_response: dictionary
+        """
+        errors = ()
+        if self.retry is not None:
+            errors += self.retry.errors
+        if self.breaker is not None:
+            errors += self.breaker.errors
+        error = ex.classify(api_response[self.RESP_P_NAMES.response])
+        if issubclass(error.exception, errors):
+            self._raise_error(api_response)
 
     def _raise_error(self, api_response):
         """Examine the API response and raise exception of the appropriate
@@ -209,145 +416,187 @@ class Api(object):
         :type api_response: dictionary
         """
         error_msg = api_response[self.RESP_P_NAMES.response]
+        raise ex.classify(error_msg).exception(error_msg)
 
-        if (
-            re.match(
-                r'Authentication failed. '
-                r'No user with this email address found.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Authentication failed. '
-                r'Unique API key is not valid for this user.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'This user does not have a valid Spin Rewriter subscription.',
-                error_msg,
-                re.IGNORECASE
-            )
-        ):
-            raise ex.AuthenticationError(error_msg)
-
-        elif re.match(
-            r'API quota exceeded. '
-            r'You can make \d+ requests per day.',
-            error_msg,
-            re.IGNORECASE
-        ):
-            raise ex.QuotaLimitError(error_msg)
-
-        elif re.match(
-            r'You can only submit entirely new text '
-            r'for analysis once every \d+ seconds.',
-            error_msg,
-            re.IGNORECASE
-        ):
-            raise ex.UsageFrequencyError(error_msg)
-
-        elif re.match(
-            r'Requested action does not exist. '
-            r'Please refer to the Spin Rewriter API documentation.',
-            error_msg,
-            re.IGNORECASE
-        ):
-            # NOTE: This should never occur unless
-            # there is a bug in the API library.
-            raise ex.UnknownActionError(error_msg)
-
-        elif re.match(
-            r'Email address and unique API key are both required. '
-            r'At least one is missing.',
-            error_msg,
-            re.IGNORECASE
-        ):
-            # NOTE: This should never occur unless
-            # there is a bug in the API library.
-            raise ex.MissingParameterError(error_msg)
-
-        elif (
-            re.match(
-                r'Original text too short.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Original text too long. Text can have up to 4,000 words.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Original text after analysis too long. '
-                r'Text can have up to 4,000 words.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Spinning syntax invalid. '
-                r'With this action you should provide text with existing valid'
-                r'{first option|second option} spintax.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'The {first|second} spinning syntax invalid. '
-                r'Re-check the syntax, i.e. curly brackets and pipes\.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Spinning syntax invalid.',
-                error_msg,
-                re.IGNORECASE
-            )
-        ):
-            raise ex.ParamValueError(error_msg)
-
-        elif (
-            re.match(
-                r'Analysis of your text failed. '
-                r'Please inform us about this.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Synonyms for your text could not be loaded. '
-                r'Please inform us about this.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Unable to load your new analyzed project.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Unable to load your existing analyzed project.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Unable to find your project in the database.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'Unable to load your analyzed project.',
-                error_msg,
-                re.IGNORECASE
-            ) or
-            re.match(
-                r'One-Click Rewrite failed.',
-                error_msg,
-                re.IGNORECASE
-            )
-        ):
-            raise ex.InternalApiError(error_msg)
+    def _transform_chunked(self, chunk_words, action, text, *args):
+        """Transform plain text, splitting it into chunks of at most
+        chunk_words words first.
 
-        else:
-            raise ex.UnknownApiError(error_msg)
+        Chunks are transformed concurrently and their responses merged into
+        one, with the processed chunks joined in order. If any chunk fails,
+        its error response is returned.
+
+        :param chunk_words: maximum number of words in a chunk, None to send
+            text as it is
+        :type chunk_words: int
+
+        Other parameters are those of :meth:`_transform_plain_text`.
+
+        :return: processed text and some other meta info
+        :rtype: dictionary
+        """
+        if chunk_words is None:
+            return self._transform_plain_text(action, text, *args)
+        chunks, separators = chunking.split(text, chunk_words)
+        if len(chunks) == 1:
+            return self._transform_plain_text(action, text, *args)
+        self._require_scheduler()
+
+        def transform(chunk):
+            return self._transform_plain_text(action, chunk, *args)
+
+        responses = []
+        for result in batch.imap(transform, chunks, self.CHUNK_WORKERS):
+            if result.error is not None:
+                raise result.error
+            if result.value[self.RESP_P_NAMES.status] == self.STATUS.error:
+                return result.value
+            responses.append(result.value)
+        return self._merge(
+            responses, [r[self.RESP_P_NAMES.response] for r in responses],
+            separators)
+
+    def _transform_incremental(self, chunk_words, text, *args):
+        """Transform text into spintax paragraph by paragraph, reusing the
+        cached spintax of paragraphs processed before.
+
+        Paragraphs (and sentences of paragraphs longer than chunk_words) that
+        are not in the cache are sent together, in as few requests as
+        possible, and the spintax of every one of them is cached on its own.
+        After a document is edited, only its changed paragraphs are sent.
+
+        If the response does not keep the paragraphs apart, they are sent
+        one by one, which takes a scheduler. Without one, the paragraphs from
+        the first changed one to the last are sent together and a response
+        that cannot be split back is used (and cached) for all of them.
+
+        :param chunk_words: maximum number of words in a request, None for
+            Api.MAX_WORDS
+        :type chunk_words: int
+
+        Other parameters are those of :meth:`_transform_plain_text`, without
+        the action.
+
+        :return: processed text and some other meta info
+        :rtype: dictionary
+        """
+        if self.cache is None:
+            raise ValueError('Incremental transformation needs a cache.')
+        action = self.ACTION.text_with_spintax
+        max_words = chunk_words or self.MAX_WORDS
+        pieces, separators = chunking.split(text, max_words, merge=False)
+        if len(pieces) == 1:
+            return self._transform_plain_text(action, text, *args)
+
+        spun = [None] * len(pieces)
+        cached = []
+        for i, piece in enumerate(pieces):
+            response = self.cache.get(
+                cache_key(self._text_params(action, piece, *args)))
+            if response is not None:
+                spun[i] = response[self.RESP_P_NAMES.response]
+                cached.append(response)
+        new = [i for i, piece in enumerate(spun) if piece is None]
+        if self.scheduler is None and new:
+            new = range(new[0], new[-1] + 1)  # a span one response can cover
+
+        groups = [[]]  # indexes of pieces sent together
+        words = 0
+        for i in new:
+            count = chunking.count_words(pieces[i])
+            if groups[-1] and words + count > max_words:
+                groups.append([])
+                words = 0
+            groups[-1].append(i)
+            words += count
+
+        def transform(group):
+            texts = [pieces[i] for i in group]
+            params = self._text_params(
+                action, self.PARAGRAPH_SEPARATOR.join(texts), *args)
+            self._validate(params)
+            key = cache_key(params)
+            response = self.cache.get(key)  # a group that was not split
+            if response is None:
+                response = self._coalesce(params, self._send_request)
+            if response[self.RESP_P_NAMES.status] == self.STATUS.error:
+                return [response]
+            parts = chunking.BOUNDARIES[0].split(
+                response[self.RESP_P_NAMES.response].strip())[::2]
+            if len(parts) != len(texts) and self.scheduler is None:
+                # no requests to spare, the response stands for all pieces
+                self.cache.set(key, response)
+                response = dict(response)
+                response[self.RESP_P_NAMES.response] = \
+                    response[self.RESP_P_NAMES.response].strip()
+                return [response] + [None] * (len(texts) - 1)
+            if len(parts) != len(texts):
+                # paragraphs were not kept apart, send them one by one
+                return [self._transform_plain_text(action, piece, *args)
+                        for piece in texts]
+            responses = []
+            for piece, part in zip(texts, parts):
+                response = dict(response)
+                response[self.RESP_P_NAMES.response] = part
+                self.cache.set(
+                    cache_key(self._text_params(action, piece, *args)),
+                    response)
+                responses.append(response)
+            return responses
+
+        sent = []
+        groups = [group for group in groups if group]
+        if len(groups) > 1:
+            self._require_scheduler()
+        for result in batch.imap(transform, groups, self.CHUNK_WORKERS):
+            if result.error is not None:
+                raise result.error
+            for i, response in zip(result.text, result.value):
+                if response is None:  # covered by the previous piece
+                    spun[i] = None
+                    continue
+                if response[self.RESP_P_NAMES.status] == self.STATUS.error:
+                    return response
+                spun[i] = response[self.RESP_P_NAMES.response]
+                sent.append(response)
+        kept = [i for i, piece in enumerate(spun) if piece is not None]
+        separators = [separators[i] for i in kept] + separators[-1:]
+        # counters of cached responses are stale, prefer fresh ones
+        return self._merge(sent or cached, [spun[i] for i in kept],
+                           separators)
+
+    def _require_scheduler(self):
+        """Check that submissions of several new texts at once are paced.
+
+        :raises ValueError: when the Api has no scheduler
+        """
+        if self.scheduler is None:
+            raise ValueError(
+                'Sending a text in several requests needs a scheduler to '
+                'respect the frequency limit of the API.')
+
+    def _merge(self, responses, texts, separators):
+        """Merge responses to chunks of a text into one response.
+
+        :param responses: responses whose counters are merged
+        :type responses: list of dictionaries
+        :param texts: processed chunks, in order
+        :type texts: list of strings
+        :param separators: separators returned by
+            :func:`spinrewriter.chunking.split`
+        :type separators: list of strings
+
+        :return: processed text and some other meta info
+        :rtype: dictionary
+        """
+        response = dict(responses[0])
+        response[self.RESP_P_NAMES.response] = chunking.join(
+            texts, separators)
+        made = self.RESP_P_NAMES.api_requests_made
+        available = self.RESP_P_NAMES.api_requests_available
+        response[made] = max(r[made] for r in responses)
+        response[available] = min(r[available] for r in responses)
+        return response
 
     def _transform_plain_text(
             self,
@@ -363,6 +612,10 @@ class Api(object):
         Pack parameters into format as expected by the _send_request method and
         invoke the action method to get transformed text from the API.
 
+        Successful text_with_spintax responses are stored in and served from
+        the cache, if the Api has one, and identical concurrent
+        text_with_spintax requests are coalesced into one.
+
         :param action: name of the action that will be requested from API
         :type action: string
         :param text: text to process
@@ -382,6 +635,30 @@ class Api(object):
         :return: processed text and some other meta info
         :rtype: dictionary
         """
+        params = self._text_params(
+            action, text, protected_terms, confidence_level, nested_spintax,
+            spintax_format)
+        self._validate(params)
+        if action != self.ACTION.text_with_spintax:
+            return self._send_request(params)
+        return self._coalesce(params, self._cached_request)
+
+    def _text_params(
+            self,
+            action,
+            text,
+            protected_terms,
+            confidence_level,
+            nested_spintax,
+            spintax_format
+    ):
+        """Pack parameters of a plain text transformation into the format
+        expected by the _send_request method.
+
+        Parameters are those of :meth:`_transform_plain_text`.
+
+        :rtype: tuple of 2-tuples
+        """
         if protected_terms:
             # protected_terms could be separated by other characters too,
             # like commas
@@ -391,7 +668,7 @@ class Api(object):
         else:
             protected_terms = ''
 
-        params = (
+        return (
             (self.REQ_P_NAMES.email_address, self.email_address),
             (self.REQ_P_NAMES.api_key, self.api_key),
             (self.REQ_P_NAMES.action, action),
@@ -401,16 +678,67 @@ class Api(object):
             (self.REQ_P_NAMES.nested_spintax, nested_spintax),
             (self.REQ_P_NAMES.spintax_format, spintax_format),
         )
-        return self._send_request(params)
+
+    def _cached_request(self, params):
+        """Serve the request from the cache, if the Api has one, or send it
+        and cache a successful response.
+
+        :param params: parameters to pass along with the request
+        :type params: tuple of 2-tuples
+
+        :return: API's response (already JSON-decoded)
+        :rtype: dictionary
+        """
+        if self.cache is None:
+            return self._send_request(params)
+        key = cache_key(params)
+        response = self.cache.get(key)
+        if response is None:
+            response = self._send_request(params)
+            if response[self.RESP_P_NAMES.status] == self.STATUS.ok:
+                self.cache.set(key, response)
+        return dict(response)
+
+    def _coalesce(self, params, func):
+        """Call func(params), sharing one call among all concurrent callers
+        with the same parameters if the Api coalesces requests.
+
+        :param params: parameters to pass along with the request
+        :type params: tuple of 2-tuples
+        :param func: function sending the request
+        :type func: callable
+
+        :return: API's response (already JSON-decoded), a copy per caller
+        :rtype: dictionary
+        """
+        if self.flights is None:
+            return func(params)
+        return dict(self.flights.do(params, func, params))
 
 
 class SpinRewriter(object):
     """A facade for easier usage of the raw Spin Rewriter API."""
 
-    def __init__(self, email_address, api_key):
+    def __init__(self, email_address, api_key, render_locally=False,
+                 track_variations=False):
+        """
+        :param email_address: email address of the Spin Rewriter account
+        :type email_address: string
+        :param api_key: unique API key of the Spin Rewriter account
+        :type api_key: string
+        :param render_locally: (optional) fetch spintax of every text once
+            and render unique variations locally from it
+        :type render_locally: boolean
+        :param track_variations: (optional) when rendering locally, never
+            return the same variation of a text twice
+        :type track_variations: boolean
+        """
         self.email_address = email_address
         self.api_key = api_key
         self.api = Api(email_address, api_key)
+        self.templates = None
+        if render_locally:
+            self.templates = TemplateStore(self.api, track=track_variations)
 
     def unique_variation(
             self, text, confidence_level=Api.CONFIDENCE_LVL.medium):
@@ -425,7 +753,10 @@ class SpinRewriter(object):
         :return: spinned version of the original text
         :rtype: string
         """
-        response = self.api.unique_variation(text, confidence_level)
+        if self.templates is not None:
+            return self.templates.unique_variation(text, confidence_level)
+        response = self.api.unique_variation(
+            text, confidence_level=confidence_level)
         return response[Api.RESP_P_NAMES.response]
 
     def text_with_spintax(
@@ -441,5 +772,56 @@ class SpinRewriter(object):
         :return: original text with spintax elements
         :rtype: string
         """
-        response = self.api.text_with_spintax(text, confidence_level)
+        response = self.api.text_with_spintax(
+            text, confidence_level=confidence_level)
         return response[Api.RESP_P_NAMES.response]
+
+    def unique_variations(
+            self, texts, confidence_level=Api.CONFIDENCE_LVL.medium,
+            workers=8, ordered=True, processes=False, dedup=False,
+            stats=None):
+        """Return unique variations of many texts, processed concurrently.
+
+        Failures do not stop the batch: every result carries either the
+        spun text or the exception raised for its text.
+
+        With ``dedup``, texts that repeat (ignoring differences in
+        whitespace) are sent only once and every occurrence gets the same
+        variation, as long as the result is kept, see
+        :func:`spinrewriter.batch.imap_unique`.
+
+        :param texts: texts to process
+        :type texts: iterable of strings
+        :param confidence_level: how 'confident' the spinner API is when
+            transforming the text
+        :type confidence_level: Api.CONFIDENCE_LVL
+        :param workers: number of texts processed at the same time
+        :type workers: int
+        :param ordered: yield results in input order (True) or as soon as
+            they are available (False)
+        :type ordered: boolean
+        :param processes: use a pool of processes, each with its own
+            SpinRewriter instance, instead of a pool of threads
+        :type processes: boolean
+        :param dedup: send every distinct text only once
+        :type dedup: boolean
+        :param stats: counters of texts and saved calls, updated as the
+            batch runs when deduplicating
+        :type stats: spinrewriter.batch.DedupStats
+
+        :return: generator of (index, text, value, error) tuples
+        :rtype: generator of spinrewriter.batch.Result
+        """
+        if processes:
+            args = (type(self), (self.email_address, self.api_key),
+                    'unique_variation', {'confidence_level': confidence_level},
+                    texts, workers, ordered)
+            if dedup:
+                return batch.imap_unique_processes(*args, stats=stats)
+            return batch.imap_processes(*args)
+
+        def func(text):
+            return self.unique_variation(text, confidence_level)
+        if dedup:
+            return batch.imap_unique(func, texts, workers, ordered, stats)
+        return batch.imap(func, texts, workers, ordered)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Spread requests over several Spin Rewriter accounts."""
+
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.rate import RateScheduler
+
+import threading
+import time
+
+
+class ApiPool(object):
+    """Drop-in replacement for :class:`spinrewriter.Api` that holds several
+    accounts and sends every request through the best one.
+
+    Every account gets its own :class:`spinrewriter.quota.QuotaTracker` and
+    :class:`spinrewriter.rate.RateScheduler`. A request goes to the account
+    whose next slot for new text comes first, and among those to the one
+    with the most quota left. An account that fails with
+    :class:`spinrewriter.exceptions.AuthenticationError` or
+    :class:`spinrewriter.exceptions.QuotaLimitError` is taken out of
+    rotation, until its quota window frees a slot or for ``cooldown``
+    seconds, and the request is repeated with the next account.
+    """
+
+    FAILOVER_ERRORS = (ex.AuthenticationError, ex.QuotaLimitError)
+    """errors that take an account out of rotation"""
+
+    def __init__(self, credentials, cooldown=15 * 60, clock=time.time,
+                 sleep=time.sleep, **kwargs):
+        """
+        :param credentials: email addresses and API keys of the accounts
+        :type credentials: list of 2-tuples
+        :param cooldown: (optional) seconds an account stays out of rotation
+            when it is not known when its quota frees up
+        :type cooldown: float
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        :param sleep: function used to wait
+        :type sleep: callable
+
+        Other keyword arguments are passed to every :class:`spinrewriter.Api`.
+        """
+        self.apis = [
+            Api(email_address, api_key,
+                quota=QuotaTracker(clock=clock, sleep=sleep),
+                scheduler=RateScheduler(clock=clock, sleep=sleep), **kwargs)
+            for email_address, api_key in credentials]
+        self.cooldown = cooldown
+        self.clock = clock
+        self.disabled = {}
+        """accounts out of rotation: Api -> (time it comes back, error)"""
+        self._lock = threading.Lock()
+
+    def _rank(self, api):
+        remaining = api.quota.remaining
+        if remaining is None:
+            remaining = float('inf')
+        return (api.scheduler.delay(), -remaining)
+
+    def _candidates(self):
+        """Return accounts in rotation, best first.
+
+        :raises spinrewriter.exceptions.SpinRewriterApiError: error of the
+            account that comes back first, when all are out of rotation
+        """
+        now = self.clock()
+        with self._lock:
+            for api, (until, error) in self.disabled.items():
+                if until <= now:
+                    del self.disabled[api]
+                    api.quota.reset()
+            apis = [api for api in self.apis if api not in self.disabled]
+            if not apis:
+                raise min(self.disabled.values())[1]
+        return sorted(apis, key=self._rank)
+
+    def _disable(self, api, error):
+        """Take an account out of rotation after an error."""
+        until = None
+        if isinstance(error, ex.QuotaLimitError):
+            until = api.quota.next_free
+        if until is None:
+            until = self.clock() + self.cooldown
+        with self._lock:
+            self.disabled[api] = (until, error)
+
+    def _call(self, method, *args, **kwargs):
+        """Call an Api method on the best account, failing over to the next
+        ones."""
+        for api in self._candidates():
+            try:
+                return getattr(api, method)(*args, **kwargs)
+            except self.FAILOVER_ERRORS as error:
+                self._disable(api, error)
+        raise error
+
+    def api_quota(self):
+        """Return the quota of every account.
+
+        :return: responses of api_quota by email address
+        :rtype: dictionary
+        """
+        return dict((api.email_address, api.api_quota()) for api in self.apis)
+
+    def text_with_spintax(self, *args, **kwargs):
+        """See :meth:`spinrewriter.Api.text_with_spintax`."""
+        return self._call('text_with_spintax', *args, **kwargs)
+
+    def unique_variation(self, *args, **kwargs):
+        """See :meth:`spinrewriter.Api.unique_variation`."""
+        return self._call('unique_variation', *args, **kwargs)
+
+    def unique_variation_from_spintax(self, *args, **kwargs):
+        """See :meth:`spinrewriter.Api.unique_variation_from_spintax`."""
+        return self._call('unique_variation_from_spintax', *args, **kwargs)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Non-blocking clients for the Spin Rewriter API.
+
+Every call returns immediately with a
+:class:`multiprocessing.pool.AsyncResult`. Requests are sent by a bounded
+pool of worker threads, so up to ``concurrency`` of them are in flight at
+the same time while the caller carries on. Call ``.get()`` on the result to
+wait for the response (or for the exception), or pass a ``callback`` to be
+notified when a successful response arrives.
+"""
+
+from multiprocessing.pool import ThreadPool
+from spinrewriter import Api
+from spinrewriter import SpinRewriter
+
+
+class AsyncApi(object):
+    """Non-blocking counterpart of :class:`spinrewriter.Api`.
+
+    Requests are sent through a regular :class:`spinrewriter.Api` instance,
+    so parameter packing and error handling are exactly the same.
+    """
+
+    def __init__(self, email_address, api_key, concurrency=10,
+                 timeout=None, transport=None):
+        """
+        :param email_address: email address of the Spin Rewriter account
+        :type email_address: string
+        :param api_key: unique API key of the Spin Rewriter account
+        :type api_key: string
+        :param concurrency: (optional) maximum number of requests in flight
+        :type concurrency: int
+        :param timeout: (optional) socket timeout in seconds
+        :type timeout: float
+        :param transport: (optional) transport used to send requests
+        :type transport: spinrewriter.transport.Transport
+        """
+        self.api = Api(email_address, api_key, pool_size=concurrency,
+                       timeout=timeout, transport=transport)
+        self.concurrency = concurrency
+        self.workers = ThreadPool(concurrency)
+
+    def submit(self, func, *args, **kwargs):
+        """Call ``func`` in a worker thread.
+
+        :param callback: (optional) keyword-only, called with the return
+            value of ``func`` once it is available
+        :type callback: callable
+
+        :return: handle for the pending call
+        :rtype: multiprocessing.pool.AsyncResult
+        """
+        callback = kwargs.pop('callback', None)
+        return self.workers.apply_async(func, args, kwargs, callback)
+
+    def api_quota(self, callback=None):
+        """Non-blocking :meth:`spinrewriter.Api.api_quota`."""
+        return self.submit(self.api.api_quota, callback=callback)
+
+    def text_with_spintax(self, text, protected_terms=None,
+                          confidence_level=Api.CONFIDENCE_LVL.medium,
+                          nested_spintax=False,
+                          spintax_format=Api.SPINTAX_FORMAT.pipe_curly,
+                          callback=None):
+        """Non-blocking :meth:`spinrewriter.Api.text_with_spintax`."""
+        return self.submit(
+            self.api.text_with_spintax, text, protected_terms,
+            confidence_level, nested_spintax, spintax_format,
+            callback=callback)
+
+    def unique_variation(self, text, protected_terms=None,
+                         confidence_level=Api.CONFIDENCE_LVL.medium,
+                         nested_spintax=False,
+                         spintax_format=Api.SPINTAX_FORMAT.pipe_curly,
+                         callback=None):
+        """Non-blocking :meth:`spinrewriter.Api.unique_variation`."""
+        return self.submit(
+            self.api.unique_variation, text, protected_terms,
+            confidence_level, nested_spintax, spintax_format,
+            callback=callback)
+
+    def unique_variation_from_spintax(
+            self, text, nested_spintax=False,
+            spintax_format=Api.SPINTAX_FORMAT.pipe_curly, callback=None):
+        """Non-blocking :meth:`spinrewriter.Api.unique_variation_from_spintax`.
+        """
+        return self.submit(
+            self.api.unique_variation_from_spintax, text, nested_spintax,
+            spintax_format, callback=callback)
+
+    def close(self):
+        """Wait for pending requests and release worker threads and
+        connections."""
+        self.workers.close()
+        self.workers.join()
+        self.api.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncSpinRewriter(SpinRewriter):
+    """Non-blocking counterpart of :class:`spinrewriter.SpinRewriter`."""
+
+    def __init__(self, email_address, api_key, concurrency=10):
+        self.email_address = email_address
+        self.api_key = api_key
+        self.async_api = AsyncApi(email_address, api_key, concurrency)
+        self.api = self.async_api.api
+        self.templates = None
+
+    def unique_variation(
+            self, text, confidence_level=Api.CONFIDENCE_LVL.medium,
+            callback=None):
+        """Non-blocking :meth:`spinrewriter.SpinRewriter.unique_variation`.
+        """
+        return self.async_api.submit(
+            SpinRewriter.unique_variation, self, text, confidence_level,
+            callback=callback)
+
+    def text_with_spintax(
+            self, text, confidence_level=Api.CONFIDENCE_LVL.medium,
+            callback=None):
+        """Non-blocking :meth:`spinrewriter.SpinRewriter.text_with_spintax`.
+        """
+        return self.async_api.submit(
+            SpinRewriter.text_with_spintax, self, text, confidence_level,
+            callback=callback)
+
+    def unique_variations(self, texts, *args, **kwargs):
+        """Blocking :meth:`spinrewriter.SpinRewriter.unique_variations`.
+
+        Texts are processed by a blocking :class:`spinrewriter.SpinRewriter`
+        sharing this rewriter's Api, so every result holds the variation
+        rather than a pending call.
+        """
+        rewriter = SpinRewriter(self.email_address, self.api_key)
+        rewriter.api = self.api
+        return rewriter.unique_variations(texts, *args, **kwargs)
+
+    def close(self):
+        """See :meth:`AsyncApi.close`."""
+        self.async_api.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
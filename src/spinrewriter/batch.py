@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""Run many API calls concurrently on a thread or process pool."""
+
+from collections import deque
+from collections import namedtuple
+from collections import OrderedDict
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+
+import hashlib
+import Queue
+import threading
+
+
+Result = namedtuple('Result', ['index', 'text', 'value', 'error'])
+"""outcome of processing a single text: its position in the input, the text
+itself, and either the returned value or the raised exception"""
+
+_worker = None
+"""callable used by pool processes, see :func:`_init_process`"""
+
+
+class DedupStats(object):
+    """Counters of a deduplicated batch, updated as it runs."""
+
+    def __init__(self):
+        self.texts = 0
+        """number of texts read"""
+        self.unique = 0
+        """number of calls made, one per distinct text unless its result
+        was forgotten before the text repeated"""
+
+    @property
+    def saved(self):
+        """Number of calls saved by deduplication."""
+        return self.texts - self.unique
+
+    def __str__(self):
+        return '{0} texts, {1} unique, {2} calls saved'.format(
+            self.texts, self.unique, self.saved)
+
+
+def dedup_key(text):
+    """Return a digest identifying text regardless of its whitespace."""
+    if not isinstance(text, unicode):
+        text = text.decode('utf-8')
+    text = u' '.join(text.split())
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+def _call(func, index, text):
+    """Call func(text) and wrap the outcome into a :class:`Result`."""
+    try:
+        return Result(index, text, func(text), None)
+    except Exception as e:
+        return Result(index, text, None, e)
+
+
+def _init_process(factory, args, method, kwargs):
+    """Create the client used by a pool process."""
+    global _worker
+    client = factory(*args)
+
+    def worker(text):
+        return getattr(client, method)(text, **kwargs)
+    _worker = worker
+
+
+def _process_item(item):
+    """Process a single (index, text) pair in a pool process."""
+    return _call(_worker, *item)
+
+
+def _bounded(items, semaphore, stopped):
+    """Enumerate items, but block while too many of them are in flight."""
+    for item in enumerate(items):
+        semaphore.acquire()
+        if stopped.is_set():
+            return
+        yield item
+
+
+def _imap(pool, worker, items, bound, ordered):
+    """Feed items to the pool lazily and yield results as they arrive.
+
+    At most ``bound`` items are read from ``items`` ahead of the consumer,
+    so arbitrarily long (or endless) iterables can be processed in constant
+    memory.
+    """
+    semaphore = threading.Semaphore(bound)
+    stopped = threading.Event()
+    imap = pool.imap if ordered else pool.imap_unordered
+    try:
+        for result in imap(worker, _bounded(items, semaphore, stopped)):
+            semaphore.release()
+            yield result
+    finally:
+        # unblock the feeder in case the consumer stopped early
+        stopped.set()
+        semaphore.release()
+        pool.terminate()
+        pool.join()
+
+
+def _imap_unique(pool, worker, texts, bound, ordered, stats, maxresults):
+    """Like :func:`_imap`, but process every distinct text only once and
+    fan its result out to all of its positions.
+
+    Only digests of distinct texts and their results are remembered, up to
+    ``maxresults`` of them besides those still awaited; at most ``bound``
+    texts are read ahead of the consumer.
+    """
+    completed = Queue.Queue()
+    results = OrderedDict()  # digest -> (value, error), None in flight
+    waiting = {}  # digest -> number of its positions not yielded yet
+    pending = deque()  # (index, text, digest) not yielded yet
+    texts = enumerate(texts)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < bound:
+                try:
+                    index, text = next(texts)
+                except StopIteration:
+                    exhausted = True
+                    break
+                key = dedup_key(text)
+                stats.texts += 1
+                if key in results:
+                    results[key] = results.pop(key)  # most recently seen
+                else:
+                    results[key] = None
+                    stats.unique += 1
+                    pool.apply_async(
+                        worker, ((key, text), ), callback=completed.put)
+                waiting[key] = waiting.get(key, 0) + 1
+                pending.append((index, text, key))
+
+            if ordered:
+                ready = []
+                while pending and results[pending[0][2]] is not None:
+                    ready.append(pending.popleft())
+            else:
+                ready = [p for p in pending if results[p[2]] is not None]
+                pending = deque(p for p in pending if results[p[2]] is None)
+            for index, text, key in ready:
+                waiting[key] -= 1
+                if not waiting[key]:
+                    del waiting[key]
+                yield Result(index, text, *results[key])
+            _evict(results, waiting, maxresults)
+
+            if pending:
+                result = completed.get()
+                results[result.index] = (result.value, result.error)
+            elif exhausted:
+                return
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _evict(results, waiting, maxresults):
+    """Forget the least recently seen results no position waits for, until
+    at most maxresults are left."""
+    excess = len(results) - maxresults
+    keys = []
+    for key in results:
+        if len(keys) >= excess:
+            break
+        if key not in waiting:
+            keys.append(key)
+    for key in keys:
+        del results[key]
+
+
+def imap(func, texts, workers=8, ordered=True):
+    """Call ``func`` on every text using a pool of threads.
+
+    :param func: function to call with every text
+    :type func: callable
+    :param texts: texts to process
+    :type texts: iterable
+    :param workers: number of threads
+    :type workers: int
+    :param ordered: yield results in input order (True) or as they
+        complete (False)
+    :type ordered: boolean
+
+    :return: generator of :class:`Result` tuples
+    """
+    def worker(item):
+        return _call(func, *item)
+
+    return _imap(ThreadPool(workers), worker, texts, workers * 2, ordered)
+
+
+def imap_unique(func, texts, workers=8, ordered=True, stats=None,
+                maxresults=10000):
+    """Like :func:`imap`, but call ``func`` only once per distinct text.
+
+    Texts that differ only in whitespace are the same text. Every position
+    of a repeated text gets the result (or error) of its first occurrence.
+
+    Results of the ``maxresults`` most recently seen distinct texts are
+    kept, so memory does not grow with the size of the batch; a text that
+    repeats after its result was forgotten is processed again.
+
+    :param stats: (optional) counters updated as texts are processed
+    :type stats: DedupStats
+    :param maxresults: (optional) number of results kept for repeated texts
+    :type maxresults: int
+
+    :return: generator of :class:`Result` tuples
+    """
+    def worker(item):
+        return _call(func, *item)
+
+    return _imap_unique(ThreadPool(workers), worker, texts, workers * 2,
+                        ordered, DedupStats() if stats is None else stats,
+                        maxresults)
+
+
+def imap_processes(factory, args, method, kwargs, texts, workers=8,
+                   ordered=True):
+    """Call ``factory(*args).method(text, **kwargs)`` on every text using
+    a pool of processes.
+
+    Every process creates its own client, so ``factory``, ``args`` and
+    ``kwargs`` must be picklable.
+
+    :return: generator of :class:`Result` tuples
+    """
+    pool = Pool(workers, _init_process, (factory, args, method, kwargs))
+    return _imap(pool, _process_item, texts, workers * 2, ordered)
+
+
+def imap_unique_processes(factory, args, method, kwargs, texts, workers=8,
+                          ordered=True, stats=None, maxresults=10000):
+    """Like :func:`imap_processes`, but call the method only once per
+    distinct text, see :func:`imap_unique`.
+
+    :return: generator of :class:`Result` tuples
+    """
+    pool = Pool(workers, _init_process, (factory, args, method, kwargs))
+    return _imap_unique(pool, _process_item, texts, workers * 2, ordered,
+                        DedupStats() if stats is None else stats, maxresults)
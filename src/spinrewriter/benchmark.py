@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Measure throughput and latency of transports against a local emulator,
+and the cost of classifying API errors.
+
+Run with ``python -m spinrewriter.benchmark`` to compare all transports.
+"""
+
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.emulator import EmulatorServer
+from spinrewriter.emulator import ERRORS
+from spinrewriter.pool import ConnectionPool
+from spinrewriter.transport import FakeTransport
+from spinrewriter.transport import UrllibTransport
+
+import re
+import sys
+import time
+
+
+Stats = namedtuple(
+    'Stats', ['requests', 'seconds', 'throughput', 'mean', 'p50', 'p95'])
+"""results of a benchmark run, latencies are in milliseconds"""
+
+
+def measure(api, requests=100, concurrency=1,
+            text=u'This is my cute dog.'):
+    """Send ``requests`` text_with_spintax calls through ``api``.
+
+    :param api: API client to benchmark
+    :type api: spinrewriter.Api
+    :param requests: number of requests to send
+    :type requests: int
+    :param concurrency: number of threads sending requests
+    :type concurrency: int
+    :param text: text to send
+    :type text: unicode
+
+    :return: throughput (requests per second) and latency statistics
+    :rtype: Stats
+    """
+    def timed(_):
+        start = time.time()
+        api.text_with_spintax(text)
+        return time.time() - start
+
+    pool = ThreadPool(concurrency)
+    start = time.time()
+    try:
+        latencies = sorted(pool.map(timed, range(requests)))
+    finally:
+        pool.close()
+        pool.join()
+    seconds = time.time() - start
+
+    def ms(value):
+        return value * 1000.0
+
+    return Stats(
+        requests=requests,
+        seconds=seconds,
+        throughput=requests / seconds,
+        mean=ms(sum(latencies) / len(latencies)),
+        p50=ms(latencies[len(latencies) // 2]),
+        p95=ms(latencies[int(len(latencies) * 0.95)]),
+    )
+
+
+def compare(requests=1000, concurrency=4):
+    """Benchmark every transport against a local emulator.
+
+    :return: benchmark results keyed by transport name
+    :rtype: dictionary
+    """
+    emulator = ApiEmulator('foo@bar.com', 'key', quota=sys.maxint)
+    server = EmulatorServer(emulator)
+    server.start()
+    transports = [
+        ('urllib', UrllibTransport(server.url)),
+        ('pool', ConnectionPool(server.url, concurrency)),
+        ('fake', FakeTransport(emulator)),
+    ]
+    results = {}
+    try:
+        for name, transport in transports:
+            api = Api('foo@bar.com', 'key', transport=transport,
+                      coalesce=False)
+            results[name] = measure(api, requests, concurrency)
+            transport.close()
+    finally:
+        server.stop()
+    return results
+
+
+def _sequential(error_msg):
+    """Classify an error with one re.match call per known message, the way
+    Api._raise_error used to."""
+    for _, exception, pattern in ex.ERROR_PATTERNS:
+        if re.match(pattern, error_msg, re.IGNORECASE):
+            return exception
+    return ex.UnknownApiError
+
+
+def classification(rounds=10000):
+    """Time classification of every error message of the API.
+
+    :param rounds: number of times every message is classified
+    :type rounds: int
+
+    :return: microseconds per message, for the compiled classifier and for
+        sequential re.match calls
+    :rtype: dictionary
+    """
+    messages = [msg.format(quota=100, frequency=7)
+                for msg in ERRORS.values()] + [u'Something unexpected.']
+    results = {}
+    for name, func in [('compiled', ex.classify),
+                       ('sequential', _sequential)]:
+        start = time.time()
+        for _ in range(rounds):
+            for msg in messages:
+                func(msg)
+        results[name] = (time.time() - start) * 1e6 / (
+            rounds * len(messages))
+    return results
+
+
+def main(argv=None, out=sys.stdout):
+    """Print a comparison of all transports and of error classifiers.
+
+    :param argv: optional number of requests (also rounds of error
+        classification) and concurrency
+    :type argv: list of strings
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = [int(arg) for arg in argv]
+    results = compare(*args)
+    out.write('{0:<10} {1:>10} {2:>9} {3:>9} {4:>9}\n'.format(
+        'transport', 'req/s', 'mean ms', 'p50 ms', 'p95 ms'))
+    for name, stats in sorted(results.items()):
+        out.write('{0:<10} {1:>10.1f} {2:>9.3f} {3:>9.3f} {4:>9.3f}\n'.format(
+            name, stats.throughput, stats.mean, stats.p50, stats.p95))
+    out.write('\n{0:<10} {1:>10}\n'.format('errors', 'us/msg'))
+    for name, micros in sorted(classification(*args[:1]).items()):
+        out.write('{0:<10} {1:>10.3f}\n'.format(name, micros))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
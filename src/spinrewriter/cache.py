@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Caches for API responses.
+
+Pass a cache to :class:`spinrewriter.Api` to have responses of
+``text_with_spintax`` requests reused whenever the same text is submitted
+again with the same options, instead of spending API quota on it.
+"""
+
+from collections import OrderedDict
+from spinrewriter.database import Database
+from spinrewriter.database import transaction
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import urllib
+import zlib
+
+
+KEY_PARAMS = ('action', 'text', 'protected_terms', 'confidence_level',
+              'nested_spintax', 'spintax_format')
+"""request parameters that determine the response (credentials do not)"""
+
+
+def cache_key(params):
+    """Return cache key for the given request parameters.
+
+    :param params: request parameters as packed by
+        :meth:`spinrewriter.Api._transform_plain_text`
+    :type params: tuple of 2-tuples
+
+    :rtype: string
+    """
+    relevant = [(name, value) for name, value in params
+                if name in KEY_PARAMS]
+    return hashlib.sha1(urllib.urlencode(relevant)).hexdigest()
+
+
+class Cache(object):
+    """Base class for caches, keeping track of hits and misses."""
+
+    def __init__(self):
+        self.hits = 0
+        """number of lookups that found a response"""
+        self.misses = 0
+        """number of lookups that did not find a response"""
+
+    def get(self, key):
+        """Return cached response for key or None.
+
+        :rtype: dictionary
+        """
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Store response under the given key.
+
+        :param key: cache key, see :func:`cache_key`
+        :type key: string
+        :param value: API response
+        :type value: dictionary
+        """
+        raise NotImplementedError
+
+
+class LRUCache(Cache):
+    """In-memory cache that evicts the least recently used responses once it
+    holds ``maxsize`` of them."""
+
+    def __init__(self, maxsize=1024):
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _get(self, key):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return None
+            self._data[key] = value  # mark as most recently used
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class TTLCache(LRUCache):
+    """:class:`LRUCache` whose entries also expire ``ttl`` seconds after they
+    were stored."""
+
+    def __init__(self, maxsize=1024, ttl=24 * 60 * 60, clock=time.time):
+        super(TTLCache, self).__init__(maxsize)
+        self.ttl = ttl
+        self.clock = clock
+
+    def _get(self, key):
+        entry = super(TTLCache, self)._get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= self.clock():
+            with self._lock:
+                self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value):
+        super(TTLCache, self).set(key, (self.clock() + self.ttl, value))
+
+
+class SQLiteCache(Cache):
+    """Persistent cache in an SQLite database, shared by all processes and
+    threads on the host that use the same file.
+
+    Responses are stored zlib-compressed. Once their total compressed size
+    exceeds ``max_bytes``, the least recently used ones are evicted. The
+    database runs in write-ahead-log mode, so readers never block writers.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS responses ('
+        ' key TEXT PRIMARY KEY,'
+        ' value BLOB NOT NULL,'
+        ' size INTEGER NOT NULL,'
+        ' accessed REAL NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS responses_accessed '
+        'ON responses (accessed)',
+        'CREATE TABLE IF NOT EXISTS meta ('
+        ' name TEXT PRIMARY KEY,'
+        ' value INTEGER NOT NULL)',
+        "INSERT OR IGNORE INTO meta VALUES ('size', 0)",
+    )
+
+    def __init__(self, path, max_bytes=100 * 1024 * 1024, timeout=30):
+        """
+        :param path: path to the database file
+        :type path: string
+        :param max_bytes: (optional) maximum total size of stored responses
+        :type max_bytes: int
+        :param timeout: (optional) seconds to wait for a lock held by another
+            process
+        :type timeout: float
+        """
+        super(SQLiteCache, self).__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._database = Database(path, self.SCHEMA, timeout)
+        self._connection()  # create the database
+
+    def _connection(self):
+        """Return a connection for the current thread and process."""
+        return self._database.connection()
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @property
+    def size(self):
+        """Total size of stored (compressed) responses in bytes."""
+        return self._connection().execute(
+            "SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+
+    def _get(self, key):
+        con = self._connection()
+        row = con.execute(
+            'SELECT value FROM responses WHERE key = ?', (key, )).fetchone()
+        if row is None:
+            return None
+        con.execute('UPDATE responses SET accessed = ? WHERE key = ?',
+                    (time.time(), key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key, value):
+        self._store([(key, value)])
+
+    def _store(self, items):
+        con = self._connection()
+        with transaction(con):
+            for key, value in items:
+                blob = zlib.compress(json.dumps(value))
+                row = con.execute('SELECT size FROM responses WHERE key = ?',
+                                  (key, )).fetchone()
+                con.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                    (key, sqlite3.Binary(blob), len(blob), time.time()))
+                con.execute(
+                    "UPDATE meta SET value = value + ? WHERE name = 'size'",
+                    (len(blob) - (row[0] if row else 0), ))
+            self._evict(con)
+
+    def _evict(self, con):
+        """Delete least recently used responses until under max_bytes."""
+        excess = con.execute(
+            "SELECT value FROM meta WHERE name = 'size'").fetchone()[0] - \
+            self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        keys = []
+        for key, size in con.execute(
+                'SELECT key, size FROM responses ORDER BY accessed'):
+            keys.append((key, ))
+            freed += size
+            if freed >= excess:
+                break
+        con.executemany('DELETE FROM responses WHERE key = ?', keys)
+        con.execute("UPDATE meta SET value = value - ? WHERE name = 'size'",
+                    (freed, ))
+
+    def dump(self, fileobj):
+        """Write all cached responses to a file, one JSON object per line,
+        e.g. to warm up the cache of a fresh deployment with :meth:`load`.
+
+        :param fileobj: file opened for writing
+        :type fileobj: file
+        """
+        rows = self._connection().execute(
+            'SELECT key, value FROM responses ORDER BY accessed')
+        for key, value in rows:
+            fileobj.write(json.dumps(
+                {'key': key, 'value': json.loads(zlib.decompress(value))}))
+            fileobj.write('\n')
+
+    def load(self, fileobj):
+        """Store responses written by :meth:`dump` into the cache.
+
+        :param fileobj: file opened for reading
+        :type fileobj: file
+        """
+        items = []
+        for line in fileobj:
+            if line.strip():
+                item = json.loads(line)
+                items.append((item['key'], item['value']))
+            if len(items) == 1000:
+                self._store(items)
+                items = []
+        self._store(items)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Splitting of long texts into chunks the API accepts.
+
+>>> chunks, separators = split(text, 4000)
+>>> join([spin(chunk) for chunk in chunks], separators)
+
+Texts are split at paragraph boundaries, paragraphs that are too long at
+sentence boundaries and sentences that are too long between words. The
+whitespace at every seam is kept aside, so the processed chunks can be
+joined back into a document with the original layout.
+"""
+
+import re
+
+
+BOUNDARIES = (
+    re.compile(r'(\s*\n\s*\n\s*)', re.UNICODE),  # paragraphs
+    re.compile(r'(?<=[.!?])(\s+)', re.UNICODE),  # sentences
+    re.compile(r'(\s+)', re.UNICODE),  # words
+)
+"""patterns matching the whitespace between pieces of text, coarsest first"""
+
+
+def count_words(text):
+    """Return the number of words in text."""
+    return len(text.split())
+
+
+def _pieces(text, max_words, boundaries):
+    """Yield (piece, separator) pairs, splitting text at the coarsest
+    boundaries that make every piece fit in max_words."""
+    parts = boundaries[0].split(text)
+    for i in range(0, len(parts), 2):
+        piece = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else u''
+        if count_words(piece) <= max_words or len(boundaries) == 1:
+            yield piece, separator
+            continue
+        sub = list(_pieces(piece, max_words, boundaries[1:]))
+        for sub_piece, sub_separator in sub[:-1]:
+            yield sub_piece, sub_separator
+        yield sub[-1][0], separator
+
+
+def split(text, max_words, merge=True):
+    """Split text into chunks of at most max_words words.
+
+    :param text: text to split
+    :type text: string
+    :param max_words: maximum number of words in a chunk
+    :type max_words: int
+    :param merge: (optional) merge consecutive paragraphs (sentences) into
+        chunks as long as they fit, otherwise every paragraph (or sentence
+        of a paragraph that is too long) is a chunk of its own
+    :type merge: boolean
+
+    :return: chunks and the whitespace around them; there is one separator
+        more than there are chunks: before the first chunk, between every
+        two chunks and after the last one
+    :rtype: 2-tuple of lists of strings
+    """
+    core = text.strip()
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()):] if core else u''
+    chunks = []
+    separators = [leading]
+    current = []
+    words = 0
+    for piece, separator in _pieces(core, max_words, BOUNDARIES):
+        count = count_words(piece)
+        if current and (not merge or words + count > max_words):
+            chunks.append(u''.join(current[:-1]))
+            separators.append(current[-1])
+            current = []
+            words = 0
+        current.extend((piece, separator))
+        words += count
+    chunks.append(u''.join(current[:-1]))
+    separators.append(trailing)
+    return chunks, separators
+
+
+def join(chunks, separators):
+    """Join (processed) chunks returned by :func:`split` back together.
+
+    :param chunks: chunks, in order
+    :type chunks: iterable of strings
+    :param separators: separators returned by :func:`split`
+    :type separators: list of strings
+
+    :rtype: string
+    """
+    parts = [separators[0]]
+    for chunk, separator in zip(chunks, separators[1:]):
+        parts.extend((chunk, separator))
+    return u''.join(parts)
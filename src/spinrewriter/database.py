@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""SQLite databases shared by the threads and processes of a host.
+
+Used by :class:`spinrewriter.cache.SQLiteCache` and
+:class:`spinrewriter.jobs.JobQueue`::
+
+    database = Database(path, schema)
+    con = database.connection()
+    with transaction(con):
+        con.execute(...)
+"""
+
+from contextlib import contextmanager
+
+import os
+import sqlite3
+import threading
+
+
+class Database(object):
+    """An SQLite database file with a connection per thread and process.
+
+    Connections are in autocommit mode, so statements that write take
+    :func:`transaction`. The database runs in write-ahead-log mode, so
+    readers never block writers.
+    """
+
+    def __init__(self, path, schema=(), timeout=30):
+        """
+        :param path: path to the database file
+        :type path: string
+        :param schema: (optional) statements creating tables and indexes if
+            they do not exist yet, run on every new connection
+        :type schema: tuple of strings
+        :param timeout: (optional) seconds to wait for a lock held by another
+            process
+        :type timeout: float
+        """
+        self.path = path
+        self.schema = schema
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def connection(self):
+        """Return a connection for the current thread and process.
+
+        :rtype: sqlite3.Connection
+        """
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            con = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            with transaction(con):
+                for statement in self.schema:
+                    con.execute(statement)
+            local.con = con
+            local.pid = os.getpid()
+        return local.con
+
+
+@contextmanager
+def transaction(con):
+    """Run a block of statements in an immediate (write-locked) transaction
+    on an autocommit connection.
+
+    :param con: connection of a :class:`Database`
+    :type con: sqlite3.Connection
+    """
+    con.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except Exception:
+        con.execute('ROLLBACK')
+        raise
+    con.execute('COMMIT')
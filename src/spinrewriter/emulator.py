@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""A local stand-in for the Spin Rewriter ``/action/api`` endpoint.
+
+:class:`ApiEmulator` reproduces the API's responses, its error messages,
+the daily quota counters and the limit on how often entirely new text can
+be submitted. Use it in-process through
+:class:`spinrewriter.transport.FakeTransport` or over HTTP through
+:class:`EmulatorServer` to test and load-test without the live service.
+"""
+
+from BaseHTTPServer import BaseHTTPRequestHandler
+from BaseHTTPServer import HTTPServer
+from collections import deque
+from SocketServer import ThreadingMixIn
+from spinrewriter import Api
+from spinrewriter import spintax
+
+import json
+import random
+import re
+import threading
+import time
+import urlparse
+
+
+ERRORS = {
+    'missing_params': u'Email address and unique API key are both '
+                      u'required. At least one is missing.',
+    'unknown_email': u'Authentication failed. No user with this email '
+                     u'address found.',
+    'invalid_key': u'Authentication failed. Unique API key is not valid '
+                   u'for this user.',
+    'no_subscription': u'This user does not have a valid Spin Rewriter '
+                       u'subscription.',
+    'quota': u'API quota exceeded. You can make {quota} requests per day.',
+    'frequency': u'You can only submit entirely new text for analysis once '
+                 u'every {frequency} seconds.',
+    'unknown_action': u'Requested action does not exist. Please refer to '
+                      u'the Spin Rewriter API documentation.',
+    'too_short': u'Original text too short.',
+    'too_long': u'Original text too long. Text can have up to 4,000 words.',
+    'too_long_analyzed': u'Original text after analysis too long. Text can '
+                         u'have up to 4,000 words.',
+    'spintax_invalid': u'Spinning syntax invalid. With this action you '
+                       u'should provide text with existing valid '
+                       u'{{first option|second option}} spintax.',
+    'spintax_recheck': u'The {{first|second}} spinning syntax invalid. '
+                       u'Re-check the syntax, i.e. curly brackets and pipes.',
+    'analysis_failed': u'Analysis of your text failed. Please inform us '
+                       u'about this.',
+    'synonyms_failed': u'Synonyms for your text could not be loaded. Please '
+                       u'inform us about this.',
+    'new_project': u'Unable to load your new analyzed project.',
+    'existing_project': u'Unable to load your existing analyzed project.',
+    'project_not_found': u'Unable to find your project in the database.',
+    'analyzed_project': u'Unable to load your analyzed project.',
+    'rewrite_failed': u'One-Click Rewrite failed.',
+}
+"""error messages returned by the API, keyed by a short name (these are
+format strings, taking the account's ``quota`` and ``frequency``)"""
+
+
+class ApiEmulator(object):
+    """In-memory emulation of a single Spin Rewriter account."""
+
+    SYNONYMS = {
+        u'dog': [u'pet', u'animal'],
+        u'cute': [u'adorable', u'sweet'],
+        u'text': [u'content', u'copy'],
+        u'big': [u'large', u'huge'],
+        u'small': [u'little', u'tiny'],
+        u'happy': [u'glad', u'cheerful'],
+        u'fast': [u'quick', u'rapid'],
+        u'good': [u'fine', u'great'],
+    }
+    """synonyms used when spinning text"""
+
+    MIN_WORDS = 1
+    """texts with fewer words are rejected as too short"""
+
+    MAX_WORDS = 4000
+    """texts with more words are rejected as too long"""
+
+    def __init__(self, email_address, api_key, quota=100, frequency=7,
+                 subscription=True, clock=time.time):
+        """
+        :param email_address: email address of the emulated account
+        :type email_address: string
+        :param api_key: API key of the emulated account
+        :type api_key: string
+        :param quota: number of requests allowed in 24 hours
+        :type quota: int
+        :param frequency: seconds that have to pass between submissions of
+            entirely new text
+        :type frequency: int
+        :param subscription: whether the account has a valid subscription
+        :type subscription: boolean
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        """
+        self.email_address = email_address
+        self.api_key = api_key
+        self.quota = quota
+        self.frequency = frequency
+        self.subscription = subscription
+        self.clock = clock
+        self.random = random.Random()
+        self.requests = deque()
+        """timestamps of requests counted against the quota"""
+        self.seen = set()
+        """texts that were already analyzed"""
+        self.last_new_text = None
+        self.injected = deque()
+        self._lock = threading.Lock()
+
+    def inject(self, error):
+        """Make the next request fail with the given error.
+
+        :param error: key of :data:`ERRORS` or a literal error message
+        :type error: string
+        """
+        if error in ERRORS:
+            error = self._message(error)
+        self.injected.append(error)
+
+    def handle(self, params):
+        """Process a request and return the response fields.
+
+        :param params: request parameters
+        :type params: dictionary
+
+        :return: response fields
+        :rtype: dictionary
+        """
+        with self._lock:
+            return self._handle(params)
+
+    def _message(self, name):
+        return ERRORS[name].format(
+            quota=self.quota, frequency=self.frequency)
+
+    def _error(self, msg):
+        return {
+            Api.RESP_P_NAMES.status: Api.STATUS.error,
+            Api.RESP_P_NAMES.response: msg,
+        }
+
+    def _requests_made(self, now):
+        while self.requests and self.requests[0] <= now - 24 * 60 * 60:
+            self.requests.popleft()
+        return len(self.requests)
+
+    def _handle(self, params):
+        now = self.clock()
+        email = params.get(Api.REQ_P_NAMES.email_address)
+        key = params.get(Api.REQ_P_NAMES.api_key)
+        action = params.get(Api.REQ_P_NAMES.action)
+
+        if not email or not key:
+            return self._error(self._message('missing_params'))
+        if email != self.email_address:
+            return self._error(self._message('unknown_email'))
+        if key != self.api_key:
+            return self._error(self._message('invalid_key'))
+        if not self.subscription:
+            return self._error(self._message('no_subscription'))
+        if action not in Api.ACTION:
+            return self._error(self._message('unknown_action'))
+
+        made = self._requests_made(now)
+        if action == Api.ACTION.api_quota:
+            return {
+                Api.RESP_P_NAMES.status: Api.STATUS.ok,
+                Api.RESP_P_NAMES.response: (
+                    u'You made {0} API requests in the last 24 hours. '
+                    u'{1} still available.'.format(made, self.quota - made)),
+                Api.RESP_P_NAMES.api_requests_made: made,
+                Api.RESP_P_NAMES.api_requests_available: self.quota - made,
+            }
+        if made >= self.quota:
+            return self._error(self._message('quota'))
+        if self.injected:
+            return self._error(self.injected.popleft())
+
+        text = params.get(Api.REQ_P_NAMES.text, '').decode('utf-8')
+        spintax_format = params.get(
+            Api.REQ_P_NAMES.spintax_format, Api.SPINTAX_FORMAT.pipe_curly)
+        if spintax_format not in spintax.FORMATS:
+            spintax_format = Api.SPINTAX_FORMAT.pipe_curly
+        counted = text
+        if action == Api.ACTION.unique_variation_from_spintax:
+            try:  # words of a variation count, not those of alternatives
+                counted = spintax.parse(text, spintax_format).variation(0)
+            except spintax.SpintaxError:
+                pass
+        words = len(counted.split())
+        if words < self.MIN_WORDS:
+            return self._error(self._message('too_short'))
+        if words > self.MAX_WORDS:
+            return self._error(self._message('too_long'))
+
+        response = {
+            Api.RESP_P_NAMES.status: Api.STATUS.ok,
+            Api.RESP_P_NAMES.confidence_level: params.get(
+                Api.REQ_P_NAMES.confidence_level,
+                Api.CONFIDENCE_LVL.medium),
+            'nested_spintax': params.get(
+                Api.REQ_P_NAMES.nested_spintax, 'false').lower(),
+        }
+        if action == Api.ACTION.unique_variation_from_spintax:
+            try:
+                response[Api.RESP_P_NAMES.response] = self.render(
+                    text, spintax_format)
+            except ValueError:
+                return self._error(self._message('spintax_invalid'))
+        else:
+            if text not in self.seen:
+                if (self.last_new_text is not None and
+                        now - self.last_new_text < self.frequency):
+                    return self._error(self._message('frequency'))
+                self.last_new_text = now
+                self.seen.add(text)
+            protected = params.get(
+                Api.REQ_P_NAMES.protected_terms, '').decode('utf-8')
+            protected = [t for t in protected.split('\n') if t]
+            spun = self.spin(text, protected, spintax_format)
+            if action == Api.ACTION.unique_variation:
+                spun = self.render(spun, spintax_format)
+            response[Api.RESP_P_NAMES.response] = spun
+            response[Api.RESP_P_NAMES.protected_terms] = u', '.join(protected)
+
+        self.requests.append(now)
+        response[Api.RESP_P_NAMES.api_requests_made] = made + 1
+        response[Api.RESP_P_NAMES.api_requests_available] = \
+            self.quota - made - 1
+        return response
+
+    def spin(self, text, protected_terms, spintax_format):
+        """Insert spintax for all words with known synonyms.
+
+        :param text: text to spin
+        :type text: unicode
+        :param protected_terms: words that must be left intact
+        :type protected_terms: list of unicode strings
+        :param spintax_format: one of :attr:`Api.SPINTAX_FORMAT`
+        :type spintax_format: string
+
+        :return: text with spintax
+        :rtype: unicode
+        """
+        start, sep, end = spintax.FORMATS[spintax_format]
+        protected = set(t.lower() for t in protected_terms)
+
+        def replace(match):
+            word = match.group(0)
+            synonyms = self.SYNONYMS.get(word.lower())
+            if not synonyms or word.lower() in protected:
+                return word
+            return start + sep.join([word] + synonyms) + end
+
+        return re.sub(r'\w+', replace, text, flags=re.UNICODE)
+
+    def render(self, text, spintax_format):
+        """Pick a random variation of text with (possibly nested) spintax.
+
+        :raises spinrewriter.spintax.SpintaxError: when spintax is invalid
+        """
+        return spintax.parse(text, spintax_format).render(self.random)
+
+
+class EmulatorHandler(BaseHTTPRequestHandler):
+    """Serve :class:`ApiEmulator` responses over HTTP/1.1 keep-alive."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        params = dict(urlparse.parse_qsl(
+            self.rfile.read(length), keep_blank_values=True))
+        body = json.dumps(self.server.emulator.handle(params))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class EmulatorServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server exposing an :class:`ApiEmulator` on localhost."""
+    daemon_threads = True
+
+    def __init__(self, emulator, host='127.0.0.1', port=0):
+        HTTPServer.__init__(self, (host, port), EmulatorHandler)
+        self.emulator = emulator
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL to use instead of :attr:`Api.URL`."""
+        return 'http://{0}:{1}/action/api'.format(*self.server_address)
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05, ))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving requests and close the listening socket."""
+        self.shutdown()
+        self._thread.join()
+        self.server_close()
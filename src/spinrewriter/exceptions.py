@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 
+from collections import namedtuple
+
+import re
+
 
 class SpinRewriterApiError(Exception):
     """Base class for exceptions in Spin Rewriter module."""
@@ -8,6 +12,10 @@ class SpinRewriterApiError(Exception):
         super(SpinRewriterApiError, self).__init__()
         self.api_error_msg = api_error_msg
 
+    def __reduce__(self):
+        # make exceptions picklable, so they can cross process boundaries
+        return (self.__class__, (self.api_error_msg, ))
+
 
 class AuthenticationError(SpinRewriterApiError):
     """Raised when authentication error occurs."""
@@ -20,6 +28,11 @@ class QuotaLimitError(SpinRewriterApiError):
     def __str__(self):
         return u'Quota limit for API calls reached.'
 
+    @property
+    def daily_quota(self):
+        """Requests allowed per day as stated in the message, or None."""
+        return classify(self.api_error_msg).daily_quota
+
 
 class UsageFrequencyError(SpinRewriterApiError):
     """Raised when subsequent API requests are made in a too short time
@@ -27,6 +40,12 @@ class UsageFrequencyError(SpinRewriterApiError):
     def __str__(self):
         return u'Not enough time passed since last API request.'
 
+    @property
+    def seconds(self):
+        """Seconds between submissions of new text as stated in the message,
+        or None."""
+        return classify(self.api_error_msg).seconds
+
 
 class UnknownActionError(SpinRewriterApiError):
     """Raised when unknown API action is requested."""
@@ -58,3 +77,91 @@ class UnknownApiError(SpinRewriterApiError):
     def __str__(self):
         return (u'Unrecognized API error message received: {}'.format(
             self.api_error_msg))
+
+
+class CircuitOpenError(SpinRewriterApiError):
+    """Raised when requests are suspended because the API keeps failing."""
+    def __str__(self):
+        return u'Too many failed API requests, requests are suspended.'
+
+
+ERROR_PATTERNS = (
+    ('unknown_email', AuthenticationError,
+     r'Authentication failed\. No user with this email address found\.'),
+    ('invalid_key', AuthenticationError,
+     r'Authentication failed\. Unique API key is not valid for this user\.'),
+    ('no_subscription', AuthenticationError,
+     r'This user does not have a valid Spin Rewriter subscription\.'),
+    ('quota', QuotaLimitError,
+     r'API quota exceeded\. You can make (?P<daily_quota>\d+) requests '
+     r'per day\.'),
+    ('frequency', UsageFrequencyError,
+     r'You can only submit entirely new text for analysis once every '
+     r'(?P<seconds>\d+) seconds\.'),
+    ('unknown_action', UnknownActionError,
+     r'Requested action does not exist\. Please refer to the Spin Rewriter '
+     r'API documentation\.'),
+    ('missing_params', MissingParameterError,
+     r'Email address and unique API key are both required\. At least one '
+     r'is missing\.'),
+    ('too_short', ParamValueError, r'Original text too short\.'),
+    ('too_long', ParamValueError,
+     r'Original text too long\. Text can have up to [\d,]+ words\.'),
+    ('too_long_analyzed', ParamValueError,
+     r'Original text after analysis too long\. Text can have up to [\d,]+ '
+     r'words\.'),
+    ('spintax_invalid', ParamValueError, r'Spinning syntax invalid\.'),
+    ('spintax_recheck', ParamValueError,
+     r'The \{first\|second\} spinning syntax invalid\.'),
+    ('analysis_failed', InternalApiError,
+     r'Analysis of your text failed\. Please inform us about this\.'),
+    ('synonyms_failed', InternalApiError,
+     r'Synonyms for your text could not be loaded\. Please inform us about '
+     r'this\.'),
+    ('new_project', InternalApiError,
+     r'Unable to load your new analyzed project\.'),
+    ('existing_project', InternalApiError,
+     r'Unable to load your existing analyzed project\.'),
+    ('project_not_found', InternalApiError,
+     r'Unable to find your project in the database\.'),
+    ('analyzed_project', InternalApiError,
+     r'Unable to load your analyzed project\.'),
+    ('rewrite_failed', InternalApiError, r'One-Click Rewrite failed\.'),
+)
+"""(name, exception class, pattern) of every error message of the API,
+names match keys of :data:`spinrewriter.emulator.ERRORS`"""
+
+_CLASSIFIER = re.compile(
+    '|'.join('(?P<{0}>{1})'.format(name, pattern)
+             for name, _, pattern in ERROR_PATTERNS),
+    re.IGNORECASE)
+_EXCEPTIONS = dict((name, cls) for name, cls, _ in ERROR_PATTERNS)
+
+Classification = namedtuple(
+    'Classification', ['name', 'exception', 'daily_quota', 'seconds'])
+"""result of :func:`classify`"""
+
+_UNKNOWN = Classification('unknown', UnknownApiError, None, None)
+
+
+def classify(error_msg):
+    """Recognize an error message returned by the API in a single pass.
+
+    :param error_msg: error message as returned by the API
+    :type error_msg: string
+
+    :return: name of the error (see :data:`ERROR_PATTERNS`, 'unknown' if
+        not recognized), exception class to raise for it and numbers stated
+        in the message, if any
+    :rtype: Classification
+    """
+    match = _CLASSIFIER.match(error_msg)
+    if match is None:
+        return _UNKNOWN
+    name = match.lastgroup  # the outermost group closes last
+    daily_quota = match.group('daily_quota')
+    seconds = match.group('seconds')
+    return Classification(
+        name, _EXCEPTIONS[name],
+        int(daily_quota) if daily_quota else None,
+        int(seconds) if seconds else None)
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Durable, resumable processing of large batches of texts.
+
+:class:`JobQueue` keeps every text of a run and its outcome in an SQLite
+database. Results are recorded as soon as they arrive, so a run that dies
+half-way is resumed by running the queue again: finished texts are not
+sent to the API a second time and their results are replayed from the
+database::
+
+    queue = JobQueue('run.db')
+    queue.add(texts)  # texts already in the queue are ignored
+    queue.run(SpinRewriter(email, key).unique_variation, block=True)
+    for job in queue.results():
+        print job.key, job.value
+"""
+
+from collections import namedtuple
+from spinrewriter import batch
+from spinrewriter import exceptions as ex
+from spinrewriter.database import Database
+from spinrewriter.database import transaction
+
+import json
+import threading
+import time
+
+
+Job = namedtuple('Job', 'key text state value error error_type')
+"""A text of the queue, its state and result or error."""
+
+
+class JobQueue(object):
+    """Queue of texts to process, stored in an SQLite database.
+
+    Texts are processed in the order they were added. When the API quota is
+    used up, texts in flight stay pending and the queue is held until the
+    quota frees up, instead of failing the rest of the run. A database is
+    meant to be run by one process at a time.
+    """
+
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    PAGE = 500
+    """number of jobs read from the database at once"""
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        ' id INTEGER PRIMARY KEY,'
+        ' key TEXT UNIQUE NOT NULL,'
+        ' text TEXT NOT NULL,'
+        ' state TEXT NOT NULL,'
+        ' value TEXT,'
+        ' error TEXT,'
+        ' error_type TEXT,'
+        ' attempts INTEGER NOT NULL DEFAULT 0)',
+        'CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id)',
+        'CREATE TABLE IF NOT EXISTS meta ('
+        ' name TEXT PRIMARY KEY,'
+        ' value REAL)',
+        "INSERT OR IGNORE INTO meta VALUES ('held_until', NULL)",
+    )
+
+    def __init__(self, path, probe_interval=15 * 60, timeout=30,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param path: path to the database file
+        :type path: string
+        :param probe_interval: (optional) seconds to hold the queue when the
+            quota runs out and it is not known when it frees up
+        :type probe_interval: float
+        :param timeout: (optional) seconds to wait for a lock held by another
+            process
+        :type timeout: float
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        :param sleep: function used to wait
+        :type sleep: callable
+        """
+        self.path = path
+        self.probe_interval = probe_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self._database = Database(path, self.SCHEMA, timeout)
+        self._connection()  # create the database
+
+    def _connection(self):
+        """Return a connection for the current thread and process."""
+        return self._database.connection()
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def counts(self):
+        """Return number of jobs in every state.
+
+        :rtype: dictionary
+        """
+        counts = dict.fromkeys((self.PENDING, self.DONE, self.FAILED), 0)
+        counts.update(self._connection().execute(
+            'SELECT state, COUNT(*) FROM jobs GROUP BY state'))
+        return counts
+
+    @property
+    def held_until(self):
+        """Time until which the queue is held for lack of quota, or None."""
+        return self._connection().execute(
+            "SELECT value FROM meta WHERE name = 'held_until'").fetchone()[0]
+
+    def hold(self, until):
+        """Hold the queue until the given time (None releases it).
+
+        :param until: time in seconds
+        :type until: float
+        """
+        con = self._connection()
+        with transaction(con):
+            con.execute(
+                "UPDATE meta SET value = ? WHERE name = 'held_until'",
+                (until, ))
+
+    def add(self, items):
+        """Add texts to the queue, ignoring those already in it.
+
+        Texts are identified by their key, so adding the same corpus again
+        when resuming a run adds nothing.
+
+        :param items: texts, keyed by their position, or (key, text) pairs
+        :type items: iterable
+
+        :return: number of texts added
+        :rtype: int
+        """
+        con = self._connection()
+        before = con.total_changes
+        rows = []
+        for position, item in enumerate(items):
+            key, text = item if isinstance(item, tuple) else (position, item)
+            if isinstance(text, str):
+                text = text.decode('utf-8')
+            rows.append((unicode(key), text, self.PENDING))
+            if len(rows) == 1000:
+                self._insert(con, rows)
+                rows = []
+        self._insert(con, rows)
+        return con.total_changes - before
+
+    def _insert(self, con, rows):
+        with transaction(con):
+            con.executemany(
+                'INSERT OR IGNORE INTO jobs (key, text, state) '
+                'VALUES (?, ?, ?)', rows)
+
+    def _select(self, columns, states):
+        """Yield rows of jobs in the given states in order, a page at a
+        time."""
+        query = 'SELECT id, {0} FROM jobs WHERE state IN ({1}) AND id > ? ' \
+            'ORDER BY id LIMIT ?'.format(columns, ', '.join('?' * len(states)))
+        last = 0
+        while True:
+            rows = self._connection().execute(
+                query, tuple(states) + (last, self.PAGE)).fetchall()
+            for row in rows:
+                yield row
+            if len(rows) < self.PAGE:
+                return
+            last = rows[-1][0]
+
+    def results(self, states=(DONE, FAILED)):
+        """Replay stored outcomes, in the order texts were added.
+
+        :param states: (optional) states of jobs to return
+        :type states: tuple of strings
+
+        :return: generator of :data:`Job`
+        """
+        for row in self._select(
+                'key, text, state, value, error, error_type', states):
+            value = None if row[4] is None else json.loads(row[4])
+            yield Job(row[1], row[2], row[3], value, row[5], row[6])
+
+    def run(self, func, workers=8, quota=None, block=False,
+            retry_failed=False):
+        """Call func on every pending text and record the outcomes.
+
+        :param func: function called with every text, e.g.
+            SpinRewriter.unique_variation
+        :type func: callable
+        :param workers: (optional) number of texts processed at the same time
+        :type workers: int
+        :param quota: (optional) quota tracker of the Api used by func, which
+            tells when the quota frees up
+        :type quota: spinrewriter.quota.QuotaTracker
+        :param block: (optional) wait while the queue is held, instead of
+            returning
+        :type block: boolean
+        :param retry_failed: (optional) process failed texts again, too; they
+            are made pending first, so a quota hold does not skip them
+        :type retry_failed: boolean
+
+        :return: number of jobs in every state, see :meth:`counts`
+        :rtype: dictionary
+        """
+        if retry_failed:
+            con = self._connection()
+            with transaction(con):
+                con.execute('UPDATE jobs SET state = ? WHERE state = ?',
+                            (self.PENDING, self.FAILED))
+        while True:
+            until = self.held_until
+            if until is not None and until > self.clock():
+                if not block:
+                    break
+                self.sleep(until - self.clock())
+            self.hold(None)
+            if not self._run(func, workers, quota):
+                break
+        return self.counts()
+
+    def _run(self, func, workers, quota):
+        """Process pending jobs until they are all done or the quota runs
+        out. Return whether the quota ran out."""
+        ids = {}
+        held = threading.Event()
+
+        def texts():
+            for index, (id, text) in enumerate(
+                    self._select('text', (self.PENDING, ))):
+                if held.is_set():
+                    return
+                ids[index] = id
+                yield text
+
+        con = self._connection()
+        for result in batch.imap(func, texts(), workers):
+            id = ids.pop(result.index)
+            if isinstance(result.error, ex.QuotaLimitError):
+                held.set()  # stop feeding, the text stays pending
+                continue
+            with transaction(con):
+                if result.error is None:
+                    con.execute(
+                        'UPDATE jobs SET state = ?, value = ?, error = NULL, '
+                        'error_type = NULL, attempts = attempts + 1 '
+                        'WHERE id = ?',
+                        (self.DONE, json.dumps(result.value), id))
+                else:
+                    error = getattr(result.error, 'api_error_msg', None) or \
+                        unicode(result.error)
+                    con.execute(
+                        'UPDATE jobs SET state = ?, error = ?, '
+                        'error_type = ?, attempts = attempts + 1 '
+                        'WHERE id = ?',
+                        (self.FAILED, error, type(result.error).__name__, id))
+        if held.is_set():
+            until = quota.next_free if quota is not None else None
+            self.hold(until or self.clock() + self.probe_interval)
+        return held.is_set()
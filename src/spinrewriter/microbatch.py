@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""Grouping of short texts into one ``text_with_spintax`` request.
+
+Short texts (titles, meta descriptions) submitted at about the same time
+are joined with numbered sentinels into a single request, which costs one
+quota unit and one slot of the frequency limit instead of one per text::
+
+    batcher = MicroBatcher(api, window=0.05)
+    # from many threads
+    spun = batcher.text_with_spintax(title)
+
+The sentinels are passed to the API as protected terms. If any of them comes
+back changed, or a part between them is not valid spintax, the texts are
+sent one by one instead. If the request fails, every text of the batch gets
+its error.
+"""
+
+from spinrewriter import chunking
+from spinrewriter import spintax
+
+import re
+import sys
+import threading
+
+
+SENTINEL = u'SPNRWRTR{0}SEP'
+"""delimiter between texts, formatted with its position"""
+
+_SENTINELS = re.compile(r'\s*SPNRWRTR(\d+)SEP\s*', re.UNICODE)
+
+
+class _Batch(object):
+    """Texts collected to be sent together and their outcomes."""
+
+    def __init__(self):
+        self.texts = []
+        self.words = 0
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+
+    def fits(self, words, max_words, max_texts):
+        # every text but the first adds a sentinel word
+        return len(self.texts) < max_texts and \
+            self.words + len(self.texts) + words <= max_words
+
+
+class MicroBatcher(object):
+    """Collect short texts for up to ``window`` seconds and send them to
+    ``text_with_spintax`` together.
+
+    The first caller of a batch waits for the window to pass (or the batch
+    to fill up) and sends the request; the others wait for it and get the
+    spintax of their own text, or the exception the request raised.
+    """
+
+    def __init__(self, api, window=0.05, max_words=None, max_texts=100,
+                 protected_terms=None, confidence_level=u'medium',
+                 nested_spintax=False, spintax_format=u'{|}'):
+        """
+        :param api: Api used to send requests
+        :type api: spinrewriter.Api
+        :param window: (optional) seconds to wait for more texts
+        :type window: float
+        :param max_words: (optional) maximum number of words in a request,
+            defaults to Api.MAX_WORDS
+        :type max_words: int
+        :param max_texts: (optional) maximum number of texts in a request
+        :type max_texts: int
+
+        Other parameters are those of
+        :meth:`spinrewriter.Api.text_with_spintax`, used for all texts.
+        """
+        self.api = api
+        self.window = window
+        self.max_words = max_words or api.MAX_WORDS
+        self.max_texts = max_texts
+        self.protected_terms = list(protected_terms or [])
+        self.confidence_level = confidence_level
+        self.nested_spintax = nested_spintax
+        self.spintax_format = spintax_format
+        self.batches = 0
+        """number of requests sent for more than one text"""
+        self.fallbacks = 0
+        """number of batches whose texts had to be sent one by one"""
+        self._open = None
+        self._lock = threading.Lock()
+
+    def text_with_spintax(self, text):
+        """Return text with spintax, sending it together with other texts
+        submitted within the window.
+
+        :param text: original text
+        :type text: string
+
+        :return: text with spintax in the batcher's format
+        :rtype: unicode
+        """
+        words = chunking.count_words(text)
+        if not self.api.MIN_WORDS <= words < self.max_words:
+            # sent alone, so that errors are those of the text itself
+            return self._spin(text)
+
+        with self._lock:
+            batch = self._open
+            if batch is not None and \
+                    not batch.fits(words, self.max_words, self.max_texts):
+                batch.full.set()
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.texts)
+            batch.texts.append(text)
+            batch.words += words
+            if not batch.fits(1, self.max_words, self.max_texts):
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            try:
+                batch.results = self._run(batch.texts)
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+        value, exc_info = batch.results[index]
+        if exc_info is not None:
+            raise exc_info[0], exc_info[1], exc_info[2]
+        return value
+
+    def _spin(self, text, protected_terms=()):
+        response = self.api.text_with_spintax(
+            text, self.protected_terms + list(protected_terms),
+            self.confidence_level, self.nested_spintax, self.spintax_format)
+        return response[self.api.RESP_P_NAMES.response]
+
+    def _run(self, texts):
+        """Return a (value, exc_info) pair for every text."""
+        if len(texts) > 1:
+            self.batches += 1
+            try:
+                parts = self._batched(texts)
+            except Exception:
+                return [(None, sys.exc_info())] * len(texts)
+            if parts is not None:
+                return [(_rewrap(text, part), None)
+                        for text, part in zip(texts, parts)]
+            self.fallbacks += 1
+        results = []
+        for text in texts:
+            try:
+                results.append((self._spin(text), None))
+            except Exception:
+                results.append((None, sys.exc_info()))
+        return results
+
+    def _batched(self, texts):
+        """Send texts in one request and return the spintax of every text,
+        or None if the response cannot be split back reliably.
+
+        Errors of the request are raised.
+        """
+        sentinels = [SENTINEL.format(i) for i in range(len(texts) - 1)]
+        joined = [texts[0].strip()]
+        for sentinel, text in zip(sentinels, texts[1:]):
+            joined.extend((u'\n\n', sentinel, u'\n\n', text.strip()))
+        response = self._spin(u''.join(joined), sentinels)
+        pieces = _SENTINELS.split(response.strip())
+        parts = pieces[::2]
+        if pieces[1::2] != [str(i) for i in range(len(sentinels))]:
+            return None
+        for part in parts:
+            try:
+                spintax.parse(part, self.spintax_format)
+            except spintax.SpintaxError:
+                return None
+        return parts
+
+
+def _rewrap(text, part):
+    """Give part the leading and trailing whitespace of text."""
+    start = len(text) - len(text.lstrip())
+    return text[:start] + part + text[len(text.rstrip()):]
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Stream a corpus of texts through the API, JSON lines in, JSON lines out.
+
+Input records are read lazily, a bounded number of them is processed at the
+same time and every result is written as soon as it is available, so memory
+use does not depend on the size of the corpus. With ``--dedup``, results of
+a bounded number of recent distinct texts are kept as well, see
+:func:`spinrewriter.batch.imap_unique`::
+
+    $ spinrewriter --email foo@bar.com --api-key KEY articles.jsonl \\
+        -o spun.jsonl
+
+Every input line is a JSON object with the text in its ``text`` field (or a
+plain JSON string). Every output line is the input object with the result
+added under ``spun``, or the error message and exception name under
+``error`` and ``error_type``.
+"""
+
+from spinrewriter import Api
+from spinrewriter import batch
+from spinrewriter import SpinRewriter
+
+import argparse
+import json
+import mmap
+import os
+import sys
+
+
+def _lines(source):
+    """Yield lines of a path ('-' for stdin), file object or iterable."""
+    if source == '-':
+        source = sys.stdin
+    if not isinstance(source, basestring):
+        for line in source:
+            yield line
+        return
+    with open(source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for line in iter(data.readline, ''):
+                yield line
+        finally:
+            data.close()
+
+
+def read(source, field='text'):
+    """Yield records of a JSON lines corpus.
+
+    Large files are memory-mapped rather than read into memory. Blank lines
+    are skipped.
+
+    :param source: path of the corpus, '-' for stdin, a file object, or an
+        iterable of JSON lines (byte or unicode strings) and records; texts
+        are passed as records, since strings are parsed as JSON
+    :type source: string, file or iterable
+    :param field: name of the field holding the text
+    :type field: string
+
+    :raises ValueError: when a line is not a JSON object or string
+    :return: generator of records (dictionaries)
+    """
+    for line in _lines(source):
+        if isinstance(line, basestring):
+            if not line.strip():
+                continue
+            line = json.loads(line)
+            if isinstance(line, basestring):
+                line = {field: line}
+        if not isinstance(line, dict):
+            raise ValueError(
+                'Not a JSON object or string: {0!r}'.format(line))
+        yield line
+
+
+def process(records, func, out, field='text', result_field='spun',
+            workers=8, ordered=True, dedup=False, stats=None):
+    """Call func on the text of every record and write results to out.
+
+    :param records: records with a text in ``field``
+    :type records: iterable of dictionaries
+    :param func: function called with every text, e.g.
+        SpinRewriter.unique_variation
+    :type func: callable
+    :param out: file results are written to, one JSON object per line
+    :type out: file
+    :param field: name of the field holding the text
+    :type field: string
+    :param result_field: name of the field the result is written to
+    :type result_field: string
+    :param workers: number of texts processed at the same time
+    :type workers: int
+    :param ordered: write results in input order, or as they complete
+    :type ordered: boolean
+    :param dedup: process every distinct text only once, as long as its
+        result is kept, see :func:`spinrewriter.batch.imap_unique`
+    :type dedup: boolean
+    :param stats: counters updated when deduplicating
+    :type stats: spinrewriter.batch.DedupStats
+
+    :return: number of records processed and of records that failed
+    :rtype: 2-tuple of ints
+    """
+    pending = {}  # records read, but not written yet
+
+    def texts():
+        for index, record in enumerate(records):
+            pending[index] = record
+            yield record.get(field, u'')
+
+    if dedup:
+        results = batch.imap_unique(func, texts(), workers, ordered, stats)
+    else:
+        results = batch.imap(func, texts(), workers, ordered)
+    done = failed = 0
+    for result in results:
+        record = dict(pending.pop(result.index))
+        if result.error is None:
+            record[result_field] = result.value
+        else:
+            failed += 1
+            record['error'] = (getattr(result.error, 'api_error_msg', None) or
+                               unicode(result.error))
+            record['error_type'] = type(result.error).__name__
+        out.write(json.dumps(record))
+        out.write('\n')
+        out.flush()
+        done += 1
+    return done, failed
+
+
+def main(argv=None, out=None):
+    """Console entry point, run ``spinrewriter --help`` for usage.
+
+    Results are written to ``out`` when given, which is left open.
+
+    :return: exit status, 1 if any text failed
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog='spinrewriter',
+        description='Spin every text of a JSON lines corpus.')
+    parser.add_argument(
+        'input', nargs='?', default='-',
+        help='JSON lines file, - for stdin (default)')
+    parser.add_argument(
+        '-o', '--output', default='-',
+        help='file results are written to, - for stdout (default)')
+    parser.add_argument(
+        '--email', default=os.environ.get('SPINREWRITER_EMAIL'),
+        help='email address of the account (or $SPINREWRITER_EMAIL)')
+    parser.add_argument(
+        '--api-key', default=os.environ.get('SPINREWRITER_API_KEY'),
+        help='API key of the account (or $SPINREWRITER_API_KEY)')
+    parser.add_argument(
+        '--action', default=Api.ACTION.unique_variation,
+        choices=[Api.ACTION.unique_variation, Api.ACTION.text_with_spintax])
+    parser.add_argument(
+        '--confidence-level', default=Api.CONFIDENCE_LVL.medium,
+        choices=list(Api.CONFIDENCE_LVL))
+    parser.add_argument('--field', default='text',
+                        help='field holding the text (default: text)')
+    parser.add_argument('--result-field', default='spun',
+                        help='field the result is written to (default: spun)')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='texts processed at the same time (default: 8)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='write results as they complete')
+    parser.add_argument('--dedup', action='store_true',
+                        help='process repeated texts only once, among the '
+                        'last 10000 distinct texts')
+    args = parser.parse_args(argv)
+    if not args.email or not args.api_key:
+        parser.error('--email and --api-key are required')
+
+    rewriter = SpinRewriter(args.email, args.api_key)
+    method = getattr(rewriter, args.action)
+
+    def func(text):
+        return method(text, confidence_level=args.confidence_level)
+
+    stats = batch.DedupStats()
+    opened = out is None and args.output != '-'
+    if opened:
+        out = open(args.output, 'w')
+    elif out is None:
+        out = sys.stdout
+    try:
+        done, failed = process(
+            read(args.input, args.field), func, out, args.field,
+            args.result_field, args.workers, not args.unordered, args.dedup,
+            stats)
+    finally:
+        if opened:
+            out.close()
+    summary = '{0} texts processed, {1} failed'.format(done, failed)
+    if args.dedup:
+        summary += ', {0} calls saved'.format(stats.saved)
+    sys.stderr.write(summary + '\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Persistent HTTP/1.1 keep-alive connections to the Spin Rewriter API."""
+
+from spinrewriter.transport import Transport
+
+import httplib
+import Queue
+import select
+import socket
+import threading
+import time
+import urlparse
+
+
+class ConnectionPool(Transport):
+    """A thread-safe pool of keep-alive connections to a single URL.
+
+    Connections are created lazily, handed out to one thread at a time and
+    put back into the pool once the response has been read, so subsequent
+    requests skip the TCP handshake and the DNS lookup.
+
+    A connection that was idle for longer than ``max_idle`` seconds or whose
+    socket was closed by the server in the meantime is considered stale and
+    is replaced with a fresh one before it is used.
+    """
+
+    SEND_ERRORS = (
+        httplib.CannotSendRequest,
+        socket.error,
+    )
+    """errors sending a request over a reused connection that indicate the
+    server dropped it (socket timeouts excepted)"""
+
+    NO_STATUS_LINES = (
+        repr(''),
+        'No status line received - the server has closed the connection',
+    )
+    """BadStatusLine lines of responses closed before any byte was sent"""
+
+    HEADERS = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Connection': 'keep-alive',
+    }
+    """headers sent along with every request"""
+
+    def __init__(self, url, maxsize=10, timeout=None, max_idle=30):
+        """
+        :param url: URL that all requests will be sent to
+        :type url: string
+        :param maxsize: maximum number of idle connections kept open
+        :type maxsize: int
+        :param timeout: (optional) socket timeout in seconds, defaults to
+            :func:`socket.getdefaulttimeout`
+        :type timeout: float
+        :param max_idle: seconds after which an idle connection is discarded
+        :type max_idle: float
+        """
+        parsed = urlparse.urlsplit(url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.path = parsed.path or '/'
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = Queue.LifoQueue(maxsize)
+        self._lock = threading.Lock()
+        self.created = 0
+        """number of connections opened during the pool's lifetime"""
+
+    def _new_connection(self):
+        """Open a new connection to the configured host."""
+        if self.scheme == 'https':
+            cls = httplib.HTTPSConnection
+        else:
+            cls = httplib.HTTPConnection
+        with self._lock:
+            self.created += 1
+        timeout = self.timeout
+        if timeout is None:
+            timeout = socket._GLOBAL_DEFAULT_TIMEOUT
+        return cls(self.host, self.port, timeout=timeout)
+
+    def _is_stale(self, con, last_used):
+        """Check whether an idle connection can no longer be used.
+
+        A healthy idle keep-alive socket has nothing to read; if it is
+        readable, the server has either closed it or sent garbage.
+        """
+        if time.time() - last_used > self.max_idle:
+            return True
+        if con.sock is None:
+            return False  # not connected yet, httplib will connect
+        try:
+            readable, _, _ = select.select([con.sock], [], [], 0)
+        except (select.error, socket.error, ValueError):
+            return True
+        return bool(readable)
+
+    def _get(self):
+        """Take a usable connection out of the pool or make a new one.
+
+        :return: connection and whether it has been used before
+        :rtype: tuple
+        """
+        while True:
+            try:
+                con, last_used = self._idle.get_nowait()
+            except Queue.Empty:
+                return self._new_connection(), False
+            if self._is_stale(con, last_used):
+                con.close()
+                continue
+            return con, True
+
+    def _put(self, con):
+        """Return a connection to the pool, closing it if the pool is full."""
+        try:
+            self._idle.put_nowait((con, time.time()))
+        except Queue.Full:
+            con.close()
+
+    def _request(self, con, body, reused):
+        """Send the request over given connection and read the response.
+
+        :return: response and its body, or None if the connection was reused
+            and turned out to be dead before the server got the request
+        """
+        try:
+            con.request('POST', self.path, body, self.HEADERS)
+        except socket.timeout:
+            raise
+        except self.SEND_ERRORS:
+            if reused:
+                return None
+            raise
+        try:
+            response = con.getresponse()
+        except httplib.BadStatusLine as error:
+            if reused and error.line in self.NO_STATUS_LINES:
+                return None
+            raise
+        return response, response.read()
+
+    def post(self, body):
+        """POST url-encoded body to the pool's URL and return response body.
+
+        If a reused connection turns out to be dead, the request is repeated
+        once on a fresh connection. Only failures that prove the server never
+        processed the request are repeated: errors while sending it and
+        connections closed without a response. Timeouts are never repeated,
+        as the server may still be processing the request.
+
+        :param body: url-encoded request parameters
+        :type body: string
+
+        :return: raw response body
+        :rtype: string
+        """
+        con, reused = self._get()
+        try:
+            result = self._request(con, body, reused)
+            if result is None:
+                con.close()
+                con = self._new_connection()
+                result = self._request(con, body, False)
+        except Exception:
+            con.close()
+            raise
+        response, data = result
+
+        if response.will_close:
+            con.close()
+        else:
+            self._put(con)
+        return data
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                con, _ = self._idle.get_nowait()
+            except Queue.Empty:
+                return
+            con.close()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Client-side model of the API's daily request quota."""
+
+from collections import deque
+from contextlib import contextmanager
+from spinrewriter import exceptions as ex
+
+import threading
+import time
+
+
+class QuotaTracker(object):
+    """Keep track of the remaining API quota from the responses themselves.
+
+    Every response carries ``api_requests_made`` and
+    ``api_requests_available``, so after the first request the tracker knows
+    how many requests are left in the rolling 24-hour window. Requests made
+    since then are remembered, so slots are given back as they fall out of
+    the window. When the budget is used up, the next request either fails
+    immediately with :class:`spinrewriter.exceptions.QuotaLimitError` or
+    waits until a slot frees up, without contacting the API.
+    """
+
+    WINDOW = 24 * 60 * 60
+    """length of the quota window in seconds"""
+
+    EXHAUSTED = u'API quota exhausted, no requests left in the 24-hour window.'
+    """message of errors raised locally when the quota is used up"""
+
+    def __init__(self, block=False, probe_interval=15 * 60,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param block: (optional) wait for the quota to free up instead of
+            raising QuotaLimitError
+        :type block: boolean
+        :param probe_interval: (optional) when blocking and it is not known
+            when the next slot frees up, let one request through to the API
+            after this many seconds
+        :type probe_interval: float
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        :param sleep: function used to wait
+        :type sleep: callable
+        """
+        self.block = block
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.made = None
+        """requests made in the last 24 hours, None until first response"""
+        self.available = None
+        """requests still available, None until first response"""
+        self.in_flight = 0
+        """requests sent, but not answered yet"""
+        self.requests = deque()
+        """timestamps of requests counted against the quota"""
+        self._probe_at = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _state(self):
+        """Hold exclusive access to the tracker's state."""
+        with self._lock:
+            yield
+
+    @property
+    def remaining(self):
+        """Requests that can still be sent, None if not known yet."""
+        with self._state():
+            self._expire(self.clock())
+            if self.available is None:
+                return None
+            return max(self.available - self.in_flight, 0)
+
+    @property
+    def next_free(self):
+        """Time when the oldest remembered request falls out of the window,
+        None if no requests are remembered."""
+        with self._state():
+            self._expire(self.clock())
+            if not self.requests:
+                return None
+            return self.requests[0] + self.WINDOW
+
+    def _expire(self, now):
+        """Give back slots of requests that fell out of the window."""
+        while self.requests and self.requests[0] <= now - self.WINDOW:
+            self.requests.popleft()
+            if self.available is not None:
+                self.available += 1
+                self.made -= 1
+
+    def acquire(self):
+        """Reserve quota for a request about to be sent.
+
+        :raises spinrewriter.exceptions.QuotaLimitError: when the quota is
+            used up and the tracker is not blocking
+        """
+        while True:
+            with self._state():
+                now = self.clock()
+                self._expire(now)
+                if self.available is None or self.available > self.in_flight:
+                    self.in_flight += 1
+                    return
+                if not self.block:
+                    raise ex.QuotaLimitError(self.EXHAUSTED)
+                if self.requests:
+                    delay = self.requests[0] + self.WINDOW - now
+                elif self._probe_at is None:
+                    self._probe_at = now + self.probe_interval
+                    delay = self.probe_interval
+                elif now >= self._probe_at:
+                    # let this request find out, the others wait for it
+                    self._probe_at = None
+                    self.in_flight += 1
+                    return
+                else:
+                    delay = self._probe_at - now
+            self.sleep(delay)
+
+    def release(self):
+        """Give back the reservation made by :meth:`acquire`."""
+        with self._state():
+            self.in_flight -= 1
+
+    def reset(self):
+        """Forget the remaining quota, so that the next request finds out."""
+        with self._state():
+            self.available = None
+            self.made = None
+
+    def update(self, response, counted=True):
+        """Update the model from an API response.
+
+        :param response: API's response (already JSON-decoded)
+        :type response: dictionary
+        :param counted: whether the request counts against the quota
+        :type counted: boolean
+        """
+        with self._state():
+            if 'api_requests_available' in response:
+                self._probe_at = None
+                self.available = response['api_requests_available']
+                self.made = response['api_requests_made']
+                if counted and response.get('status') == 'OK':
+                    self.requests.append(self.clock())
+            elif ex.classify(response.get('response', '')).name == 'quota':
+                self.available = 0
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Client-side pacing of submissions of new text to the API."""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from spinrewriter import exceptions as ex
+
+import hashlib
+import threading
+import time
+
+
+def text_key(text):
+    """Return a short digest identifying the text."""
+    if isinstance(text, unicode):
+        text = text.encode('utf-8')
+    return hashlib.sha1(text).digest()
+
+
+class RateScheduler(object):
+    """Space out submissions of new text to match the API's limit.
+
+    The API accepts entirely new text only once every N seconds. The
+    scheduler learns N from the first :class:`UsageFrequencyError` message
+    (or takes it as ``interval``), hands out submission slots N seconds
+    apart and transparently retries requests that were rejected anyway.
+    Texts the API has already analyzed are not new, so they are sent right
+    away.
+    """
+
+    def __init__(self, interval=None, max_retries=10, known_texts=10000,
+                 clock=time.time, sleep=time.sleep):
+        """
+        :param interval: (optional) seconds between submissions of new text,
+            learned from the API if not given
+        :type interval: float
+        :param max_retries: (optional) how many times a request rejected
+            for being too frequent is repeated before the error is returned
+        :type max_retries: int
+        :param known_texts: (optional) number of already analyzed texts
+            remembered, so that they are not delayed
+        :type known_texts: int
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        :param sleep: function used to wait
+        :type sleep: callable
+        """
+        self.interval = interval
+        self.max_retries = max_retries
+        self.known_texts = known_texts
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0.0
+        """earliest time the next new text can be submitted"""
+        self._known = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _state(self):
+        """Hold exclusive access to the scheduler's state."""
+        with self._lock:
+            yield
+
+    def _reserve(self, now):
+        """Reserve the next free slot and return its time."""
+        slot = max(now, self.next_slot)
+        if self.interval:
+            self.next_slot = slot + self.interval
+        return slot
+
+    def _penalize(self, now, seconds):
+        """Learn the interval and push back the next free slot."""
+        self.interval = seconds
+        self.next_slot = max(self.next_slot, now + seconds)
+
+    def delay(self):
+        """Return seconds until the next new text can be submitted."""
+        with self._state():
+            return max(self.next_slot - self.clock(), 0)
+
+    def wait(self, text):
+        """Wait until the text can be submitted.
+
+        :param text: text about to be submitted
+        :type text: string
+        """
+        key = text_key(text)
+        with self._lock:
+            if key in self._known:
+                return
+        with self._state():
+            now = self.clock()
+            slot = self._reserve(now)
+        if slot > now:
+            self.sleep(slot - now)
+
+    def update(self, text, response):
+        """Learn from the API's response to a submitted text.
+
+        :param text: submitted text
+        :type text: string
+        :param response: API's response (already JSON-decoded)
+        :type response: dictionary
+
+        :return: whether the request was rejected as too frequent and
+            should be sent again
+        :rtype: boolean
+        """
+        if response.get('status') == 'OK':
+            with self._lock:
+                key = text_key(text)
+                self._known.pop(key, None)
+                self._known[key] = True
+                while len(self._known) > self.known_texts:
+                    self._known.popitem(last=False)
+            return False
+        seconds = ex.classify(response.get('response', '')).seconds
+        if seconds is None:
+            return False
+        with self._state():
+            self._penalize(self.clock(), seconds)
+        return True
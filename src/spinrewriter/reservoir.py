@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Buffers of pre-generated variations for latency-sensitive callers.
+
+>>> rewriter = SpinRewriter(email_address, api_key)
+>>> reservoir = Reservoir(rewriter.unique_variation, size=20)
+>>> reservoir.fill(text)  # start generating variations in the background
+>>> reservoir.get(text, default=text)  # never waits for the API
+
+Variations come from any function of a text: the API through
+:meth:`spinrewriter.SpinRewriter.unique_variation`, or a local template
+through :meth:`spinrewriter.templates.TemplateStore.unique_variation`.
+Refills run in a fixed number of background threads, so an Api with a
+:class:`spinrewriter.quota.QuotaTracker` and a
+:class:`spinrewriter.rate.RateScheduler` paces them within the API's limits.
+"""
+
+from collections import deque
+from collections import OrderedDict
+from spinrewriter import exceptions as ex
+
+import Queue
+import threading
+import time
+
+
+_STOP = object()
+
+
+class Reservoir(object):
+    """Keep a buffer of variations of every text and refill it in the
+    background.
+
+    :meth:`get` takes a variation from the buffer in constant time and
+    schedules a refill once the buffer runs low; it never calls the API.
+    Buffers of up to ``maxtexts`` texts are kept; those of the least
+    recently used texts are dropped.
+    """
+
+    def __init__(self, func, size=10, low_water=None, workers=2, pause=60,
+                 quota=None, maxtexts=1024, clock=time.time, sleep=None):
+        """
+        :param func: function returning a variation of a text
+        :type func: callable
+        :param size: (optional) number of variations buffered per text
+        :type size: int
+        :param low_water: (optional) refill a buffer once it holds this many
+            variations or fewer, defaults to half the size
+        :type low_water: int
+        :param workers: (optional) number of background threads refilling
+        :type workers: int
+        :param pause: (optional) seconds a thread waits after a failed refill
+        :type pause: float
+        :param quota: (optional) quota tracker of the Api used by func; when
+            the quota runs out, refills wait until it frees up
+        :type quota: spinrewriter.quota.QuotaTracker
+        :param maxtexts: (optional) number of texts whose variations are
+            buffered
+        :type maxtexts: int
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        :param sleep: (optional) function used to pause, defaults to waiting
+            until the pause ends or the reservoir is closed
+        :type sleep: callable
+        """
+        self.func = func
+        self.size = size
+        self.low_water = size // 2 if low_water is None else low_water
+        self.pause = pause
+        self.quota = quota
+        self.maxtexts = maxtexts
+        self.clock = clock
+        self._stopped = threading.Event()
+        self.sleep = self._stopped.wait if sleep is None else sleep
+        self.hits = 0
+        """number of variations served from a buffer"""
+        self.misses = 0
+        """number of calls that found the buffer empty"""
+        self.errors = 0
+        """number of failed refills"""
+        self.last_error = None
+        """exception of the last failed refill"""
+        self._buffers = OrderedDict()
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._queue = Queue.Queue()
+        self._threads = [threading.Thread(target=self._work)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def __len__(self):
+        """Number of buffered variations of all texts."""
+        with self._lock:
+            buffers = self._buffers.values()
+        return sum(len(buffer) for buffer in buffers)
+
+    def get(self, text, default=None):
+        """Return a buffered variation of text.
+
+        :param text: original text
+        :type text: string
+        :param default: (optional) returned when no variation is buffered
+        :type default: any
+
+        :return: a variation not returned by the reservoir before (but only
+            as unique as the variations func returns), or default
+        """
+        with self._lock:
+            buffer = self._buffers.pop(text, None)
+            if buffer is not None:
+                self._buffers[text] = buffer  # mark as most recently used
+        try:
+            variation = buffer.popleft()
+        except (AttributeError, IndexError):
+            variation = default
+            self.misses += 1
+        else:
+            self.hits += 1
+        if buffer is None or len(buffer) <= self.low_water:
+            self.fill(text)
+        return variation
+
+    def fill(self, text):
+        """Schedule filling the buffer of text in the background, unless a
+        refill is already scheduled.
+
+        :param text: original text
+        :type text: string
+        """
+        with self._lock:
+            if text in self._scheduled:
+                return
+            self._scheduled.add(text)
+            if text not in self._buffers:
+                self._buffers[text] = deque()
+                while len(self._buffers) > self.maxtexts:
+                    self._buffers.popitem(last=False)
+        self._queue.put(text)
+
+    def discard(self, text):
+        """Drop the buffered variations of text.
+
+        :param text: original text
+        :type text: string
+        """
+        with self._lock:
+            self._buffers.pop(text, None)
+
+    def wait(self):
+        """Wait until all scheduled refills are done, but not for pauses
+        after failed ones."""
+        self._queue.join()
+
+    def close(self):
+        """Stop the background threads, interrupting refills and pauses."""
+        self._stopped.set()
+        for thread in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _work(self):
+        while True:
+            text = self._queue.get()
+            delay = None
+            try:
+                if text is _STOP:
+                    return
+                delay = self._refill(text)
+            finally:
+                self._queue.task_done()
+            if delay is not None:
+                self.sleep(delay)
+
+    def _refill(self, text):
+        """Top up the buffer of text until it is full, dropped or the
+        reservoir is closed. Return seconds to pause after a failure."""
+        try:
+            while not self._stopped.is_set():
+                buffer = self._buffers.get(text)
+                if buffer is None or len(buffer) >= self.size:
+                    return None
+                buffer.append(self.func(text))
+        except Exception as error:
+            with self._lock:
+                self.errors += 1
+                self.last_error = error
+            delay = self.pause
+            if isinstance(error, ex.QuotaLimitError) and \
+                    self.quota is not None and \
+                    self.quota.next_free is not None:
+                delay = self.quota.next_free - self.clock()
+            return max(delay, 0)
+        finally:
+            with self._lock:
+                self._scheduled.discard(text)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Retrying of failed requests and suspending of requests to a failing API.
+
+Pass a :class:`RetryPolicy` and/or a :class:`CircuitBreaker` to
+:class:`spinrewriter.Api`. Transient failures, i.e. internal errors of the
+API, unrecognized error messages and network errors, are retried with
+exponential backoff. When they keep occurring, the circuit breaker fails
+requests locally for a while instead of sending them.
+"""
+
+from spinrewriter import exceptions as ex
+
+import httplib
+import random
+import threading
+import time
+
+
+TRANSIENT_ERRORS = (
+    ex.InternalApiError,
+    ex.UnknownApiError,
+    httplib.HTTPException,
+    IOError,  # socket errors and timeouts, urllib2.URLError
+    ValueError,  # malformed response
+)
+"""errors that may go away when the request is repeated"""
+
+
+class RetryPolicy(object):
+    """Repeat requests failing with transient errors, waiting exponentially
+    longer (with random jitter) between attempts."""
+
+    def __init__(self, attempts=3, backoff=1.0, max_backoff=30.0,
+                 errors=TRANSIENT_ERRORS, rng=random, sleep=time.sleep):
+        """
+        :param attempts: (optional) maximum number of attempts per request
+        :type attempts: int
+        :param backoff: (optional) upper bound of the first delay in seconds,
+            doubled after every attempt
+        :type backoff: float
+        :param max_backoff: (optional) upper bound of any delay in seconds
+        :type max_backoff: float
+        :param errors: (optional) exception classes that are retried
+        :type errors: tuple
+        :param rng: random number generator used for jitter
+        :type rng: random.Random
+        :param sleep: function used to wait
+        :type sleep: callable
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.errors = errors
+        self.rng = rng
+        self.sleep = sleep
+
+    def delay(self, attempt):
+        """Return seconds to wait after the given (0-based) failed attempt.
+
+        The delay is drawn uniformly up to the exponential bound ("full
+        jitter"), so that clients failing together do not retry together.
+        """
+        return self.rng.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def call(self, func, *args, **kwargs):
+        """Call func, repeating it while it raises retried errors.
+
+        :return: func's return value
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except self.errors:
+                attempt += 1
+                if attempt >= self.attempts:
+                    raise
+            self.sleep(self.delay(attempt - 1))
+
+
+class CircuitBreaker(object):
+    """Fail requests locally while the API keeps failing.
+
+    After ``threshold`` consecutive failures the circuit opens and requests
+    raise :class:`spinrewriter.exceptions.CircuitOpenError` without being
+    sent. After ``reset_timeout`` seconds a single trial request is let
+    through: if it succeeds the circuit closes, otherwise it opens again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0,
+                 errors=TRANSIENT_ERRORS, clock=time.time):
+        """
+        :param threshold: (optional) consecutive failures that open the
+            circuit
+        :type threshold: int
+        :param reset_timeout: (optional) seconds the circuit stays open
+        :type reset_timeout: float
+        :param errors: (optional) exception classes counted as failures
+        :type errors: tuple
+        :param clock: function returning current time in seconds
+        :type clock: callable
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.errors = errors
+        self.clock = clock
+        self.failures = 0
+        """consecutive failures"""
+        self.opened = None
+        """time the circuit opened, None while closed"""
+        self.trial = False
+        """whether the trial request of a half-open circuit is in flight"""
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """One of 'closed', 'open' and 'half-open'."""
+        with self._lock:
+            if self.opened is None:
+                return 'closed'
+            if self.clock() - self.opened < self.reset_timeout:
+                return 'open'
+            return 'half-open'
+
+    def before(self):
+        """Check that a request may be sent.
+
+        :raises spinrewriter.exceptions.CircuitOpenError: when the circuit
+            is open
+        """
+        with self._lock:
+            if self.opened is None:
+                return
+            if not self.trial and \
+                    self.clock() - self.opened >= self.reset_timeout:
+                self.trial = True
+                return
+        raise ex.CircuitOpenError(
+            u'Circuit open after {0} consecutive failures.'.format(
+                self.failures))
+
+    def success(self):
+        """Record a request that got a (non-failing) response."""
+        with self._lock:
+            self.failures = 0
+            self.opened = None
+            self.trial = False
+
+    def cancel(self):
+        """Record a request that ended without telling whether the API is
+        healthy, so that the next request can be the trial instead."""
+        with self._lock:
+            self.trial = False
+
+    def failure(self):
+        """Record a failed request."""
+        with self._lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened = self.clock()
+                self.trial = False
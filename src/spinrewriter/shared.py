@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Quota and rate limits shared by all processes on a host.
+
+>>> limits = SharedLimits('/var/tmp/spinrewriter', email, api_key)
+>>> api = Api(email, api_key,
+...           quota=limits.quota_tracker(block=True),
+...           scheduler=limits.rate_scheduler())
+
+Every :class:`spinrewriter.Api` created like this, in any process, draws
+from the same quota budget and the same submission slots for new text.
+The state lives in a small memory-mapped file per account, guarded by
+an exclusive file lock, so sharing it costs a lock and a few bytes of
+copying per request.
+"""
+
+from contextlib import contextmanager
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.rate import RateScheduler
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+
+HEADER = struct.Struct('<qddqqqq')
+"""magic, next_slot, interval, available, made, ring head, ring length"""
+
+TIMESTAMP = struct.Struct('<d')
+
+MAGIC = 0x5350494e52570001
+
+
+class SharedLimits(object):
+    """Memory-mapped state of one account's limits."""
+
+    CAPACITY = 10000
+    """number of request timestamps remembered for the rolling window"""
+
+    def __init__(self, directory, email_address, api_key):
+        """
+        :param directory: directory holding the state files
+        :type directory: string
+        :param email_address: email address of the Spin Rewriter account
+        :type email_address: string
+        :param api_key: unique API key of the Spin Rewriter account
+        :type api_key: string
+        """
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:  # created by another process in the meantime
+                pass
+        name = hashlib.sha1(
+            u'{0}\0{1}'.format(email_address, api_key).encode('utf-8'))
+        self.path = os.path.join(
+            directory, '{0}.limits'.format(name.hexdigest()))
+        self._lock = threading.Lock()
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = HEADER.size + TIMESTAMP.size * self.CAPACITY
+        with self.locked():
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+            self.map = mmap.mmap(self.fd, size)
+            if self.read()[0] != MAGIC:
+                self.write([MAGIC, 0.0, 0.0, -1, -1, 0, 0])
+
+    @contextmanager
+    def locked(self):
+        """Hold exclusive access to the state, across threads and
+        processes."""
+        with self._lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def read(self):
+        """Return header fields; call only while holding the lock."""
+        return list(HEADER.unpack_from(self.map, 0))
+
+    def write(self, fields):
+        """Store header fields; call only while holding the lock."""
+        HEADER.pack_into(self.map, 0, *fields)
+
+    def quota_tracker(self, **kwargs):
+        """Return a :class:`SharedQuotaTracker` for this account.
+
+        Keyword arguments are passed to
+        :class:`spinrewriter.quota.QuotaTracker`.
+        """
+        return SharedQuotaTracker(self, **kwargs)
+
+    def rate_scheduler(self, **kwargs):
+        """Return a :class:`SharedRateScheduler` for this account.
+
+        Keyword arguments are passed to
+        :class:`spinrewriter.rate.RateScheduler`.
+        """
+        return SharedRateScheduler(self, **kwargs)
+
+    def close(self):
+        """Release the memory map and the file."""
+        self.map.close()
+        os.close(self.fd)
+
+
+class _Ring(object):
+    """Deque-like view of request timestamps stored in the shared file."""
+
+    def __init__(self, limits, head, length):
+        self.map = limits.map
+        self.capacity = limits.CAPACITY
+        self.head = head
+        self.length = length
+
+    def _offset(self, index):
+        return HEADER.size + TIMESTAMP.size * (
+            (self.head + index) % self.capacity)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        return TIMESTAMP.unpack_from(self.map, self._offset(index))[0]
+
+    def popleft(self):
+        value = self[0]
+        self.head = (self.head + 1) % self.capacity
+        self.length -= 1
+        return value
+
+    def append(self, value):
+        if self.length == self.capacity:
+            self.popleft()
+        TIMESTAMP.pack_into(self.map, self._offset(self.length), value)
+        self.length += 1
+
+
+class SharedQuotaTracker(QuotaTracker):
+    """:class:`spinrewriter.quota.QuotaTracker` whose quota model is shared
+    through :class:`SharedLimits`.
+
+    Requests in flight are reserved per process only; every response
+    refreshes the shared model with the API's own counters.
+    """
+
+    def __init__(self, limits, **kwargs):
+        super(SharedQuotaTracker, self).__init__(**kwargs)
+        self.limits = limits
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            with self.limits.locked():
+                fields = self.limits.read()
+                self.available = fields[3] if fields[3] >= 0 else None
+                self.made = fields[4] if fields[4] >= 0 else None
+                self.requests = _Ring(self.limits, fields[5], fields[6])
+                try:
+                    yield
+                finally:
+                    fields[3:] = [
+                        -1 if self.available is None else self.available,
+                        -1 if self.made is None else self.made,
+                        self.requests.head,
+                        self.requests.length,
+                    ]
+                    self.limits.write(fields)
+
+
+class SharedRateScheduler(RateScheduler):
+    """:class:`spinrewriter.rate.RateScheduler` whose submission slots are
+    shared through :class:`SharedLimits`."""
+
+    def __init__(self, limits, **kwargs):
+        super(SharedRateScheduler, self).__init__(**kwargs)
+        self.limits = limits
+
+    @contextmanager
+    def _state(self):
+        with self.limits.locked():
+            fields = self.limits.read()
+            self.next_slot = fields[1]
+            if fields[2]:
+                self.interval = fields[2]
+            try:
+                yield
+            finally:
+                fields[1] = self.next_slot
+                fields[2] = self.interval or 0.0
+                self.limits.write(fields)
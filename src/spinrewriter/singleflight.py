@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Coalescing of identical concurrent calls into one."""
+
+import sys
+import threading
+
+
+class _Call(object):
+    """A call in flight and its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+    """Run a function only once for all concurrent calls with the same key.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and get the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        """number of calls answered by another caller's call"""
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Call func(*args, **kwargs), unless a call with the same key is
+        already in flight, and return its result.
+
+        :param key: identifies calls that have the same outcome
+        :type key: hashable
+        :param func: function to call
+        :type func: callable
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.exc_info is not None:
+                raise call.exc_info[0], call.exc_info[1], call.exc_info[2]
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Parse spintax returned by the API and render its variations locally.
+
+>>> from spinrewriter import spintax
+>>> template = spintax.parse(u'{Hello|Hi} {world|there}!')
+>>> template.render()  # doctest: +SKIP
+u'Hi world!'
+
+Parsing is done once; the resulting :class:`Template` can be rendered any
+number of times without calling the API.
+"""
+
+import random
+import re
+
+
+FORMATS = {
+    u'{|}': (u'{', u'|', u'}'),
+    u'{~}': (u'{', u'~', u'}'),
+    u'[|]': (u'[', u'|', u']'),
+    u'[spin]': (u'[spin]', u'|', u'[/spin]'),
+}
+"""opening, separator and closing tokens of every spintax format, keyed by
+the values of :attr:`spinrewriter.Api.SPINTAX_FORMAT`"""
+
+_TOKENIZERS = dict(
+    (name, re.compile(u'({0})'.format(u'|'.join(
+        re.escape(token) for token in sorted(tokens, key=len, reverse=True)))))
+    for name, tokens in FORMATS.items()
+)
+
+
+class SpintaxError(ValueError):
+    """Raised when spintax is not well-formed."""
+
+
+class Choice(tuple):
+    """A spintax group: a tuple of alternative sequences.
+
+    Once :attr:`Template.count` is computed, ``counts`` holds the number of
+    variations of every alternative and ``total`` their sum.
+    """
+
+
+class Template(object):
+    """Compiled spintax.
+
+    The template is a sequence of parts, where every part is either
+    a literal string or a :class:`Choice` between several sequences.
+    """
+
+    def __init__(self, sequence, spintax_format=u'{|}'):
+        self.sequence = sequence
+        self.spintax_format = spintax_format
+        self._count = None
+
+    @property
+    def count(self):
+        """Number of variations the template encodes.
+
+        Every combination of choices counts as a variation, even if two
+        combinations happen to produce the same text (e.g. ``{a|a}``).
+
+        :rtype: int or long
+        """
+        if self._count is None:
+            self._count = _count(self.sequence)
+        return self._count
+
+    def variation(self, index):
+        """Return the variation with the given index.
+
+        Variations are numbered in mixed radix, where the first group of
+        the template is the least significant digit; variation 0 always
+        takes the first alternative of every group. Lookup takes time
+        linear in the size of the template, regardless of the index.
+
+        :param index: number of the variation, in ``[0, count)``
+        :type index: int or long
+
+        :raises IndexError: when index is out of range
+        :rtype: unicode
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(u'Variation index out of range.')
+        out = []
+        _variation(self.sequence, index, out)
+        return u''.join(out)
+
+    def unique_variations(self, seed=None):
+        """Yield all variations exactly once, in pseudo-random order.
+
+        The order is a pseudo-random permutation of variation indexes, so no
+        bookkeeping of already produced variations is needed and memory use
+        does not grow with the number of variations produced. The same
+        ``seed`` always produces the same sequence.
+
+        :param seed: (optional) seed of the permutation
+        :type seed: hashable
+
+        :return: generator of unicode strings
+        """
+        for index in _permutation(self.count, seed):
+            yield self.variation(index)
+
+    def render(self, rng=random, uniform=False):
+        """Return a random variation.
+
+        By default every group picks one of its alternatives with equal
+        probability, so variations from short alternatives of nested groups
+        come up more often than those from long ones. With ``uniform``, each
+        alternative is weighted by the number of variations it holds, so all
+        variations are equally likely.
+
+        :param rng: (optional) source of randomness, e.g. a seeded
+            :class:`random.Random`
+        :type rng: random.Random
+        :param uniform: (optional) sample variations uniformly
+        :type uniform: boolean
+
+        :return: text without spintax
+        :rtype: unicode
+        """
+        if uniform:
+            return self.variation(rng.randrange(self.count))
+        out = []
+        _render(self.sequence, rng.choice, out)
+        return u''.join(out)
+
+    def to_spintax(self, spintax_format=None):
+        """Serialize the template back into spintax.
+
+        :param spintax_format: (optional) format to use, defaults to the
+            format the template was parsed from
+        :type spintax_format: string
+
+        :rtype: unicode
+        """
+        tokens = FORMATS[spintax_format or self.spintax_format]
+        out = []
+        _serialize(self.sequence, tokens, out)
+        return u''.join(out)
+
+    def __repr__(self):
+        return '<Template {0!r}>'.format(self.to_spintax())
+
+
+def _permutation(size, seed):
+    """Yield every integer in ``[0, size)`` exactly once, in pseudo-random
+    order determined by ``seed``, using constant memory.
+
+    A full-period linear congruential generator walks all numbers modulo
+    the next power of two, a bijective bit mixer scrambles its poor low-bit
+    behaviour, and numbers that fall outside the range are skipped.
+    """
+    rng = random.Random(seed)
+    bits = max((size - 1).bit_length(), 2)
+    mask = (1 << bits) - 1
+    multiplier = (rng.getrandbits(bits) & ~3) | 1  # == 1 (mod 4)
+    increment = rng.getrandbits(bits) | 1  # odd
+    mixer = rng.getrandbits(bits) | 1  # odd, hence invertible
+    shift = bits // 2 + 1
+    state = rng.getrandbits(bits)
+    remaining = mask + 1
+    while remaining:
+        remaining -= 1
+        state = (state * multiplier + increment) & mask
+        value = ((state ^ (state >> shift)) * mixer) & mask
+        if value < size:
+            yield value
+
+
+def _count(sequence):
+    total = 1
+    for part in sequence:
+        if not isinstance(part, basestring):
+            part.counts = [_count(alternative) for alternative in part]
+            part.total = sum(part.counts)
+            total *= part.total
+    return total
+
+
+def _variation(sequence, index, out):
+    for part in sequence:
+        if isinstance(part, basestring):
+            out.append(part)
+            continue
+        index, digit = divmod(index, part.total)
+        for alternative, count in zip(part, part.counts):
+            if digit < count:
+                _variation(alternative, digit, out)
+                break
+            digit -= count
+
+
+def _render(sequence, choice, out):
+    for part in sequence:
+        if isinstance(part, basestring):
+            out.append(part)
+        else:
+            _render(choice(part), choice, out)
+
+
+def _serialize(sequence, tokens, out):
+    start, sep, end = tokens
+    for part in sequence:
+        if isinstance(part, basestring):
+            out.append(part)
+        else:
+            out.append(start)
+            for i, alternative in enumerate(part):
+                if i:
+                    out.append(sep)
+                _serialize(alternative, tokens, out)
+            out.append(end)
+
+
+def parse(text, spintax_format=u'{|}'):
+    """Parse (possibly nested) spintax into a :class:`Template`.
+
+    Separators outside of spintax groups are treated as literal text.
+
+    :param text: text with spintax
+    :type text: unicode
+    :param spintax_format: one of :attr:`spinrewriter.Api.SPINTAX_FORMAT`
+    :type spintax_format: string
+
+    :raises SpintaxError: when groups are not balanced
+    :rtype: Template
+    """
+    try:
+        start, sep, end = FORMATS[spintax_format]
+    except KeyError:
+        raise SpintaxError(
+            u'Unknown spintax format: {0}'.format(spintax_format))
+
+    sequence = []
+    stack = []  # (parent sequence, alternatives) of the enclosing groups
+    for token in _TOKENIZERS[spintax_format].split(text):
+        if not token:
+            continue
+        if token == start:
+            alternatives = [[]]
+            stack.append((sequence, alternatives))
+            sequence = alternatives[0]
+        elif token == sep and stack:
+            sequence = []
+            stack[-1][1].append(sequence)
+        elif token == end:
+            if not stack:
+                raise SpintaxError(u'Unexpected {0}'.format(end))
+            sequence, alternatives = stack.pop()
+            sequence.append(
+                Choice(tuple(alternative) for alternative in alternatives))
+        elif sequence and isinstance(sequence[-1], basestring):
+            sequence[-1] += token
+        else:
+            sequence.append(token)
+    if stack:
+        raise SpintaxError(u'Unclosed {0}'.format(start))
+    return Template(tuple(sequence), spintax_format)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Unique variations rendered locally from spintax fetched once per text.
+
+>>> store = TemplateStore(Api(email_address, api_key))
+>>> store.unique_variation(text)  # text_with_spintax is requested
+>>> store.unique_variation(text)  # rendered locally, no request
+
+Variations are sampled uniformly from all variations the spintax encodes.
+With ``track``, every text walks a pseudo-random permutation of its
+variations instead, so no variation is issued twice by the store.
+"""
+
+from spinrewriter import spintax
+from spinrewriter.cache import LRUCache
+from spinrewriter.singleflight import SingleFlight
+
+import hashlib
+import random
+import threading
+
+
+EXHAUSTED = u'All variations of the text were issued.'
+
+
+class _Entry(object):
+    """A parsed template and its variations not issued yet."""
+
+    def __init__(self, template, seed):
+        self.template = template
+        self.variations = template.unique_variations(seed)
+        self.issued = 0
+
+
+class TemplateStore(object):
+    """Fetch spintax of every text once and render its variations locally.
+
+    Templates are kept in an in-memory LRU cache. Concurrent calls for a
+    text whose template is not known yet share one request. Give the Api a
+    :mod:`spinrewriter.cache` cache too, to keep the spintax across
+    processes and restarts.
+
+    While tracking, templates are never evicted, as that would forget which
+    variations were issued: memory grows with the number of texts.
+    """
+
+    def __init__(self, api, track=False, seed=None, maxsize=1024,
+                 rng=random):
+        """
+        :param api: Api used to fetch spintax
+        :type api: spinrewriter.Api
+        :param track: (optional) never issue a variation of a text twice
+        :type track: boolean
+        :param seed: (optional) seed of the order variations are issued in
+            when tracking; stores with the same seed issue the same sequence
+        :type seed: hashable
+        :param maxsize: (optional) number of templates kept in memory when
+            not tracking
+        :type maxsize: int
+        :param rng: (optional) source of randomness when not tracking
+        :type rng: random.Random
+        """
+        self.api = api
+        self.track = track
+        self.seed = seed
+        self.rng = rng
+        self.fetched = 0
+        """number of templates fetched from the API"""
+        self._entries = LRUCache(maxsize)
+        self._tracked = {}
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def template(self, text, confidence_level=u'medium'):
+        """Return the template of a text, fetching its spintax if needed.
+
+        :param text: original text
+        :type text: string
+        :param confidence_level: (optional) confidence level of the spintax
+        :type confidence_level: string
+
+        :rtype: spinrewriter.spintax.Template
+        """
+        return self._entry(text, confidence_level).template
+
+    def _entry(self, text, confidence_level):
+        key = (text, confidence_level)
+        entry = self._get(key)
+        if entry is None:
+            entry = self._flight.do(key, self._fetch, key)
+        return entry
+
+    def _get(self, key):
+        if self.track:
+            return self._tracked.get(key)
+        return self._entries.get(key)
+
+    def _fetch(self, key):
+        """Fetch the template of a text and store its entry, unless another
+        thread stored one meanwhile."""
+        text, confidence_level = key
+        response = self.api.text_with_spintax(
+            text, confidence_level=confidence_level)
+        template = spintax.parse(
+            response[self.api.RESP_P_NAMES.response],
+            self.api.SPINTAX_FORMAT.pipe_curly)
+        with self._lock:
+            self.fetched += 1
+            entry = self._get(key)
+            if entry is not None:
+                return entry
+            seed = None
+            if self.seed is not None:
+                seed = hashlib.sha1(repr((self.seed, key))).hexdigest()
+            entry = _Entry(template, seed)
+            if self.track:
+                self._tracked[key] = entry
+            else:
+                self._entries.set(key, entry)
+        return entry
+
+    def unique_variation(self, text, confidence_level=u'medium'):
+        """Return a variation of text, rendered locally once its spintax is
+        known.
+
+        :param text: original text
+        :type text: string
+        :param confidence_level: (optional) confidence level of the spintax
+        :type confidence_level: string
+
+        :raises IndexError: when tracking and all variations were issued
+        :rtype: unicode
+        """
+        entry = self._entry(text, confidence_level)
+        if not self.track:
+            return entry.template.render(self.rng, uniform=True)
+        with self._lock:
+            for variation in entry.variations:
+                entry.issued += 1
+                return variation
+        raise IndexError(EXHAUSTED)
+
+    def issued(self, text, confidence_level=u'medium'):
+        """Return number of variations of text issued while tracking.
+
+        :rtype: int
+        """
+        entry = self._get((text, confidence_level))
+        return 0 if entry is None else entry.issued
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import exceptions as ex
+from spinrewriter.accounts import ApiPool
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
+
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class Accounts(object):
+    """Backend dispatching requests to one emulator per account."""
+
+    def __init__(self, *emulators):
+        self.emulators = dict((e.email_address, e) for e in emulators)
+
+    def handle(self, params):
+        return self.emulators[params['email_address']].handle(params)
+
+
+class TestApiPool(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+
+    def make_pool(self, quotas, keys=('a_key', 'b_key'), **kwargs):
+        emulators = [
+            ApiEmulator(email, key, quota=quota, clock=self.clock)
+            for email, key, quota in zip(('a@foo.com', 'b@foo.com'),
+                                         ('a_key', 'b_key'), quotas)]
+        self.transport = FakeTransport(Accounts(*emulators))
+        return ApiPool(
+            zip(('a@foo.com', 'b@foo.com'), keys)[:len(quotas)],
+            clock=self.clock, sleep=self.clock.sleep,
+            transport=self.transport, **kwargs)
+
+    def sent_by(self):
+        return [r['email_address'] for r in self.transport.requests]
+
+    def test_api_quota(self):
+        """Test that quota of every account is reported."""
+        pool = self.make_pool([3, 10])
+        quota = pool.api_quota()
+        self.assertEqual(quota['a@foo.com']['api_requests_available'], 3)
+        self.assertEqual(quota['b@foo.com']['api_requests_available'], 10)
+
+    def test_most_quota(self):
+        """Test that requests go to the account with the most quota left."""
+        pool = self.make_pool([3, 10])
+        pool.api_quota()
+        pool.text_with_spintax(u'My dog.')
+        pool.unique_variation(u'My dog.')
+        pool.unique_variation_from_spintax(u'{a|b}')
+        self.assertEqual(self.sent_by()[2:], ['b@foo.com'] * 3)
+
+    def test_earliest_slot(self):
+        """Test that an account that can submit new text right away is
+        preferred over one with more quota."""
+        pool = self.make_pool([3, 10])
+        pool.api_quota()
+        pool.apis[1].scheduler.next_slot = self.clock.now + 5
+        pool.text_with_spintax(u'My dog.')
+        self.assertEqual(self.sent_by()[2:], ['a@foo.com'])
+        self.assertEqual(self.clock.slept, [])
+
+    def test_all_busy(self):
+        """Test that the account whose slot comes first waits for it."""
+        pool = self.make_pool([3, 10])
+        pool.apis[0].scheduler.next_slot = self.clock.now + 3
+        pool.apis[1].scheduler.next_slot = self.clock.now + 5
+        pool.text_with_spintax(u'My dog.')
+        self.assertEqual(self.sent_by(), ['a@foo.com'])
+        self.assertEqual(self.clock.slept, [3])
+
+    def test_failover_quota(self):
+        """Test that an account out of quota is taken out of rotation."""
+        pool = self.make_pool([0, 10])
+        self.assertEqual(pool.text_with_spintax(u'My dog.')['status'], 'OK')
+        self.assertEqual(self.sent_by(), ['a@foo.com', 'b@foo.com'])
+        until, error = pool.disabled[pool.apis[0]]
+        self.assertEqual(until, 1000.0 + pool.cooldown)
+        self.assertIsInstance(error, ex.QuotaLimitError)
+
+        pool.text_with_spintax(u'My dog.')
+        self.assertEqual(self.sent_by()[2:], ['b@foo.com'])
+
+        self.clock.now += pool.cooldown
+        pool.apis[1].scheduler.next_slot = self.clock.now + 5
+        pool.text_with_spintax(u'My dog.')
+        self.assertEqual(self.sent_by()[3:], ['a@foo.com', 'b@foo.com'])
+        self.assertEqual(pool.disabled.keys(), [pool.apis[0]])
+
+    def test_failover_authentication(self):
+        """Test that an account failing authentication is taken out of
+        rotation."""
+        pool = self.make_pool([10, 10], keys=('wrong', 'b_key'))
+        pool.unique_variation(u'My dog.')
+        self.assertEqual(self.sent_by(), ['a@foo.com', 'b@foo.com'])
+        self.assertIsInstance(
+            pool.disabled[pool.apis[0]][1], ex.AuthenticationError)
+
+    def test_all_disabled(self):
+        """Test that the error is raised when no account is left."""
+        pool = self.make_pool([0, 0])
+        with self.assertRaises(ex.QuotaLimitError):
+            pool.text_with_spintax(u'My dog.')
+        with self.assertRaises(ex.QuotaLimitError):
+            pool.text_with_spintax(u'My dog.')
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_window_reset(self):
+        """Test that an account used up locally comes back as soon as its
+        oldest request leaves the quota window."""
+        pool = self.make_pool([1])
+        pool.text_with_spintax(u'My dog.')
+        with self.assertRaises(ex.QuotaLimitError):
+            pool.text_with_spintax(u'My dog.')
+        self.assertEqual(pool.disabled[pool.apis[0]][0], 1000.0 + 86400)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_other_errors(self):
+        """Test that other errors are raised without failover."""
+        pool = self.make_pool([10, 10], validate=False)
+        with self.assertRaises(ex.ParamValueError):
+            pool.text_with_spintax(u'')
+        self.assertEqual(self.sent_by(), ['a@foo.com'])
+        self.assertEqual(pool.disabled, {})
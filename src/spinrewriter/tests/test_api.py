@@ -21,29 +21,30 @@ class TestApi(unittest.TestCase):
         self.assertEquals(self.api.email_address, 'foo@bar.com')
         self.assertEquals(self.api.api_key, 'test_api_key')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_send_request(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_send_request(self, post):
         """Test that _send_requests correctly parses JSON response into a dict
         and that request parameters get encoded beforehand.
         """
         # mock response from connection
-        urllib2.urlopen.return_value.read.return_value = '{"foo":"bär"}'
+        post.return_value = '{"foo":"bär"}'
 
         # call it
         result = self.api._send_request({'foo': u'bär'.encode('utf-8')})
 
         # test response
         self.assertEquals(result['foo'], u'bär')
+        post.assert_called_once_with('foo=b%C3%A4r')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_api_quota_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_api_quota_call(self, post):
         """Test if Api.api_quota() correctly parses the response it gets from
         SpinRewriter API.
         """
 
-        # mock response from urllib2
+        # mock response from connection pool
         mocked_response = u"""{"status":"OK","response":"You made 0 API requests in the last 24 hours. 100 still available.","api_requests_made":0,"api_requests_available":100}"""  # noqa
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # call API
         result = self.api.api_quota()
@@ -58,13 +59,13 @@ class TestApi(unittest.TestCase):
             u' 100 still available.'
         )
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_text_with_spintax_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_text_with_spintax_call(self, post):
         """Test if Api.text_with_spintax() correctly parses the response it
         gets from SpinRewriter API.
         """
 
-        # mock response from urllib2
+        # mock response from connection pool
         mocked_response = u"""{
             "status":"OK",
             "response":"This is my über cute {dog|pet|animal}.",
@@ -74,7 +75,7 @@ class TestApi(unittest.TestCase):
             "nested_spintax":"false",
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # call API
         result = self.api.text_with_spintax(
@@ -92,13 +93,13 @@ class TestApi(unittest.TestCase):
         self.assertEquals(
             result['response'], u'This is my über cute {dog|pet|animal}.')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_unique_variation_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_unique_variation_call(self, post):
         """Test if Api.unique_variation() correctly parses the response it
         gets from SpinRewriter API.
         """
 
-        # mock response from urllib2
+        # mock response from connection pool
         mocked_response = u"""{
             "status":"OK",
             "response":"This is my über cute pet.",
@@ -108,7 +109,7 @@ class TestApi(unittest.TestCase):
             "nested_spintax":"false",
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # call API
         result = self.api.unique_variation(
@@ -125,13 +126,13 @@ class TestApi(unittest.TestCase):
         self.assertEquals(result['confidence_level'], u'medium')
         self.assertEquals(result['response'], u'This is my über cute pet.')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_unique_variation_from_spintax_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_unique_variation_from_spintax_call(self, post):
         """Test if Api.unique_variation_from_spintax() correctly parses the
         response it gets from SpinRewriter API.
         """
 
-        # mock response from urllib2
+        # mock response from connection pool
         mocked_response = u"""{
             "status":"OK",
             "response":"This is my über cute animal.",
@@ -139,7 +140,7 @@ class TestApi(unittest.TestCase):
             "api_requests_available":98,
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # call API
         result = self.api.unique_variation_from_spintax(
@@ -155,14 +156,14 @@ class TestApi(unittest.TestCase):
         self.assertEquals(result['confidence_level'], u'medium')
         self.assertEquals(result['response'], u'This is my über cute animal.')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_transform_plain_text_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_transform_plain_text_call(self, post):
         """Test if Api.transform_plain_text() correctly parses the response it
         gets from SpinRewriter API. This method is used by unique_variation()
         and text_with_spintax().
         """
 
-        # mock response from urllib2
+        # mock response from connection pool
         mocked_response = u"""{
             "status":"OK",
             "response":"This is my über cute pet.",
@@ -172,7 +173,7 @@ class TestApi(unittest.TestCase):
             "nested_spintax":"false",
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # call API
         result = self.api._transform_plain_text(
@@ -262,11 +263,11 @@ class TestApi(unittest.TestCase):
             ('spintax_format', '{|}'),
         ))
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_unique_variation_from_spintax_error(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_unique_variation_from_spintax_error(self, post):
         # mock response from SpinRewriter
         mocked_response = u"""{"status":"ERROR", "response":"Authentication failed. Unique API key is not valid for this user."}"""  # noqa
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # test call
         with self.assertRaises(ex.AuthenticationError):
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import exceptions as ex
+from spinrewriter import SpinRewriter
+from spinrewriter.async_api import AsyncApi
+from spinrewriter.async_api import AsyncSpinRewriter
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
+from spinrewriter.transport import Transport
+
+import mock
+import threading
+import time
+import unittest2 as unittest
+
+
+class SlowTransport(Transport):
+    """Transport that records how many requests are in flight at once."""
+
+    def __init__(self, backend):
+        self.transport = FakeTransport(backend)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def post(self, body):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return self.transport.post(body)
+
+
+class TestAsyncApi(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key')
+        self.transport = SlowTransport(self.emulator)
+        self.api = AsyncApi('foo@bar.com', 'test_api_key', concurrency=4,
+                            transport=self.transport)
+
+    def tearDown(self):
+        self.api.close()
+
+    def test_init(self):
+        """Test that the wrapped Api and the worker pool are set up."""
+        api = AsyncApi('foo@bar.com', 'test_api_key', concurrency=3)
+        self.assertEqual(api.api.email_address, 'foo@bar.com')
+        self.assertEqual(api.api.transport.maxsize, 3)
+        self.assertEqual(api.concurrency, 3)
+        api.close()
+
+    def test_calls(self):
+        """Test that all API calls return results asynchronously."""
+        self.assertEqual(
+            self.api.api_quota().get()['api_requests_available'], 100)
+        self.assertEqual(
+            self.api.text_with_spintax(u'My dog.').get()['response'],
+            u'My {dog|pet|animal}.')
+        self.assertIn(
+            self.api.unique_variation(u'My dog.').get()['response'],
+            [u'My dog.', u'My pet.', u'My animal.'])
+        self.assertEqual(
+            self.api.unique_variation_from_spintax(u'{a|a}').get()['response'],
+            u'a')
+
+    def test_callback(self):
+        """Test that callback receives the response."""
+        results = []
+        self.api.api_quota(callback=results.append).wait()
+        self.assertEqual(results[0]['status'], u'OK')
+
+    def test_errors(self):
+        """Test that errors are raised by get()."""
+        self.emulator.inject('rewrite_failed')
+        result = self.api.unique_variation(u'My dog.')
+        with self.assertRaises(ex.InternalApiError):
+            result.get()
+        self.assertFalse(result.successful())
+
+    def test_concurrency_limit(self):
+        """Test that no more than ``concurrency`` requests are in flight."""
+        results = [self.api.unique_variation_from_spintax(u'{a|b}')
+                   for i in range(20)]
+        for result in results:
+            result.get()
+        self.assertEqual(self.transport.max_in_flight, 4)
+
+    def test_context_manager(self):
+        """Test that leaving the with block waits for pending calls."""
+        with AsyncApi('foo@bar.com', 'test_api_key',
+                      transport=self.transport) as api:
+            result = api.api_quota()
+        self.assertTrue(result.ready())
+
+
+class TestAsyncSpinRewriter(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key')
+        self.sr = AsyncSpinRewriter('foo@bar.com', 'test_api_key', 2)
+        self.sr.api.transport = FakeTransport(self.emulator)
+
+    def test_init(self):
+        """Test that the facade shares the Api of its AsyncApi."""
+        self.assertEqual(self.sr.email_address, 'foo@bar.com')
+        self.assertEqual(self.sr.api_key, 'test_api_key')
+        self.assertIs(self.sr.api, self.sr.async_api.api)
+        self.assertEqual(self.sr.async_api.concurrency, 2)
+        self.sr.close()
+
+    def test_calls(self):
+        """Test that facade calls return the response text."""
+        with self.sr:
+            spintax = self.sr.text_with_spintax(u'My dog.')
+            variation = self.sr.unique_variation(u'My dog.')
+            self.assertEqual(spintax.get(), u'My {dog|pet|animal}.')
+            self.assertIn(variation.get(),
+                          [u'My dog.', u'My pet.', u'My animal.'])
+
+    def test_unique_variations(self):
+        """Test that batches return variations, also on process pools."""
+        with self.sr:
+            results = list(self.sr.unique_variations(
+                [u'My dog.', u'My dog.'], workers=2))
+        self.assertEqual(len(self.emulator.requests), 2)
+        for result in results:
+            self.assertIn(result.value,
+                          [u'My dog.', u'My pet.', u'My animal.'])
+
+        with mock.patch('spinrewriter.batch.imap_processes') as imap:
+            self.sr.unique_variations([u'My dog.'], processes=True)
+        self.assertIs(imap.call_args[0][0], SpinRewriter)
+
+    def test_errors(self):
+        """Test that errors are raised by get()."""
+        self.emulator.inject('invalid_key')
+        with self.sr:
+            with self.assertRaises(ex.AuthenticationError):
+                self.sr.text_with_spintax(u'My dog.').get()
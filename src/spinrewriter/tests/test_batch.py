@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import batch
+from spinrewriter import exceptions as ex
+from spinrewriter import SpinRewriter
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
+
+import mock
+import threading
+import time
+import unittest2 as unittest
+
+
+class EmulatedRewriter(SpinRewriter):
+    """SpinRewriter talking to an in-process emulator, so that it can be
+    created inside pool processes."""
+
+    def __init__(self, email_address, api_key):
+        super(EmulatedRewriter, self).__init__(email_address, api_key)
+        self.api.transport = FakeTransport(
+            ApiEmulator(email_address, api_key, frequency=0))
+
+
+def spin(text):
+    """Fail on texts containing 'fail', otherwise upper-case them."""
+    if 'fail' in text:
+        raise ex.ParamValueError(text)
+    return text.upper()
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_imap_ordered(self):
+        """Test that results are yielded in input order."""
+        results = list(batch.imap(spin, ['a', 'fail', 'c'], workers=2))
+
+        self.assertEqual([r.index for r in results], [0, 1, 2])
+        self.assertEqual([r.value for r in results], ['A', None, 'C'])
+        self.assertIsInstance(results[1].error, ex.ParamValueError)
+        self.assertEqual(results[1].text, 'fail')
+        self.assertIsNone(results[0].error)
+
+    def test_imap_unordered(self):
+        """Test that results are yielded as they complete."""
+        def slow_first(text):
+            if text == 'a':
+                time.sleep(0.1)
+            return text
+
+        results = list(batch.imap(
+            slow_first, ['a', 'b', 'c'], workers=3, ordered=False))
+        self.assertEqual(results[-1].value, 'a')
+        self.assertEqual(sorted(r.index for r in results), [0, 1, 2])
+
+    def test_imap_bounded(self):
+        """Test that the input is consumed lazily."""
+        consumed = []
+
+        def texts():
+            for i in range(1000):
+                consumed.append(i)
+                yield str(i)
+
+        results = batch.imap(spin, texts(), workers=2)
+        next(results)
+        time.sleep(0.05)
+        self.assertLessEqual(len(consumed), 6)
+        results.close()
+
+    def test_imap_early_exit(self):
+        """Test that abandoning the generator stops the pool."""
+        threads = threading.active_count()
+        results = batch.imap(spin, iter(lambda: 'x', None), workers=2)
+        self.assertEqual(next(results).value, 'X')
+        results.close()
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_imap_processes(self):
+        """Test that every process creates its own client."""
+        results = list(batch.imap_processes(
+            EmulatedRewriter, ('foo@bar.com', 'key'), 'text_with_spintax',
+            {'confidence_level': 'high'}, [u'My dog.', u'', u'Cute.'],
+            workers=2))
+
+        self.assertEqual(results[0].value, u'My {dog|pet|animal}.')
+        self.assertIsInstance(results[1].error, ex.ParamValueError)
+        self.assertEqual(results[1].error.api_error_msg,
+                         u'Original text too short.')
+        self.assertEqual(results[2].value, u'{Cute|adorable|sweet}.')
+
+    def test_process_initializer(self):
+        """Test the functions pool processes run, in this process."""
+        batch._init_process(
+            EmulatedRewriter, ('foo@bar.com', 'key'), 'text_with_spintax', {})
+        self.assertEqual(
+            batch._process_item((3, u'My dog.')),
+            (3, u'My dog.', u'My {dog|pet|animal}.', None))
+        batch._worker = None
+
+
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.calls = []
+        self.stats = batch.DedupStats()
+
+    def spin(self, text):
+        self.calls.append(text)
+        return spin(text)
+
+    def test_dedup_key(self):
+        """Test that keys ignore whitespace and encoding."""
+        self.assertEqual(batch.dedup_key(u' über\n alles'),
+                         batch.dedup_key(u'über alles '.encode('utf-8')))
+        self.assertNotEqual(batch.dedup_key(u'a b'), batch.dedup_key(u'ab'))
+
+    def test_imap_unique(self):
+        """Test that every distinct text is processed once and its result
+        fanned out to all of its positions, in order."""
+        texts = ['a b', 'fail', 'c', 'a  b', 'c', 'fail', 'd']
+        results = list(batch.imap_unique(
+            self.spin, texts, workers=2, stats=self.stats))
+        self.assertEqual(sorted(self.calls), ['a b', 'c', 'd', 'fail'])
+        self.assertEqual([r.index for r in results], range(7))
+        self.assertEqual([r.text for r in results], texts)
+        self.assertEqual([r.value for r in results],
+                         ['A B', None, 'C', 'A B', 'C', None, 'D'])
+        self.assertIs(results[1].error, results[5].error)
+        self.assertEqual(str(self.stats),
+                         '7 texts, 4 unique, 3 calls saved')
+
+    def test_imap_unique_unordered(self):
+        """Test that results are yielded as they complete."""
+        def slow_first(text):
+            if text == 'a':
+                time.sleep(0.1)
+            return text
+
+        results = list(batch.imap_unique(
+            slow_first, ['a', 'b', 'a', 'b', 'c'], workers=3, ordered=False))
+        self.assertEqual([r.value for r in results[-2:]], ['a', 'a'])
+        self.assertEqual(sorted(r.index for r in results), range(5))
+
+    def test_imap_unique_bounded(self):
+        """Test that the input is consumed lazily, even when texts repeat."""
+        consumed = []
+
+        def texts():
+            for i in range(1000):
+                consumed.append(i)
+                yield str(i % 3)
+
+        results = batch.imap_unique(spin, texts(), workers=2)
+        self.assertEqual(next(results).value, '0')
+        self.assertLessEqual(len(consumed), 4)
+        self.assertEqual(len(list(results)), 999)
+
+    def test_imap_unique_maxresults(self):
+        """Test that only maxresults results are kept and that a text whose
+        result was forgotten is processed again."""
+        texts = ['a', 'b', 'a', 'c', 'c', 'b']
+        results = list(batch.imap_unique(
+            self.spin, texts, workers=1, stats=self.stats, maxresults=1))
+        self.assertEqual([r.value for r in results],
+                         ['A', 'B', 'A', 'C', 'C', 'B'])
+        self.assertEqual(self.calls, ['a', 'b', 'a', 'c', 'b'])
+        self.assertEqual(self.stats.saved, 1)
+
+    def test_imap_unique_processes(self):
+        """Test deduplication on a process pool."""
+        results = list(batch.imap_unique_processes(
+            EmulatedRewriter, ('foo@bar.com', 'key'), 'text_with_spintax',
+            {}, [u'My dog.', u'My  dog.'], workers=2, stats=self.stats))
+        self.assertEqual([r.value for r in results],
+                         [u'My {dog|pet|animal}.'] * 2)
+        self.assertEqual(self.stats.saved, 1)
+
+
+class TestUniqueVariations(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.sr = EmulatedRewriter('foo@bar.com', 'key')
+
+    def test_unique_variations(self):
+        """Test that a failing text does not abort the batch."""
+        results = list(self.sr.unique_variations(
+            [u'My dog.', u'', u'Cute.'], workers=2))
+
+        self.assertIn(results[0].value,
+                      [u'My dog.', u'My pet.', u'My animal.'])
+        self.assertIsInstance(results[1].error, ex.ParamValueError)
+        self.assertIn(results[2].value, [u'Cute.', u'adorable.', u'sweet.'])
+
+    def test_quota_errors(self):
+        """Test that quota errors are reported per text."""
+        self.sr.api.transport.backend.quota = 1
+        results = list(self.sr.unique_variations(
+            [u'My dog.', u'My dog.'], workers=1))
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ex.QuotaLimitError)
+
+    def test_dedup(self):
+        """Test that repeated texts get the same variation and that the
+        saved calls are counted."""
+        stats = batch.DedupStats()
+        results = list(self.sr.unique_variations(
+            [u'My dog.', u'Cute.', u'My dog. '], dedup=True, stats=stats))
+        self.assertEqual(results[0].value, results[2].value)
+        self.assertEqual(len(self.sr.api.transport.backend.requests), 2)
+        self.assertEqual(stats.saved, 1)
+
+    @mock.patch('spinrewriter.batch.imap_unique_processes')
+    def test_dedup_processes(self, imap_unique_processes):
+        """Test that deduplication works with process pools."""
+        self.sr.unique_variations(['a'], processes=True, dedup=True)
+        imap_unique_processes.assert_called_once_with(
+            EmulatedRewriter, ('foo@bar.com', 'key'), 'unique_variation',
+            {'confidence_level': 'medium'}, ['a'], 8, True, stats=None)
+
+    @mock.patch('spinrewriter.batch.imap_processes')
+    def test_unique_variations_processes(self, imap_processes):
+        """Test that process pools get everything needed to recreate the
+        client."""
+        self.sr.unique_variations(['a'], 'low', 4, False, processes=True)
+        imap_processes.assert_called_once_with(
+            EmulatedRewriter, ('foo@bar.com', 'key'), 'unique_variation',
+            {'confidence_level': 'low'}, ['a'], 4, False)
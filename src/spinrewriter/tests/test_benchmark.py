@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import benchmark
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
+from StringIO import StringIO
+
+import unittest2 as unittest
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_measure(self):
+        """Test that measure sends all requests and reports statistics."""
+        transport = FakeTransport(ApiEmulator('foo@bar.com', 'key'))
+        api = Api('foo@bar.com', 'key', transport=transport, coalesce=False)
+
+        stats = benchmark.measure(api, requests=20, concurrency=2)
+        self.assertEqual(stats.requests, 20)
+        self.assertEqual(len(transport.requests), 20)
+        self.assertGreater(stats.throughput, 0)
+        self.assertLessEqual(stats.p50, stats.p95)
+
+    def test_main(self):
+        """Test that all transports are compared."""
+        out = StringIO()
+        benchmark.main(['10', '2'], out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(
+            [line.split()[0] for line in lines if line],
+            ['transport', 'fake', 'pool', 'urllib',
+             'errors', 'compiled', 'sequential'])
+
+    def test_classification(self):
+        """Test that both classifiers are timed."""
+        results = benchmark.classification(rounds=10)
+        self.assertEqual(sorted(results), ['compiled', 'sequential'])
+        self.assertGreater(results['compiled'], 0)
+        self.assertEqual(benchmark._sequential(u'foo'), ex.UnknownApiError)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.cache import Cache
+from spinrewriter.cache import cache_key
+from spinrewriter.cache import LRUCache
+from spinrewriter.cache import SQLiteCache
+from spinrewriter.cache import TTLCache
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
+from StringIO import StringIO
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest2 as unittest
+import zlib
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_cache_key(self):
+        """Test that credentials do not affect the key, but the text and
+        options do."""
+        params = [
+            ('email_address', 'foo@bar.com'),
+            ('api_key', 'test_api_key'),
+            ('action', 'text_with_spintax'),
+            ('text', 'foo'),
+            ('protected_terms', ''),
+            ('confidence_level', 'medium'),
+            ('nested_spintax', False),
+            ('spintax_format', '{|}'),
+        ]
+        key = cache_key(params)
+        self.assertEqual(len(key), 40)
+        self.assertEqual(
+            key, cache_key([('email_address', 'bar@foo.com')] + params[1:]))
+        for i in range(2, len(params)):
+            changed = list(params)
+            changed[i] = (params[i][0], 'x')
+            self.assertNotEqual(key, cache_key(changed))
+
+
+class TestCaches(unittest.TestCase):
+
+    def test_base_cache(self):
+        """Test that Cache is an abstract interface."""
+        with self.assertRaises(NotImplementedError):
+            Cache().get('foo')
+        with self.assertRaises(NotImplementedError):
+            Cache().set('foo', {})
+
+    def test_lru_cache(self):
+        """Test that least recently used entries are evicted."""
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        cache.set('c', 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_ttl_cache(self):
+        """Test that entries expire after ttl seconds."""
+        now = [1000]
+        cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        now[0] += 9
+        self.assertEqual(cache.get('a'), 1)
+        now[0] += 1
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+class TestApiCache(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key')
+        self.transport = FakeTransport(self.emulator)
+        self.cache = LRUCache()
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport, cache=self.cache)
+
+    def test_text_with_spintax_cached(self):
+        """Test that repeated text_with_spintax calls hit the cache."""
+        first = self.api.text_with_spintax(u'My dog.', [u'food'])
+        first['response'] = u'changed by caller'
+        second = self.api.text_with_spintax(u'My dog.', [u'food'])
+        self.api.text_with_spintax(u'My dog.', [u'cat'])
+
+        self.assertEqual(second['response'], u'My {dog|pet|animal}.')
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+    def test_errors_not_cached(self):
+        """Test that error responses are not cached."""
+        self.emulator.inject('rewrite_failed')
+        with self.assertRaises(ex.InternalApiError):
+            self.api.text_with_spintax(u'My dog.')
+        self.api.text_with_spintax(u'My dog.')
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_other_actions_not_cached(self):
+        """Test that unique variations are always requested from the API."""
+        self.api.unique_variation(u'My dog.')
+        self.api.unique_variation(u'My dog.')
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(len(self.cache), 0)
+
+
+def fill_cache(path, prefix):
+    """Store some responses from a separate process."""
+    cache = SQLiteCache(path)
+    for i in range(20):
+        cache.set('{0}{1}'.format(prefix, i), {'response': prefix})
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+        self.cache = SQLiteCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_set(self):
+        """Test storing, replacing and reading of responses."""
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', {'response': u'über'})
+        self.cache.set('a', {'response': u'über dog'})
+        self.assertEqual(self.cache.get('a'), {'response': u'über dog'})
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        blob = zlib.compress(json.dumps({'response': u'über dog'}))
+        self.assertEqual(self.cache.size, len(blob))
+
+    def test_persistence(self):
+        """Test that other instances see stored responses."""
+        self.cache.set('a', {'response': u'foo'})
+        self.assertEqual(SQLiteCache(self.path).get('a'),
+                         {'response': u'foo'})
+
+    def test_eviction(self):
+        """Test that least recently used responses are evicted once the size
+        limit is reached."""
+        self.cache.set('a', {'response': u'a' * 100})
+        size = self.cache.size
+        self.cache.max_bytes = size * 2
+        self.cache.set('b', {'response': u'b' * 100})
+        self.cache.get('a')
+        self.cache.set('c', {'response': u'c' * 100})
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+        self.assertEqual(self.cache.size, size * 2)
+
+    def test_rollback(self):
+        """Test that failed writes leave the cache untouched."""
+        with self.assertRaises(TypeError):
+            self.cache.set('a', {'response': object()})
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_dump_load(self):
+        """Test exporting responses and importing them into a new cache."""
+        for i in range(1001):
+            self.cache.set(str(i), {'response': i})
+        out = StringIO()
+        self.cache.dump(out)
+
+        cache = SQLiteCache(os.path.join(self.tmpdir, 'new.db'))
+        cache.load(StringIO(out.getvalue() + '\n'))
+        self.assertEqual(len(cache), 1001)
+        self.assertEqual(cache.get('1000'), {'response': 1000})
+
+    def test_threads(self):
+        """Test that every thread gets its own connection."""
+        self.cache.set('a', {'response': u'foo'})
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(self.cache.get('a')))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [{'response': u'foo'}])
+
+    def test_processes(self):
+        """Test that many processes can write to the cache at once."""
+        processes = [
+            multiprocessing.Process(target=fill_cache, args=(self.path, p))
+            for p in 'abcd']
+        for process in processes:
+            process.start()
+        fill_cache(self.path, 'e')
+        for process in processes:
+            process.join()
+        self.assertEqual(len(self.cache), 100)
+        self.assertEqual(self.cache.get('c7'), {'response': u'c'})
+
+    def test_api(self):
+        """Test the cache as Api's cache."""
+        transport = FakeTransport(ApiEmulator('foo@bar.com', 'test_api_key'))
+        api = Api('foo@bar.com', 'test_api_key', transport=transport,
+                  cache=self.cache)
+        api.text_with_spintax(u'My dog.')
+        api = Api('foo@bar.com', 'test_api_key', transport=transport,
+                  cache=SQLiteCache(self.path))
+        self.assertEqual(api.text_with_spintax(u'My dog.')['response'],
+                         u'My {dog|pet|animal}.')
+        self.assertEqual(len(transport.requests), 1)
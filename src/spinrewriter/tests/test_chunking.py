@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import chunking
+from spinrewriter import exceptions as ex
+from spinrewriter.cache import LRUCache
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.rate import RateScheduler
+from spinrewriter.transport import FakeTransport
+
+import mock
+import unittest2 as unittest
+
+
+class TestSplit(unittest.TestCase):
+
+    def assertRoundTrip(self, text, max_words):
+        chunks, separators = chunking.split(text, max_words)
+        self.assertEqual(len(separators), len(chunks) + 1)
+        self.assertEqual(chunking.join(chunks, separators), text)
+        for chunk in chunks:
+            self.assertLessEqual(chunking.count_words(chunk), max_words)
+        return chunks, separators
+
+    def test_count_words(self):
+        """Test counting of words."""
+        self.assertEqual(chunking.count_words(u' My  dog,\n\tmy cat. '), 4)
+        self.assertEqual(chunking.count_words(u''), 0)
+
+    def test_short(self):
+        """Test that texts under the limit are a single chunk."""
+        self.assertEqual(self.assertRoundTrip(u'\n My dog. My cat.\n', 4),
+                         ([u'My dog. My cat.'], [u'\n ', u'\n']))
+        self.assertEqual(self.assertRoundTrip(u'  ', 4), ([u''], [u'  ', u'']))
+
+    def test_paragraphs(self):
+        """Test that paragraphs are kept together when they fit."""
+        text = u'One two. Three.\n\nFour five six.\n \nSeven.'
+        self.assertEqual(self.assertRoundTrip(text, 4), (
+            [u'One two. Three.', u'Four five six.\n \nSeven.'],
+            [u'', u'\n\n', u''],
+        ))
+
+    def test_sentences(self):
+        """Test that long paragraphs are split between sentences."""
+        text = u'One two. Three four! Five six?\n\nSeven.'
+        self.assertEqual(self.assertRoundTrip(text, 3)[0], [
+            u'One two.', u'Three four!', u'Five six?\n\nSeven.'])
+
+    def test_words(self):
+        """Test that long sentences are split between words."""
+        text = u'One two three four five. Six.'
+        self.assertEqual(self.assertRoundTrip(text, 2)[0], [
+            u'One two', u'three four', u'five. Six.'])
+
+    def test_no_merge(self):
+        """Test that every paragraph can be a chunk of its own."""
+        text = u'One. Two.\n\nThree.\n\nFour five six. Seven.'
+        self.assertEqual(self.assertRoundTrip(text, 3)[0], [
+            u'One. Two.\n\nThree.', u'Four five six.', u'Seven.'])
+        chunks, separators = chunking.split(text, 3, merge=False)
+        self.assertEqual(chunks, [
+            u'One. Two.', u'Three.', u'Four five six.', u'Seven.'])
+        self.assertEqual(chunking.join(chunks, separators), text)
+
+    def test_unicode(self):
+        """Test splitting at non-ascii whitespace."""
+        self.assertRoundTrip(u'Über\u00a0alles. Čez\u2003vse.', 1)
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key',
+                                    clock=self.clock)
+        self.transport = FakeTransport(self.emulator)
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport,
+                       scheduler=RateScheduler(
+                           interval=7, clock=self.clock,
+                           sleep=self.clock.sleep))
+        self.api.CHUNK_WORKERS = 1  # chunks in order, on the manual clock
+        self.text = u'My dog is big.\n\nMy house is big.\n\nMy car is big.'
+
+    def test_text_with_spintax(self):
+        """Test that chunks are processed separately and joined in order."""
+        self.emulator.MAX_WORDS = 8
+        with self.assertRaises(ex.ParamValueError):
+            self.api.text_with_spintax(self.text)
+        response = self.api.text_with_spintax(
+            self.text, protected_terms=[u'house'], chunk_words=8)
+        self.assertEqual(response['status'], 'OK')
+        self.assertEqual(
+            response['response'],
+            u'My {dog|pet|animal} is {big|large|huge}.\n\n'
+            u'My house is {big|large|huge}.\n\n'
+            u'My car is {big|large|huge}.')
+        self.assertEqual(response['api_requests_made'], 2)
+        self.assertEqual(response['api_requests_available'], 98)
+        requests = self.transport.requests[1:]
+        self.assertEqual(sorted(r['text'] for r in requests), [
+            'My car is big.', 'My dog is big.\n\nMy house is big.'])
+        self.assertEqual([r['protected_terms'] for r in requests],
+                         ['house', 'house'])
+
+    def test_unique_variation(self):
+        """Test chunking of unique variations."""
+        response = self.api.unique_variation(self.text, chunk_words=4)
+        self.assertEqual(len(self.transport.requests), 3)
+        self.assertEqual(response['response'].count(u'\n\n'), 2)
+
+    def test_single_chunk(self):
+        """Test that short texts are sent as they are."""
+        self.api.unique_variation(u' My dog. ', chunk_words=4)
+        self.assertEqual(self.transport.requests[0]['text'], ' My dog. ')
+
+    def test_chunk_error(self):
+        """Test that an error of any chunk is raised."""
+        self.emulator.inject('rewrite_failed')
+        with self.assertRaises(ex.InternalApiError):
+            self.api.unique_variation(self.text, chunk_words=4)
+
+    def test_frequency(self):
+        """Test that chunks are paced by the scheduler to stay within the
+        API's frequency limit."""
+        self.api.unique_variation(self.text, chunk_words=4)
+        self.assertEqual(self.clock.slept, [7, 7])
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_no_scheduler(self):
+        """Test that splitting a text needs a scheduler."""
+        self.api.scheduler = None
+        with self.assertRaises(ValueError):
+            self.api.unique_variation(self.text, chunk_words=4)
+        self.api.unique_variation(u'My dog.', chunk_words=4)
+
+    def test_chunk_exception(self):
+        """Test that an exception from any chunk is raised."""
+        self.api.transport = None
+        with self.assertRaises(AttributeError):
+            self.api.text_with_spintax(self.text, chunk_words=4)
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key',
+                                    clock=self.clock)
+        self.transport = FakeTransport(self.emulator)
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport, cache=LRUCache(),
+                       scheduler=RateScheduler(
+                           interval=7, clock=self.clock,
+                           sleep=self.clock.sleep))
+        self.api.CHUNK_WORKERS = 1  # groups in order, on the manual clock
+        self.text = u'My dog is big.\n\nMy house is big.\n\n My car.\n'
+
+    def spin(self, text, **kwargs):
+        return self.api.text_with_spintax(text, incremental=True, **kwargs)
+
+    def test_incremental(self):
+        """Test that only new or changed paragraphs are sent, together, and
+        that the spintax of every paragraph is reused."""
+        response = self.spin(self.text)
+        self.assertEqual(
+            response['response'],
+            u'My {dog|pet|animal} is {big|large|huge}.\n\n'
+            u'My house is {big|large|huge}.\n\n'
+            u' My car.\n')
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(response['api_requests_made'], 1)
+
+        edited = self.text.replace(u'house', u'cat')
+        response = self.spin(edited + u'\nMy dog is big.')
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(self.transport.requests[1]['text'],
+                         'My cat is big.')
+        self.assertEqual(response['api_requests_made'], 2)
+        self.assertTrue(response['response'].endswith(
+            u'{big|large|huge}.\n\n My car.\n\n'
+            u'My {dog|pet|animal} is {big|large|huge}.'))
+
+        # everything cached, counters are the latest cached ones
+        response = self.spin(edited)
+        self.assertEqual(len(self.transport.requests), 2)
+        self.assertEqual(response['api_requests_made'], 2)
+
+    def test_options(self):
+        """Test that paragraphs are cached per options, requests respect
+        chunk_words and the requested spintax format is used."""
+        self.spin(self.text)
+        response = self.spin(self.text, spintax_format=Api.SPINTAX_FORMAT.
+                             pipe_square, chunk_words=6)
+        self.assertEqual(len(self.transport.requests), 3)
+        self.assertTrue(response['response'].startswith(u'My [dog|pet|'))
+
+    def test_no_scheduler(self):
+        """Test that sending changed paragraphs in several requests needs a
+        scheduler, while a single request does not."""
+        self.api.scheduler = None
+        with self.assertRaises(ValueError):
+            self.spin(self.text, chunk_words=6)
+        self.assertEqual(len(self.transport.requests), 0)
+        self.spin(self.text)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_single_paragraph(self):
+        """Test that single paragraphs are sent as they are."""
+        self.spin(u'My dog is big. ')
+        self.spin(u'My dog is big. ')
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(self.transport.requests[0]['text'],
+                         'My dog is big. ')
+
+    def test_paragraphs_merged(self):
+        """Test that paragraphs are sent one by one if the response does not
+        keep them apart."""
+        spin = self.emulator.spin
+        with mock.patch.object(
+                self.emulator, 'spin',
+                lambda text, *args: spin(text.replace(u'\n\n', u' '), *args)):
+            response = self.spin(self.text)
+        self.assertEqual(len(self.transport.requests), 4)
+        self.assertEqual(self.clock.slept, [7, 7, 7])
+        self.assertEqual(self.spin(self.text), response)
+        self.assertEqual(len(self.transport.requests), 4)
+        self.assertIn(u'My {dog|pet|animal}', response['response'])
+
+    def test_merged_no_scheduler(self):
+        """Test that without a scheduler a response that does not keep the
+        paragraphs apart is used and cached for all of them."""
+        self.api.scheduler = None
+        spin = self.emulator.spin
+        with mock.patch.object(
+                self.emulator, 'spin',
+                lambda text, *args: spin(text.replace(u'\n\n', u' '), *args)):
+            response = self.spin(self.text)
+        self.assertEqual(
+            response['response'],
+            u'My {dog|pet|animal} is {big|large|huge}. '
+            u'My house is {big|large|huge}. My car.\n')
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(self.spin(self.text), response)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_span_no_scheduler(self):
+        """Test that without a scheduler the paragraphs between changed ones
+        are sent along."""
+        self.api.scheduler = None
+        self.spin(self.text)
+        self.clock.now += 7
+        edited = self.text.replace(u'dog', u'cat').replace(u'car', u'bus')
+        response = self.spin(edited)
+        self.assertEqual(self.transport.requests[1]['text'],
+                         'My cat is big.\n\nMy house is big.\n\nMy bus.')
+        self.assertTrue(response['response'].endswith(u'\n\n My bus.\n'))
+
+    def test_error(self):
+        """Test that errors of any request are raised."""
+        self.emulator.inject('rewrite_failed')
+        with self.assertRaises(ex.InternalApiError):
+            self.spin(self.text)
+        self.api.transport = None
+        with self.assertRaises(AttributeError):
+            self.spin(self.text)
+
+    def test_no_cache(self):
+        """Test that incremental transformation needs a cache."""
+        self.api.cache = None
+        with self.assertRaises(ValueError):
+            self.spin(self.text)
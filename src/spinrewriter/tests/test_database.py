@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from spinrewriter.database import Database
+from spinrewriter.database import transaction
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest2 as unittest
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self):
+        """Create a database in a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.database = Database(os.path.join(self.tmpdir, 'test.db'),
+                                 ('CREATE TABLE IF NOT EXISTS t (v TEXT)', ))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_connection(self):
+        """Test that connections are reused within a thread and created
+        with the schema for every other thread."""
+        con = self.database.connection()
+        self.assertIs(self.database.connection(), con)
+        others = []
+        thread = threading.Thread(
+            target=lambda: others.append(self.database.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], con)
+        self.assertEqual(
+            con.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_transaction(self):
+        """Test that a transaction commits, or rolls back on errors."""
+        con = self.database.connection()
+        with transaction(con):
+            con.execute("INSERT INTO t VALUES ('a')")
+        with self.assertRaises(ZeroDivisionError):
+            with transaction(con):
+                con.execute("INSERT INTO t VALUES ('b')")
+                1 / 0
+        self.assertEqual(con.execute('SELECT v FROM t').fetchall(), [(u'a', )])
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.emulator import EmulatorServer
+from spinrewriter.emulator import ERRORS
+from spinrewriter.pool import ConnectionPool
+from spinrewriter.transport import FakeTransport
+
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestApiEmulator(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.emulator = ApiEmulator(
+            'foo@bar.com', 'test_api_key', quota=10, frequency=5,
+            clock=self.clock)
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=FakeTransport(self.emulator), validate=False)
+
+    def test_api_quota(self):
+        """Test that api_quota reports counters without using quota."""
+        self.api.text_with_spintax(u'This is my dog.')
+        result = self.api.api_quota()
+        self.assertEqual(result['api_requests_made'], 1)
+        self.assertEqual(result['api_requests_available'], 9)
+        self.assertEqual(
+            result['response'],
+            u'You made 1 API requests in the last 24 hours. '
+            u'9 still available.')
+        self.assertEqual(self.api.api_quota()['api_requests_made'], 1)
+
+    def test_text_with_spintax(self):
+        """Test spintax generation, protected terms and spintax formats."""
+        result = self.api.text_with_spintax(
+            u'My big dog.', protected_terms=[u'big'],
+            spintax_format=Api.SPINTAX_FORMAT.spin_tag)
+        self.assertEqual(
+            result['response'], u'My big [spin]dog|pet|animal[/spin].')
+        self.assertEqual(result['protected_terms'], u'big')
+        self.assertEqual(result['nested_spintax'], u'false')
+        self.assertEqual(result['confidence_level'], u'medium')
+        self.assertEqual(result['api_requests_made'], 1)
+        self.assertEqual(result['api_requests_available'], 9)
+
+    def test_unknown_spintax_format(self):
+        """Test that unknown spintax formats fall back to {|}."""
+        result = self.api.text_with_spintax(
+            u'My dog.', spintax_format='foo')
+        self.assertEqual(result['response'], u'My {dog|pet|animal}.')
+
+    def test_unique_variation(self):
+        """Test that unique_variation picks one of the synonyms."""
+        result = self.api.unique_variation(u'My dog.')
+        self.assertIn(result['response'],
+                      [u'My dog.', u'My pet.', u'My animal.'])
+
+    def test_unique_variation_from_spintax(self):
+        """Test rendering of nested spintax in every format."""
+        for spintax_format, text in [
+            ('{|}', u'{a|{b|c}} d'),
+            ('{~}', u'{a~{b~c}} d'),
+            ('[|]', u'[a|[b|c]] d'),
+            ('[spin]', u'[spin]a|[spin]b|c[/spin][/spin] d'),
+        ]:
+            result = self.api.unique_variation_from_spintax(
+                text, nested_spintax=True, spintax_format=spintax_format)
+            self.assertIn(result['response'], [u'a d', u'b d', u'c d'])
+            self.assertEqual(result['nested_spintax'], u'true')
+
+    def test_invalid_spintax(self):
+        """Test that unbalanced spintax is rejected."""
+        with self.assertRaises(ex.ParamValueError):
+            self.api.unique_variation_from_spintax(u'{a|b')
+
+    def test_new_text_frequency(self):
+        """Test that new text can only be submitted once every N seconds,
+        while already analyzed text can be resubmitted any time."""
+        self.api.text_with_spintax(u'First text.')
+        self.api.unique_variation(u'First text.')
+        self.api.unique_variation_from_spintax(u'{Spun|text}')
+        with self.assertRaises(ex.UsageFrequencyError) as cm:
+            self.api.text_with_spintax(u'Second text.')
+        self.assertEqual(
+            cm.exception.api_error_msg,
+            u'You can only submit entirely new text for analysis once '
+            u'every 5 seconds.')
+
+        self.clock.now += 5
+        self.api.text_with_spintax(u'Second text.')
+
+    def test_quota(self):
+        """Test that requests fail once quota is used up and succeed again
+        after the 24-hour window passes."""
+        self.emulator.quota = 3
+        for i in range(3):
+            self.api.unique_variation_from_spintax(u'{a|b}')
+        with self.assertRaises(ex.QuotaLimitError) as cm:
+            self.api.unique_variation_from_spintax(u'{a|b}')
+        self.assertEqual(
+            cm.exception.api_error_msg,
+            u'API quota exceeded. You can make 3 requests per day.')
+
+        self.clock.now += 24 * 60 * 60
+        self.api.unique_variation_from_spintax(u'{a|b}')
+
+    def test_text_length(self):
+        """Test that too short and too long texts are rejected."""
+        with self.assertRaises(ex.ParamValueError):
+            self.api.text_with_spintax(u' ')
+        with self.assertRaises(ex.ParamValueError):
+            self.api.text_with_spintax(u'word ' * 4001)
+
+    def test_authentication(self):
+        """Test errors for bad credentials."""
+        for email, key, error in [
+            ('', 'test_api_key', ex.MissingParameterError),
+            ('foo@bar.com', '', ex.MissingParameterError),
+            ('bar@foo.com', 'test_api_key', ex.AuthenticationError),
+            ('foo@bar.com', 'bad_key', ex.AuthenticationError),
+        ]:
+            api = Api(email, key, transport=self.api.transport,
+                      validate=False)
+            with self.assertRaises(error):
+                api.unique_variation_from_spintax(u'{a|b}')
+
+        self.emulator.subscription = False
+        with self.assertRaises(ex.AuthenticationError):
+            self.api.unique_variation_from_spintax(u'{a|b}')
+
+    def test_unknown_action(self):
+        """Test that unknown actions are rejected."""
+        response = self.api._send_request((
+            ('email_address', 'foo@bar.com'),
+            ('api_key', 'test_api_key'),
+            ('action', 'foo'),
+        ))
+        with self.assertRaises(ex.UnknownActionError):
+            self.api._raise_error(response)
+
+    def test_injected_errors(self):
+        """Test that every error message the emulator knows is recognized
+        by Api._raise_error."""
+        for name in sorted(ERRORS):
+            self.emulator.inject(name)
+            response = self.api._send_request((
+                ('email_address', 'foo@bar.com'),
+                ('api_key', 'test_api_key'),
+                ('action', 'text_with_spintax'),
+                ('text', 'foo'),
+            ))
+            with self.assertRaises(ex.SpinRewriterApiError) as cm:
+                self.api._raise_error(response)
+            self.assertNotIsInstance(cm.exception, ex.UnknownApiError)
+
+        self.emulator.inject(u'Something else.')
+        with self.assertRaises(ex.UnknownApiError):
+            self.api.text_with_spintax(u'foo')
+
+
+class TestEmulatorServer(unittest.TestCase):
+
+    def test_http(self):
+        """Test that the emulator can be used over HTTP."""
+        emulator = ApiEmulator('foo@bar.com', 'test_api_key')
+        server = EmulatorServer(emulator)
+        server.start()
+        try:
+            transport = ConnectionPool(server.url)
+            api = Api('foo@bar.com', 'test_api_key', transport=transport)
+            self.assertEqual(
+                api.text_with_spintax(u'My über dog.')['response'],
+                u'My über {dog|pet|animal}.')
+            self.assertEqual(api.api_quota()['api_requests_made'], 1)
+            self.assertEqual(transport.created, 1)
+            transport.close()
+        finally:
+            server.stop()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from spinrewriter import Api
 from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ERRORS
+import pickle
 import unittest2 as unittest
 
 
@@ -142,3 +144,33 @@ class TestErrors(unittest.TestCase):
             self.api._raise_error(
                 {'response': 'foo'})
         self.assertEqual(msg, str(cm.exception))
+
+    def test_pickling(self):
+        """Test that exceptions survive pickling, e.g. when they are passed
+        between processes."""
+        error = pickle.loads(pickle.dumps(ex.QuotaLimitError(u'foo')))
+        self.assertIsInstance(error, ex.QuotaLimitError)
+        self.assertEqual(error.api_error_msg, u'foo')
+
+    def test_classify(self):
+        """Test that every message of the emulator is classified under its
+        name and that numbers are extracted."""
+        for name, msg in ERRORS.items():
+            result = ex.classify(msg.format(quota=50, frequency=7).upper())
+            self.assertEqual(result.name, name)
+        result = ex.classify(ERRORS['quota'].format(quota=50))
+        self.assertEqual(result, ('quota', ex.QuotaLimitError, 50, None))
+        result = ex.classify(ERRORS['frequency'].format(frequency=7))
+        self.assertEqual(result, ('frequency', ex.UsageFrequencyError,
+                                  None, 7))
+        self.assertEqual(ex.classify(u'foo').exception, ex.UnknownApiError)
+
+    def test_fields(self):
+        """Test numbers stated in error messages as exception attributes."""
+        self.assertEqual(ex.QuotaLimitError(
+            u'API quota exceeded. You can make 50 requests per day.'
+        ).daily_quota, 50)
+        self.assertEqual(ex.UsageFrequencyError(
+            u'You can only submit entirely new text for analysis once every '
+            u'5 seconds.').seconds, 5)
+        self.assertIsNone(ex.UsageFrequencyError(u'foo').seconds)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.jobs import Job
+from spinrewriter.jobs import JobQueue
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.tests.test_batch import spin
+from spinrewriter.transport import FakeTransport
+
+import os
+import shutil
+import tempfile
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'jobs.db')
+        self.clock = Clock()
+        self.queue = self.open()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def open(self):
+        return JobQueue(self.path, clock=self.clock, sleep=self.clock.sleep)
+
+    def spin(self, text):
+        self.calls.append(text)
+        return spin(text)
+
+    def test_add(self):
+        """Test that texts are keyed by position or given keys and that
+        adding them again adds nothing."""
+        self.assertEqual(self.queue.add(['a', u'č', ('x', 'c')]), 3)
+        self.assertEqual(self.queue.add(['a', u'č', ('x', 'c'), 'd']), 1)
+        self.assertEqual(len(self.queue), 4)
+        self.assertEqual(self.queue.add(str(i) for i in range(1001)), 998)
+        self.assertEqual(
+            [(job.key, job.text) for job in self.queue.results(
+                (JobQueue.PENDING, ))][:4],
+            [(u'0', u'a'), (u'1', u'č'), (u'x', u'c'), (u'3', u'd')])
+
+    def test_run(self):
+        """Test that outcomes are recorded and replayed in order."""
+        self.queue.PAGE = 2
+        self.queue.add(['a', 'fail', 'c', 'd', 'e'])
+        self.assertEqual(self.queue.run(self.spin, workers=2),
+                         {'pending': 0, 'done': 4, 'failed': 1})
+        self.assertEqual(list(self.queue.results())[:2], [
+            Job(u'0', u'a', 'done', u'A', None, None),
+            Job(u'1', u'fail', 'failed', None, u'fail', u'ParamValueError'),
+        ])
+        self.assertEqual(len(list(self.queue.results())), 5)
+
+    def test_resume(self):
+        """Test that a reopened queue does not process finished texts
+        again, unless asked to retry failed ones."""
+        self.queue.add(['a', 'fail'])
+        self.queue.run(self.spin)
+        queue = self.open()
+        queue.add(['a', 'fail', 'c'])
+        queue.run(self.spin)
+        self.assertEqual(sorted(self.calls), ['a', 'c', 'fail'])
+        queue.run(self.spin, retry_failed=True)
+        self.assertEqual(self.calls.count('fail'), 2)
+        self.assertEqual(self.queue.counts()['failed'], 1)
+
+    def test_retry_quota(self):
+        """Test that failed texts retried during a quota hold are not
+        dropped."""
+        self.queue.add(['fail', 'b'])
+        self.queue.run(self.spin)
+        quota = [ex.QuotaLimitError('quota')]
+
+        def func(text):
+            if quota:
+                raise quota.pop()
+            return text.upper()
+
+        self.assertEqual(
+            self.queue.run(func, workers=1, block=True, retry_failed=True),
+            {'pending': 0, 'done': 2, 'failed': 0})
+        self.assertEqual(self.clock.slept, [15 * 60])
+
+    def test_quota(self):
+        """Test that the queue is held when the quota runs out and resumes
+        once it frees up."""
+        emulator = ApiEmulator('foo@bar.com', 'test_api_key', quota=2,
+                               frequency=0, clock=self.clock)
+        transport = FakeTransport(emulator)
+        api = Api('foo@bar.com', 'test_api_key', transport=transport)
+
+        def func(text):
+            return api.unique_variation(text)['response']
+
+        self.queue.add(u'My dog {0}.'.format(i) for i in range(20))
+        self.assertEqual(self.queue.run(func, workers=1),
+                         {'pending': 18, 'done': 2, 'failed': 0})
+        self.assertEqual(self.queue.held_until, 1000.0 + 15 * 60)
+
+        # held, nothing is sent
+        sent = len(transport.requests)
+        self.assertEqual(self.queue.run(func)['pending'], 18)
+        self.assertEqual(len(transport.requests), sent)
+
+        # wait out the hold
+        emulator.quota = 20
+        self.assertEqual(self.queue.run(func, block=True),
+                         {'pending': 0, 'done': 20, 'failed': 0})
+        self.assertEqual(self.clock.slept, [15 * 60])
+        self.assertIsNone(self.queue.held_until)
+
+    def test_quota_tracker(self):
+        """Test that the queue is held until the tracker's next free slot."""
+        quota = QuotaTracker(clock=self.clock)
+        emulator = ApiEmulator('foo@bar.com', 'test_api_key', quota=1,
+                               frequency=0, clock=self.clock)
+        api = Api('foo@bar.com', 'test_api_key', quota=quota,
+                  transport=FakeTransport(emulator))
+
+        def func(text):
+            return api.unique_variation(text)['response']
+
+        self.queue.add([u'My dog.', u'My cat.'])
+        self.clock.now += 10
+        self.queue.run(func, workers=1, quota=quota)
+        self.assertEqual(self.queue.held_until, 1010.0 + quota.WINDOW)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.microbatch import MicroBatcher
+from spinrewriter.transport import FakeTransport
+
+import mock
+import threading
+import unittest2 as unittest
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key', frequency=0)
+        self.transport = FakeTransport(self.emulator)
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport)
+        self.texts = [u'My dog.', u' My cat is big.\n', u'My house.']
+        self.expected = [u'My {dog|pet|animal}.',
+                         u' My cat is {big|large|huge}.\n', u'My house.']
+
+    def submit(self, batcher, texts):
+        """Submit texts from concurrent threads and collect the outcomes."""
+        outcomes = [None] * len(texts)
+
+        def call(i):
+            try:
+                outcomes[i] = batcher.text_with_spintax(texts[i])
+            except Exception as error:
+                outcomes[i] = error
+
+        threads = [threading.Thread(target=call, args=(i, ))
+                   for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_batch(self):
+        """Test that texts are sent in one request with protected sentinels
+        and the response is split back."""
+        batcher = MicroBatcher(self.api, window=10, max_texts=3,
+                               protected_terms=[u'cat'])
+        self.assertEqual(self.submit(batcher, self.texts), self.expected)
+        self.assertEqual(len(self.transport.requests), 1)
+        request = self.transport.requests[0]
+        self.assertEqual(request['protected_terms'],
+                         'cat\nSPNRWRTR0SEP\nSPNRWRTR1SEP')
+        self.assertEqual(request['text'].count('\n\nSPNRWRTR'), 2)
+        self.assertEqual((batcher.batches, batcher.fallbacks), (1, 0))
+
+    def test_window(self):
+        """Test that a lone text is sent by itself once the window passes."""
+        batcher = MicroBatcher(self.api, window=0.001)
+        self.assertEqual(batcher.text_with_spintax(u'My dog.'),
+                         u'My {dog|pet|animal}.')
+        self.assertEqual(self.transport.requests[0]['text'], 'My dog.')
+        self.assertEqual(batcher.batches, 0)
+
+    def test_max_words(self):
+        """Test that batches stay under the word limit, and that long and
+        empty texts are sent alone."""
+        batcher = MicroBatcher(self.api, window=10, max_words=6)
+        texts = [u'One two three four five six.', u'']
+        outcomes = self.submit(batcher, texts)
+        self.assertEqual(outcomes[0], texts[0])
+        self.assertIsInstance(outcomes[1], ex.ParamValueError)
+
+        batcher = MicroBatcher(self.api, window=0.2, max_words=6)
+        outcomes = self.submit(batcher, [u'My dog is big.', u'My dog.'])
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_mangled(self):
+        """Test that texts are sent one by one when a sentinel is changed."""
+        spin = self.emulator.spin
+
+        def mangle(text, *args):
+            return spin(text, *args).replace(u'SPNRWRTR1SEP', u'SPNRWRTR1')
+
+        batcher = MicroBatcher(self.api, window=10, max_texts=3)
+        with mock.patch.object(self.emulator, 'spin', mangle):
+            self.assertEqual(self.submit(batcher, self.texts), self.expected)
+        self.assertEqual(len(self.transport.requests), 4)
+        self.assertEqual((batcher.batches, batcher.fallbacks), (1, 1))
+
+    def test_invalid_spintax(self):
+        """Test that texts are sent one by one when a sentinel ends up inside
+        spintax."""
+        spin = self.emulator.spin
+
+        def mangle(text, *args):
+            return spin(text, *args).replace(
+                u'\n\nSPNRWRTR0SEP', u'{a|\n\nSPNRWRTR0SEP\n\nb}')
+
+        batcher = MicroBatcher(self.api, window=10, max_texts=2)
+        with mock.patch.object(self.emulator, 'spin', mangle):
+            self.submit(batcher, self.texts[:2])
+        self.assertEqual(len(self.transport.requests), 3)
+        self.assertEqual(batcher.fallbacks, 1)
+
+    def test_error(self):
+        """Test that every text of a failed batch gets the error of its
+        request, which is not sent again."""
+        self.emulator.inject('rewrite_failed')
+        batcher = MicroBatcher(self.api, window=10, max_texts=3)
+        outcomes = self.submit(batcher, self.texts)
+        self.assertIsInstance(outcomes[0], ex.InternalApiError)
+        self.assertEqual(outcomes, [outcomes[0]] * 3)
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual((batcher.batches, batcher.fallbacks), (1, 0))
+
+    def test_fallback_error(self):
+        """Test that texts sent one by one get their own outcomes."""
+        spin = self.emulator.spin
+
+        def mangle(text, *args):
+            if not self.emulator.requests:
+                self.emulator.inject('rewrite_failed')  # the first text
+            return spin(text, *args).replace(u'SPNRWRTR1SEP', u'SPNRWRTR1')
+
+        batcher = MicroBatcher(self.api, window=10, max_texts=3)
+        with mock.patch.object(self.emulator, 'spin', mangle):
+            outcomes = self.submit(batcher, self.texts)
+        self.assertIsInstance(outcomes[0], ex.InternalApiError)
+        self.assertEqual(outcomes[1:], self.expected[1:])
+        self.assertEqual(batcher.fallbacks, 1)
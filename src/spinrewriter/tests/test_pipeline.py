@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import batch
+from spinrewriter import pipeline
+from spinrewriter.tests.test_batch import EmulatedRewriter
+from spinrewriter.tests.test_batch import spin
+from StringIO import StringIO
+
+import json
+import mock
+import os
+import shutil
+import tempfile
+import unittest2 as unittest
+
+
+class TestRead(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'corpus.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_file(self):
+        """Test reading records and plain texts from a memory-mapped file."""
+        with open(self.path, 'w') as f:
+            f.write('{"id": 1, "text": "My dog."}\n\n"My cat."\n')
+        self.assertEqual(list(pipeline.read(self.path)), [
+            {u'id': 1, u'text': u'My dog.'}, {u'text': u'My cat.'}])
+
+    def test_empty_file(self):
+        """Test that empty files, which cannot be mapped, have no records."""
+        open(self.path, 'w').close()
+        self.assertEqual(list(pipeline.read(self.path)), [])
+
+    def test_stdin(self):
+        """Test reading from stdin."""
+        with mock.patch('sys.stdin', StringIO('{"body": "My dog."}\n')):
+            self.assertEqual(list(pipeline.read('-', field='body')),
+                             [{u'body': u'My dog.'}])
+
+    def test_iterable(self):
+        """Test reading records and JSON lines of any string type from an
+        iterable."""
+        self.assertEqual(
+            list(pipeline.read(
+                [{'text': 'a'}, u'"b"', u' \n', '{"text": 1}'])),
+            [{'text': 'a'}, {'text': u'b'}, {'text': 1}])
+
+    def test_not_a_record(self):
+        """Test that bare texts and other values are rejected."""
+        with self.assertRaises(ValueError):
+            list(pipeline.read([u'My dog.']))
+        with self.assertRaises(ValueError):
+            list(pipeline.read(['5']))
+
+
+class TestProcess(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.out = StringIO()
+
+    def lines(self):
+        return [json.loads(line) for line in self.out.getvalue().splitlines()]
+
+    def test_process(self):
+        """Test that results and errors are written in input order, keeping
+        all other fields of the records."""
+        records = [{'id': 1, 'text': 'a'}, {'id': 2, 'text': 'fail'}]
+        self.assertEqual(pipeline.process(records, spin, self.out), (2, 1))
+        self.assertEqual(self.lines(), [
+            {u'id': 1, u'text': u'a', u'spun': u'A'},
+            {u'id': 2, u'text': u'fail', u'error': u'fail',
+             u'error_type': u'ParamValueError'},
+        ])
+
+    def test_dedup(self):
+        """Test that repeated texts are processed once."""
+        stats = batch.DedupStats()
+        records = pipeline.read([{'text': t} for t in u'aba'])
+        self.assertEqual(pipeline.process(
+            records, spin, self.out, result_field='out', ordered=False,
+            dedup=True, stats=stats), (3, 0))
+        self.assertEqual(sorted(r['out'] for r in self.lines()),
+                         [u'A', u'A', u'B'])
+        self.assertEqual(stats.saved, 1)
+
+    def test_bounded(self):
+        """Test that only a bounded number of records is read ahead of the
+        results written."""
+        read = []
+
+        def records():
+            for i in range(100):
+                read.append(i)
+                yield {'text': str(i)}
+
+        class Out(object):
+            ahead = []
+
+            def write(self, data):
+                if data != '\n':
+                    self.ahead.append(len(read) - len(self.ahead))
+
+            def flush(self):
+                pass
+
+        out = Out()
+        pipeline.process(records(), spin, out, workers=2)
+        self.assertEqual(len(out.ahead), 100)
+        self.assertLessEqual(max(out.ahead), 6)
+
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tmpdir, 'in.jsonl')
+        self.output = os.path.join(self.tmpdir, 'out.jsonl')
+        with open(self.input, 'w') as f:
+            f.write('{"text": "My dog is big."}\n"My dog is big."\n')
+        patcher = mock.patch('spinrewriter.pipeline.SpinRewriter',
+                             EmulatedRewriter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('sys.stderr', StringIO())
+        self.stderr = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_main(self):
+        """Test spinning a file into another file."""
+        status = pipeline.main([
+            self.input, '-o', self.output, '--email', 'foo@bar.com',
+            '--api-key', 'test_api_key', '--action', 'text_with_spintax',
+            '--dedup'])
+        self.assertEqual(status, 0)
+        with open(self.output) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line['spun'] for line in lines],
+                         [u'My {dog|pet|animal} is {big|large|huge}.'] * 2)
+        self.assertEqual(self.stderr.getvalue(),
+                         '2 texts processed, 0 failed, 1 calls saved\n')
+
+    def test_confidence_level(self):
+        """Test that the confidence level is sent for both actions."""
+        rewriters = []
+
+        def factory(*args):
+            rewriters.append(EmulatedRewriter(*args))
+            return rewriters[-1]
+
+        for action in ('unique_variation', 'text_with_spintax'):
+            with mock.patch('spinrewriter.pipeline.SpinRewriter', factory):
+                pipeline.main([
+                    self.input, '-o', self.output, '--email', 'foo@bar.com',
+                    '--api-key', 'test_api_key', '--action', action,
+                    '--confidence-level', 'high', '--workers', '1'])
+            requests = rewriters[-1].api.transport.requests
+            self.assertEqual(
+                [(r['action'], r['confidence_level'], r['protected_terms'])
+                 for r in requests], [(action, 'high', '')] * 2)
+
+    def test_failures(self):
+        """Test that the exit status tells about failed texts."""
+        with open(self.input, 'a') as f:
+            f.write('""\n')
+        out = StringIO()
+        with mock.patch.dict(os.environ, {
+                'SPINREWRITER_EMAIL': 'foo@bar.com',
+                'SPINREWRITER_API_KEY': 'test_api_key'}):
+            self.assertEqual(pipeline.main([self.input], out=out), 1)
+        self.assertFalse(out.closed)
+        self.assertEqual(self.stderr.getvalue(),
+                         '3 texts processed, 1 failed\n')
+        self.assertEqual(json.loads(out.getvalue().splitlines()[2]), {
+            u'text': u'', u'error': u'Original text too short.',
+            u'error_type': u'ParamValueError'})
+
+    def test_stdout(self):
+        """Test writing to stdout."""
+        with mock.patch('sys.stdout', StringIO()) as stdout:
+            pipeline.main([self.input, '--email', 'foo@bar.com',
+                           '--api-key', 'test_api_key'])
+        self.assertEqual(len(stdout.getvalue().splitlines()), 2)
+
+    def test_credentials(self):
+        """Test that credentials are required."""
+        with mock.patch.dict(os.environ, clear=True):
+            with self.assertRaises(SystemExit):
+                pipeline.main([self.input])
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+from BaseHTTPServer import BaseHTTPRequestHandler
+from BaseHTTPServer import HTTPServer
+from spinrewriter.pool import ConnectionPool
+from SocketServer import ThreadingMixIn
+
+import httplib
+import mock
+import Queue
+import socket
+import threading
+import time
+import unittest2 as unittest
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that echoes back the POSTed body."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.ports.add(self.client_address[1])
+        self.server.bodies.append(body)
+        if body == 'slow':
+            time.sleep(0.5)
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        if body == 'close':
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        """Clients that drop connections on purpose are not errors."""
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        """Start a local keep-alive HTTP server."""
+        self.server = Server(('127.0.0.1', 0), EchoHandler)
+        self.server.ports = set()
+        self.server.bodies = []
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01, ))
+        thread.daemon = True
+        thread.start()
+        self.url = 'http://127.0.0.1:{0}/action/api'.format(
+            self.server.server_address[1])
+        self.pool = ConnectionPool(self.url, maxsize=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_init(self):
+        """Test that URL is split into its components."""
+        self.assertEqual(self.pool.scheme, 'http')
+        self.assertEqual(self.pool.host, '127.0.0.1')
+        self.assertEqual(self.pool.path, '/action/api')
+        self.assertEqual(self.pool.maxsize, 2)
+
+    def test_https_connection(self):
+        """Test that https URLs get HTTPS connections."""
+        pool = ConnectionPool('https://example.com')
+        self.assertEqual(pool.path, '/')
+        self.assertIsInstance(
+            pool._new_connection(), httplib.HTTPSConnection)
+
+    def test_timeout(self):
+        """Test that sockets get the given timeout, or the default one."""
+        pool = ConnectionPool(self.url, timeout=3)
+        con = pool._new_connection()
+        con.connect()
+        self.assertEqual(con.sock.gettimeout(), 3)
+        con.close()
+
+        self.addCleanup(socket.setdefaulttimeout, socket.getdefaulttimeout())
+        socket.setdefaulttimeout(5)
+        con = self.pool._new_connection()
+        con.connect()
+        self.assertEqual(con.sock.gettimeout(), 5)
+        con.close()
+
+    def test_connection_reused(self):
+        """Test that sequential requests reuse a single socket."""
+        for i in range(5):
+            self.assertEqual(self.pool.post('foo={0}'.format(i)),
+                             'foo={0}'.format(i))
+        self.assertEqual(self.pool.created, 1)
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_concurrent_requests(self):
+        """Test that concurrent threads each get their own connection and
+        that only ``maxsize`` of them are kept afterwards."""
+        results = []
+        barrier = threading.Semaphore(0)
+
+        def worker(i):
+            barrier.acquire()
+            results.append(self.pool.post(str(i)))
+
+        threads = [threading.Thread(target=worker, args=(i, ))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            barrier.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['0', '1', '2', '3'])
+        self.assertLessEqual(self.pool._idle.qsize(), 2)
+
+    def test_server_closed_connection(self):
+        """Test that a connection closed by the server is not reused."""
+        self.assertEqual(self.pool.post('close'), 'close')
+        self.assertEqual(self.pool._idle.qsize(), 0)
+        self.pool.post('foo')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_stale_connection_detected(self):
+        """Test that a socket closed while idle is replaced before use."""
+        self.pool.post('foo')
+        con, _ = self.pool._idle.queue[0]
+        con.sock.shutdown(socket.SHUT_RD)
+        self.assertEqual(self.pool.post('bar'), 'bar')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_idle_timeout(self):
+        """Test that connections idle for too long are discarded."""
+        self.pool.max_idle = -1
+        self.pool.post('foo')
+        self.pool.post('bar')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_is_stale(self):
+        """Test staleness checks on unconnected and broken connections."""
+        con = mock.Mock(sock=None)
+        self.assertFalse(self.pool._is_stale(con, float('inf')))
+
+        with mock.patch('spinrewriter.pool.select.select') as select:
+            select.side_effect = ValueError
+            self.assertTrue(self.pool._is_stale(mock.Mock(), float('inf')))
+
+    def test_retry_on_dropped_connection(self):
+        """Test that a request failing on a reused connection is retried
+        once on a fresh one."""
+        self.pool.post('foo')
+        con, _ = self.pool._idle.queue[0]
+        with mock.patch.object(self.pool, '_is_stale', return_value=False):
+            con.sock.close()
+            self.assertEqual(self.pool.post('bar'), 'bar')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_retry_on_closed_without_response(self):
+        """Test that a request on a reused connection the server closed
+        without responding is retried, but not one that got a garbled
+        status line."""
+        self.pool.post('foo')
+        con, _ = self.pool._idle.queue[0]
+        with mock.patch.object(con, 'getresponse',
+                               side_effect=httplib.BadStatusLine('')):
+            self.assertEqual(self.pool.post('bar'), 'bar')
+        self.assertEqual(self.pool.created, 2)
+
+        con, _ = self.pool._idle.queue[0]
+        with mock.patch.object(con, 'getresponse',
+                               side_effect=httplib.BadStatusLine('foo')):
+            with self.assertRaises(httplib.BadStatusLine):
+                self.pool.post('baz')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_no_retry_on_timeout(self):
+        """Test that a request timing out on a reused connection is not sent
+        again, as the server may have processed it."""
+        self.pool.timeout = 0.1
+        self.pool.post('foo')
+        with self.assertRaises(socket.timeout):
+            self.pool.post('slow')
+        self.assertEqual(self.server.bodies, ['foo', 'slow'])
+        self.assertEqual(self.pool.created, 1)
+
+        self.pool.post('foo')
+        con, _ = self.pool._idle.queue[0]
+        with mock.patch.object(con, 'request', side_effect=socket.timeout):
+            with self.assertRaises(socket.timeout):
+                self.pool.post('bar')
+        self.assertEqual(self.pool.created, 2)
+
+    def test_no_retry_on_fresh_connection(self):
+        """Test that errors on fresh connections are raised."""
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertRaises(socket.error):
+            self.pool.post('foo')
+        self.assertEqual(self.pool._idle.qsize(), 0)
+
+    def test_pool_full(self):
+        """Test that surplus connections are closed instead of pooled."""
+        con = mock.Mock()
+        self.pool._idle = Queue.LifoQueue(1)
+        self.pool._put(mock.Mock())
+        self.pool._put(con)
+        con.close.assert_called_once_with()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.transport import FakeTransport
+
+import mock
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestQuotaTracker(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.tracker = QuotaTracker(clock=self.clock, sleep=self.clock.sleep)
+
+    def response(self, made, available, status='OK'):
+        return {'status': status, 'api_requests_made': made,
+                'api_requests_available': available}
+
+    def test_unknown(self):
+        """Test that requests go through while quota is not known."""
+        self.assertIsNone(self.tracker.remaining)
+        self.tracker.acquire()
+        self.tracker.acquire()
+        self.assertEqual(self.tracker.in_flight, 2)
+
+    def test_update(self):
+        """Test that counters are taken from responses."""
+        self.tracker.update(self.response(3, 7))
+        self.assertEqual(self.tracker.made, 3)
+        self.assertEqual(self.tracker.remaining, 7)
+        self.assertEqual(list(self.tracker.requests), [1000.0])
+
+        self.tracker.update(self.response(3, 7), counted=False)
+        self.tracker.update(self.response(3, 7, 'ERROR'))
+        self.assertEqual(len(self.tracker.requests), 1)
+
+    def test_quota_error(self):
+        """Test that quota errors mark the quota as used up."""
+        self.tracker.update({'status': 'ERROR', 'response': 'Foo.'})
+        self.assertIsNone(self.tracker.remaining)
+        self.tracker.update({
+            'status': 'ERROR',
+            'response': 'API quota exceeded. '
+                        'You can make 5 requests per day.'})
+        self.assertEqual(self.tracker.remaining, 0)
+        self.tracker.reset()
+        self.assertIsNone(self.tracker.remaining)
+
+    def test_in_flight(self):
+        """Test that requests in flight are reserved."""
+        self.tracker.update(self.response(8, 2))
+        self.tracker.acquire()
+        self.tracker.acquire()
+        self.assertEqual(self.tracker.remaining, 0)
+        with self.assertRaises(ex.QuotaLimitError) as cm:
+            self.tracker.acquire()
+        self.assertEqual(cm.exception.api_error_msg, QuotaTracker.EXHAUSTED)
+
+        self.tracker.release()
+        self.tracker.acquire()
+
+    def test_rolling_window(self):
+        """Test that slots are given back after 24 hours."""
+        self.tracker.update(self.response(9, 1))
+        self.clock.now += 60
+        self.tracker.update(self.response(10, 0))
+        self.assertEqual(self.tracker.remaining, 0)
+
+        self.clock.now += QuotaTracker.WINDOW - 60
+        self.assertEqual(self.tracker.remaining, 1)
+        self.assertEqual(self.tracker.made, 9)
+        self.clock.now += 60
+        self.assertEqual(self.tracker.remaining, 2)
+
+    def test_block(self):
+        """Test that a blocking tracker waits for the oldest request to fall
+        out of the window."""
+        self.tracker.block = True
+        self.tracker.update(self.response(1, 0))
+        self.clock.now += 100
+        self.tracker.acquire()
+        self.assertEqual(self.clock.slept, [QuotaTracker.WINDOW - 100])
+
+    def test_block_unknown_reset(self):
+        """Test that a blocking tracker probes the API periodically when it
+        does not know when the quota frees up."""
+        self.tracker.block = True
+        self.tracker.update({
+            'status': 'ERROR',
+            'response': 'API quota exceeded. '
+                        'You can make 5 requests per day.'})
+        self.tracker.acquire()
+        self.assertEqual(self.clock.slept, [15 * 60])
+
+        # while the probe is in flight, others wait for the next one
+        self.tracker.acquire()
+        self.assertEqual(self.clock.slept, [15 * 60] * 2)
+        self.assertEqual(self.tracker.in_flight, 2)
+
+        # an answer ends probing, the next probe waits a full interval
+        self.tracker.update(self.response(5, 0, 'ERROR'))
+        self.tracker.release()
+        self.tracker.release()
+        slept = []
+
+        def sleep(seconds):  # woken up early
+            slept.append(seconds)
+            self.clock.now += min(seconds, 10 * 60)
+
+        self.tracker.sleep = sleep
+        self.tracker.acquire()
+        self.assertEqual(slept, [15 * 60, 5 * 60])
+
+
+class TestApiQuota(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key', quota=2)
+        self.transport = FakeTransport(self.emulator)
+        self.api = Api('foo@bar.com', 'test_api_key', transport=self.transport,
+                       quota=QuotaTracker())
+
+    def test_fail_fast(self):
+        """Test that requests over quota fail without reaching the API."""
+        self.api.unique_variation_from_spintax(u'{a|b}')
+        self.assertEqual(self.api.quota.remaining, 1)
+        self.api.unique_variation_from_spintax(u'{a|b}')
+        with self.assertRaises(ex.QuotaLimitError):
+            self.api.unique_variation_from_spintax(u'{a|b}')
+        self.assertEqual(len(self.transport.requests), 2)
+
+        self.api.api_quota()
+        self.assertEqual(self.api.quota.remaining, 0)
+        self.assertEqual(len(self.api.quota.requests), 2)
+
+    def test_transport_error(self):
+        """Test that failed requests give back their reservation."""
+        with mock.patch.object(self.transport, 'post') as post:
+            post.side_effect = IOError
+            with self.assertRaises(IOError):
+                self.api.api_quota()
+            with self.assertRaises(IOError):
+                self.api.unique_variation_from_spintax(u'{a|b}')
+        self.assertEqual(self.api.quota.in_flight, 0)
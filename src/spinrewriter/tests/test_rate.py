@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.cache import LRUCache
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.rate import RateScheduler
+from spinrewriter.rate import text_key
+from spinrewriter.transport import FakeTransport
+
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+FREQUENCY_ERROR = {
+    'status': 'ERROR',
+    'response': 'You can only submit entirely new text for analysis once '
+                'every 5 seconds.',
+}
+
+
+class TestRateScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.scheduler = RateScheduler(
+            clock=self.clock, sleep=self.clock.sleep)
+
+    def test_text_key(self):
+        """Test that unicode and utf-8 encoded text have the same key."""
+        self.assertEqual(text_key(u'über'), text_key(u'über'.encode('utf-8')))
+        self.assertEqual(len(text_key('foo')), 20)
+
+    def test_unknown_interval(self):
+        """Test that nothing is delayed until the interval is known."""
+        self.scheduler.wait('a')
+        self.scheduler.wait('b')
+        self.assertEqual(self.clock.slept, [])
+
+    def test_learn_interval(self):
+        """Test that the interval is learned from frequency errors."""
+        self.scheduler.wait('a')
+        self.assertTrue(self.scheduler.update('a', FREQUENCY_ERROR))
+        self.assertEqual(self.scheduler.interval, 5)
+
+        self.scheduler.wait('a')
+        self.scheduler.wait('b')
+        self.assertEqual(self.clock.slept, [5, 5])
+
+    def test_given_interval(self):
+        """Test spacing of new texts with a preset interval."""
+        self.scheduler.interval = 3
+        self.scheduler.wait('a')
+        self.clock.now += 1
+        self.scheduler.wait('b')
+        self.clock.now += 10
+        self.scheduler.wait('c')
+        self.assertEqual(self.clock.slept, [2])
+
+    def test_known_texts(self):
+        """Test that texts already analyzed are not delayed."""
+        self.scheduler.interval = 3
+        self.scheduler.known_texts = 1
+        self.scheduler.wait('a')
+        self.assertFalse(self.scheduler.update('a', {'status': 'OK'}))
+        self.scheduler.wait('a')
+        self.assertEqual(self.clock.slept, [])
+
+        self.scheduler.update('b', {'status': 'OK'})
+        self.scheduler.update('b', {'status': 'OK'})
+        self.scheduler.wait('a')
+        self.assertEqual(self.clock.slept, [3])
+
+    def test_other_errors(self):
+        """Test that other errors are not retried."""
+        self.assertFalse(self.scheduler.update(
+            'a', {'status': 'ERROR', 'response': 'Original text too short.'}))
+
+
+class TestApiScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key',
+                                    frequency=5, clock=self.clock)
+        self.transport = FakeTransport(self.emulator)
+        self.scheduler = RateScheduler(
+            clock=self.clock, sleep=self.clock.sleep)
+        self.api = Api('foo@bar.com', 'test_api_key', transport=self.transport,
+                       scheduler=self.scheduler)
+
+    def test_no_errors_surfaced(self):
+        """Test that frequency errors are absorbed by waiting."""
+        for i in range(5):
+            self.api.text_with_spintax(u'Text number {0}.'.format(i))
+        self.assertEqual(self.clock.slept, [5, 5, 5, 5])
+        self.assertEqual(len(self.transport.requests), 6)
+
+    def test_not_delayed(self):
+        """Test that spintax, quota and known texts are not delayed."""
+        self.scheduler.interval = 5
+        self.api.text_with_spintax(u'My dog.')
+        self.api.unique_variation(u'My dog.')
+        self.api.unique_variation_from_spintax(u'{a|b}')
+        self.api.api_quota()
+        self.assertEqual(self.clock.slept, [])
+
+    def test_cache_hits_not_delayed(self):
+        """Test that cache hits do not wait for a slot."""
+        self.api.cache = LRUCache()
+        self.scheduler.interval = 5
+        self.api.text_with_spintax(u'My dog.')
+        self.api.text_with_spintax(u'My cat.')
+        self.api.text_with_spintax(u'My dog.')
+        self.assertEqual(self.clock.slept, [5])
+
+    def test_max_retries(self):
+        """Test that the error is raised after max_retries attempts."""
+        self.scheduler.max_retries = 2
+        self.scheduler.sleep = lambda seconds: None
+        self.api.text_with_spintax(u'First.')
+        with self.assertRaises(ex.UsageFrequencyError):
+            self.api.text_with_spintax(u'Second.')
+        self.assertEqual(len(self.transport.requests), 4)
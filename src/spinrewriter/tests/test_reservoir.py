@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.reservoir import Reservoir
+from spinrewriter.templates import TemplateStore
+from spinrewriter.transport import FakeTransport
+
+import itertools
+import threading
+import time
+import unittest2 as unittest
+
+
+class TestReservoir(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.counter = itertools.count()
+        self.slept = []
+        self.now = 1000.0
+        self.reservoir = self.make(self.func)
+
+    def tearDown(self):
+        self.reservoir.close()
+
+    def make(self, func, **kwargs):
+        return Reservoir(func, size=4, sleep=self.slept.append,
+                         clock=lambda: self.now, **kwargs)
+
+    def func(self, text):
+        return u'{0} {1}'.format(text, next(self.counter))
+
+    def test_get(self):
+        """Test that the first call misses and schedules a fill, and later
+        calls are served from the buffer and refill it when it runs low."""
+        self.assertEqual(self.reservoir.get(u'a', default=u'a'), u'a')
+        self.reservoir.wait()
+        self.assertEqual(len(self.reservoir), 4)
+        self.assertEqual(self.reservoir.get(u'a'), u'a 0')
+        self.assertEqual(self.reservoir.get(u'a'), u'a 1')
+        self.reservoir.wait()
+        self.assertEqual(len(self.reservoir), 4)
+        self.assertEqual([self.reservoir.get(u'a') for i in range(4)],
+                         [u'a 2', u'a 3', u'a 4', u'a 5'])
+        self.assertEqual((self.reservoir.hits, self.reservoir.misses), (6, 1))
+
+    def test_discard(self):
+        """Test that discarded variations are dropped."""
+        self.reservoir.fill(u'a')
+        self.reservoir.wait()
+        self.reservoir.discard(u'a')
+        self.reservoir.discard(u'a')
+        self.assertEqual(len(self.reservoir), 0)
+        self.assertIsNone(self.reservoir.get(u'a'))
+
+    def test_fill_once(self):
+        """Test that a text is not scheduled again while it is filled."""
+        gate = threading.Event()
+
+        def func(text):
+            gate.wait()
+            return self.func(text)
+
+        with self.make(func) as reservoir:
+            reservoir.fill(u'b')
+            reservoir.fill(u'b')
+            gate.set()
+            reservoir.wait()
+            self.assertEqual(len(reservoir), 4)
+            self.assertEqual(next(self.counter), 4)
+
+    def test_error(self):
+        """Test that failed refills are counted and pause the thread."""
+        def func(text):
+            raise ex.InternalApiError(u'foo')
+
+        with self.make(func, pause=5) as reservoir:
+            reservoir.fill(u'a')
+            reservoir.wait()
+            self.assertEqual(reservoir.errors, 1)
+            self.assertIsInstance(reservoir.last_error, ex.InternalApiError)
+        self.assertEqual(self.slept, [5])
+
+    def test_close_pause(self):
+        """Test that pauses after failures block neither wait() nor
+        close()."""
+        def func(text):
+            raise ex.InternalApiError(u'foo')
+
+        start = time.time()
+        reservoir = Reservoir(func, pause=60)
+        reservoir.fill(u'a')
+        reservoir.wait()
+        reservoir.close()
+        self.assertLess(time.time() - start, 10)
+
+    def test_maxtexts(self):
+        """Test that buffers of least recently used texts are dropped."""
+        with self.make(self.func, maxtexts=2) as reservoir:
+            reservoir.fill(u'a')
+            reservoir.fill(u'b')
+            reservoir.wait()
+            reservoir.get(u'a')
+            reservoir.fill(u'c')
+            reservoir.fill(u'd')
+            reservoir.wait()
+            self.assertEqual(len(reservoir), 8)
+            self.assertTrue(reservoir.get(u'c').startswith(u'c '))
+            self.assertIsNone(reservoir.get(u'b'))  # and schedules it
+
+    def test_quota(self):
+        """Test that refills wait for the quota to free up."""
+        quota = QuotaTracker(clock=lambda: self.now)
+        emulator = ApiEmulator('foo@bar.com', 'test_api_key', quota=2,
+                               frequency=0, clock=lambda: self.now)
+        api = Api('foo@bar.com', 'test_api_key', quota=quota,
+                  transport=FakeTransport(emulator))
+
+        def func(text):
+            return api.unique_variation(text)['response']
+
+        with self.make(func, workers=1, quota=quota) as reservoir:
+            reservoir.fill(u'My dog.')
+            reservoir.wait()
+            self.assertEqual(len(reservoir), 2)
+            self.assertIsInstance(reservoir.last_error, ex.QuotaLimitError)
+        self.assertEqual(self.slept, [quota.WINDOW])
+
+    def test_template(self):
+        """Test refilling from a local template."""
+        transport = FakeTransport(
+            ApiEmulator('foo@bar.com', 'test_api_key', frequency=0))
+        store = TemplateStore(Api('foo@bar.com', 'test_api_key',
+                                  transport=transport), track=True)
+        with self.make(store.unique_variation) as reservoir:
+            reservoir.fill(u'My dog is big.')
+            reservoir.wait()
+            variations = set(reservoir.get(u'My dog is big.')
+                             for i in range(3))
+        self.assertEqual(len(variations), 3)
+        self.assertEqual(len(transport.requests), 1)
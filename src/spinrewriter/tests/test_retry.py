@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.quota import QuotaTracker
+from spinrewriter.retry import CircuitBreaker
+from spinrewriter.retry import RetryPolicy
+from spinrewriter.transport import FakeTransport
+from spinrewriter.transport import Transport
+
+import random
+import socket
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FlakyTransport(Transport):
+    """Transport whose first posts fail with the given errors."""
+
+    def __init__(self, transport, errors):
+        self.transport = transport
+        self.errors = list(errors)
+
+    def post(self, body):
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.transport.post(body)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.policy = RetryPolicy(
+            attempts=4, backoff=1, max_backoff=3, rng=random.Random(1),
+            sleep=self.clock.sleep)
+
+    def test_delay(self):
+        """Test that delays are jittered below an exponential bound."""
+        for attempt, bound in [(0, 1), (1, 2), (2, 3), (10, 3)]:
+            delays = [self.policy.delay(attempt) for i in range(100)]
+            self.assertLessEqual(max(delays), bound)
+            self.assertGreater(max(delays), bound * 0.8)
+            self.assertGreater(len(set(delays)), 90)
+
+    def test_call(self):
+        """Test that transient errors are retried until success."""
+        errors = [socket.timeout(), ex.InternalApiError('')]
+
+        def func(value):
+            if errors:
+                raise errors.pop(0)
+            return value
+        self.assertEqual(self.policy.call(func, 'foo'), 'foo')
+        self.assertEqual(len(self.clock.slept), 2)
+
+    def test_give_up(self):
+        """Test that the last error is raised after all attempts."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise ex.UnknownApiError('Foo.')
+        with self.assertRaises(ex.UnknownApiError):
+            self.policy.call(func)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(self.clock.slept), 3)
+
+    def test_permanent_error(self):
+        """Test that other errors are raised right away."""
+        calls = []
+
+        def func():
+            calls.append(1)
+            raise ex.ParamValueError('Foo.')
+        with self.assertRaises(ex.ParamValueError):
+            self.policy.call(func)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.clock.slept, [])
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(
+            threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_open(self):
+        """Test that consecutive failures open the circuit."""
+        self.breaker.failure()
+        self.breaker.success()
+        self.breaker.failure()
+        self.breaker.before()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(ex.CircuitOpenError) as cm:
+            self.breaker.before()
+        self.assertEqual(cm.exception.api_error_msg,
+                         u'Circuit open after 2 consecutive failures.')
+        self.assertEqual(
+            str(cm.exception),
+            u'Too many failed API requests, requests are suspended.')
+
+    def test_half_open(self):
+        """Test that a single trial request decides whether the circuit
+        closes."""
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 10
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.breaker.before()
+        with self.assertRaises(ex.CircuitOpenError):
+            self.breaker.before()
+        self.breaker.failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+        self.clock.now += 10
+        self.breaker.before()
+        self.breaker.success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.before()
+
+    def test_cancel(self):
+        """Test that a cancelled trial lets the next request be the trial."""
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 10
+        self.breaker.before()
+        self.breaker.cancel()
+        self.assertFalse(self.breaker.trial)
+        self.breaker.before()
+        self.assertEqual(self.breaker.state, 'half-open')
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.clock = Clock()
+        self.emulator = ApiEmulator('foo@bar.com', 'test_api_key')
+        self.retry = RetryPolicy(sleep=self.clock.sleep)
+        self.breaker = CircuitBreaker(threshold=3, clock=self.clock)
+
+    def make_api(self, errors=(), **kwargs):
+        self.transport = FakeTransport(self.emulator)
+        return Api('foo@bar.com', 'test_api_key',
+                   transport=FlakyTransport(self.transport, errors), **kwargs)
+
+    def test_retry_transport_errors(self):
+        """Test that network errors are retried."""
+        api = self.make_api([socket.timeout(), socket.error()],
+                            retry=self.retry)
+        self.assertEqual(api.unique_variation(u'My dog.')['status'], 'OK')
+        self.assertEqual(len(self.clock.slept), 2)
+
+    def test_retry_api_errors(self):
+        """Test that internal API errors are retried."""
+        api = self.make_api(retry=self.retry)
+        self.emulator.inject('analysis_failed')
+        self.emulator.inject('rewrite_failed')
+        self.assertEqual(api.text_with_spintax(u'My dog.')['status'], 'OK')
+        self.assertEqual(len(self.transport.requests), 3)
+
+    def test_no_retry(self):
+        """Test that other API errors are neither retried nor counted."""
+        api = self.make_api(retry=self.retry, breaker=self.breaker,
+                            validate=False)
+        with self.assertRaises(ex.ParamValueError):
+            api.text_with_spintax(u'')
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_without_policy(self):
+        """Test that errors are returned as before without a policy."""
+        api = self.make_api()
+        self.emulator.inject('rewrite_failed')
+        with self.assertRaises(ex.InternalApiError):
+            api.text_with_spintax(u'My dog.')
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_circuit_breaker(self):
+        """Test that an open circuit stops requests from being sent."""
+        api = self.make_api([socket.timeout()] * 3, breaker=self.breaker)
+        for i in range(3):
+            with self.assertRaises(socket.timeout):
+                api.api_quota()
+        with self.assertRaises(ex.CircuitOpenError):
+            api.api_quota()
+        self.assertEqual(len(self.transport.requests), 0)
+
+        self.clock.now += self.breaker.reset_timeout
+        api.api_quota()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_circuit_breaker_api_errors(self):
+        """Test that internal API errors count as failures."""
+        api = self.make_api(breaker=self.breaker)
+        self.emulator.inject('rewrite_failed')
+        with self.assertRaises(ex.InternalApiError):
+            api.unique_variation(u'My dog.')
+        self.assertEqual(self.breaker.failures, 1)
+
+    def test_circuit_breaker_quota(self):
+        """Test that requests stopped by the quota tracker or failing with
+        uncounted errors do not leave a half-open circuit stuck."""
+        quota = QuotaTracker(clock=self.clock)
+        api = self.make_api([socket.timeout()] * 3 + [RuntimeError()],
+                            breaker=self.breaker, quota=quota)
+        for i in range(3):
+            with self.assertRaises(socket.timeout):
+                api.unique_variation(u'My dog.')
+        self.clock.now += self.breaker.reset_timeout
+        self.assertEqual(self.breaker.state, 'half-open')
+
+        quota.available = 0
+        with self.assertRaises(ex.QuotaLimitError):
+            api.unique_variation(u'My dog.')
+        self.assertFalse(self.breaker.trial)
+
+        quota.reset()
+        with self.assertRaises(RuntimeError):
+            api.unique_variation(u'My dog.')
+        self.assertFalse(self.breaker.trial)
+
+        api.unique_variation(u'My dog.')
+        self.assertEqual(self.breaker.state, 'closed')
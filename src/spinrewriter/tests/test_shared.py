@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import exceptions as ex
+from spinrewriter.shared import SharedLimits
+
+import mock
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest2 as unittest
+
+
+class Clock(object):
+    """Manually advanced clock, whose sleep() advances the time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def reserve_slots(directory, queue):
+    """Wait for five new-text slots from a separate process."""
+    slept = []
+    scheduler = SharedLimits(directory, 'foo@bar.com', 'key').rate_scheduler(
+        interval=1, clock=lambda: 1000.0, sleep=slept.append)
+    for i in range(5):
+        scheduler.wait('text {0}'.format(i))
+    queue.put(slept)
+
+
+class TestSharedLimits(unittest.TestCase):
+
+    def setUp(self):
+        """Create shared state in a temporary directory."""
+        self.tmpdir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.tmpdir, 'limits')
+        self.clock = Clock()
+        self.limits = SharedLimits(self.directory, 'foo@bar.com', 'key')
+
+    def tearDown(self):
+        self.limits.close()
+        shutil.rmtree(self.tmpdir)
+
+    def other(self, email_address='foo@bar.com'):
+        """Open the same state as another process would."""
+        limits = SharedLimits(self.directory, email_address, 'key')
+        self.addCleanup(limits.close)
+        return limits
+
+    def test_file_per_account(self):
+        """Test that every account gets its own state file."""
+        self.assertEqual(self.other().path, self.limits.path)
+        self.assertNotEqual(self.other('bar@foo.com').path, self.limits.path)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_existing_directory(self):
+        """Test that a directory created by another process meanwhile is not
+        an error."""
+        with mock.patch('os.path.isdir', return_value=False):
+            self.other()
+
+    def test_quota(self):
+        """Test that the quota model is shared between trackers."""
+        first = self.limits.quota_tracker(clock=self.clock)
+        second = self.other().quota_tracker(clock=self.clock)
+        self.assertIsNone(second.remaining)
+
+        first.update({'status': 'OK', 'api_requests_made': 8,
+                      'api_requests_available': 2})
+        self.assertEqual(second.remaining, 2)
+        self.assertEqual(second.made, 8)
+        self.assertEqual(list(second.requests), [1000.0])
+
+        second.acquire()
+        second.release()
+        second.update({'status': 'OK', 'api_requests_made': 9,
+                       'api_requests_available': 1})
+        self.assertEqual(first.remaining, 1)
+        first.acquire()
+        with self.assertRaises(ex.QuotaLimitError):
+            first.acquire()
+
+        self.clock.now += first.WINDOW
+        self.assertEqual(second.remaining, 3)
+        self.assertEqual(len(second.requests), 0)
+
+    def test_quota_window_capacity(self):
+        """Test that only the latest CAPACITY timestamps are kept."""
+        self.limits.CAPACITY = 3
+        tracker = self.limits.quota_tracker(clock=self.clock)
+        for i in range(5):
+            self.clock.now += 1
+            tracker.update({'status': 'OK', 'api_requests_made': i,
+                            'api_requests_available': 10})
+        with tracker._state():
+            self.assertEqual(list(tracker.requests), [1003.0, 1004.0, 1005.0])
+            with self.assertRaises(IndexError):
+                tracker.requests[3]
+
+    def test_scheduler(self):
+        """Test that slots and the learned interval are shared."""
+        first = self.limits.rate_scheduler(
+            clock=self.clock, sleep=self.clock.sleep)
+        second = self.other().rate_scheduler(
+            clock=self.clock, sleep=self.clock.sleep)
+        first.wait('a')
+        self.assertTrue(first.update('a', {
+            'status': 'ERROR',
+            'response': 'You can only submit entirely new text for analysis '
+                        'once every 5 seconds.'}))
+        second.wait('b')
+        self.assertEqual(second.interval, 5)
+        self.assertEqual(self.clock.slept, [5])
+        first.wait('c')
+        self.assertEqual(self.clock.slept, [5, 5])
+
+    def test_processes(self):
+        """Test that processes never get the same slot."""
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=reserve_slots, args=(self.directory, queue))
+            for i in range(4)]
+        for process in processes:
+            process.start()
+        reserve_slots(self.directory, queue)
+        slept = []
+        for i in range(5):
+            slept.extend(queue.get())
+        for process in processes:
+            process.join()
+        self.assertEqual(sorted(slept), range(1, 25))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.singleflight import SingleFlight
+from spinrewriter.transport import FakeTransport
+
+import threading
+import time
+import unittest2 as unittest
+
+
+class GatedTransport(FakeTransport):
+    """FakeTransport whose posts wait until the gate opens."""
+
+    def __init__(self, backend):
+        super(GatedTransport, self).__init__(backend)
+        self.gate = threading.Event()
+
+    def post(self, body):
+        self.gate.wait()
+        return super(GatedTransport, self).post(body)
+
+
+def run_concurrently(flights, count, func, gate):
+    """Call func from count threads at once and collect the outcomes."""
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(func())
+        except Exception as error:
+            outcomes.append(error)
+
+    threads = [threading.Thread(target=call) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    while flights.shared < count - 1:
+        time.sleep(0.001)
+    gate.set()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.flights = SingleFlight()
+        self.gate = threading.Event()
+        self.calls = []
+
+    def test_coalesce(self):
+        """Test that concurrent calls share one call's result."""
+        def func(value):
+            self.calls.append(value)
+            self.gate.wait()
+            return value
+
+        outcomes = run_concurrently(
+            self.flights, 5, lambda: self.flights.do('key', func, 'foo'),
+            self.gate)
+        self.assertEqual(outcomes, ['foo'] * 5)
+        self.assertEqual(self.calls, ['foo'])
+        self.assertEqual(self.flights.shared, 4)
+
+    def test_exception(self):
+        """Test that concurrent calls share one call's exception."""
+        def func():
+            self.calls.append(1)
+            self.gate.wait()
+            raise ex.QuotaLimitError(u'foo')
+
+        outcomes = run_concurrently(
+            self.flights, 3, lambda: self.flights.do('key', func), self.gate)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(set(map(id, outcomes))), 1)
+        self.assertIsInstance(outcomes[0], ex.QuotaLimitError)
+
+    def test_sequential(self):
+        """Test that calls after a call finished run again, as do calls with
+        other keys."""
+        self.assertEqual(self.flights.do('a', lambda: 1), 1)
+        self.assertEqual(self.flights.do('a', lambda: 2), 2)
+        self.assertEqual(self.flights.do('b', lambda x: x, x=3), 3)
+        self.assertEqual(self.flights.shared, 0)
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.transport = GatedTransport(
+            ApiEmulator('foo@bar.com', 'test_api_key'))
+
+    def test_text_with_spintax(self):
+        """Test that identical concurrent calls send one request and every
+        caller gets its own copy of the response."""
+        api = Api('foo@bar.com', 'test_api_key', transport=self.transport)
+        outcomes = run_concurrently(
+            api.flights, 4, lambda: api.text_with_spintax(u'My dog.'),
+            self.transport.gate)
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(outcomes[0]['response'], u'My {dog|pet|animal}.')
+        self.assertEqual(len(set(map(id, outcomes))), 4)
+
+    def test_api_quota(self):
+        """Test that concurrent quota checks are coalesced."""
+        api = Api('foo@bar.com', 'test_api_key', transport=self.transport)
+        outcomes = run_concurrently(
+            api.flights, 3, api.api_quota, self.transport.gate)
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(outcomes[1]['api_requests_available'], 100)
+
+    def test_disabled(self):
+        """Test that coalescing can be turned off."""
+        self.transport.gate.set()
+        api = Api('foo@bar.com', 'test_api_key', transport=self.transport,
+                  coalesce=False)
+        self.assertIsNone(api.flights)
+        api.text_with_spintax(u'My dog.')
+        api.text_with_spintax(u'My dog.')
+        self.assertEqual(len(self.transport.requests), 2)
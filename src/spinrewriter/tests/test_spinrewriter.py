@@ -2,6 +2,8 @@
 from spinrewriter import Api
 from spinrewriter import SpinRewriter
 from spinrewriter import exceptions as ex
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.transport import FakeTransport
 
 import unittest2 as unittest
 import mock
@@ -24,8 +26,8 @@ class TestApi(unittest.TestCase):
         self.assertEquals(self.sr.api_key, 'test_api_key')
         self.assertIsInstance(self.sr.api, Api)
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_unique_variation_default_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_unique_variation_default_call(self, post):
         """Test call of unique_variation() with default values."""
         # mock response from SpinRewriter
         mocked_response = u"""{
@@ -37,7 +39,7 @@ class TestApi(unittest.TestCase):
             "nested_spintax":"false",
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # test call
         self.assertEquals(
@@ -45,8 +47,8 @@ class TestApi(unittest.TestCase):
             'This is my pet.',
         )
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_text_with_spintax_default_call(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_text_with_spintax_default_call(self, post):
         """Test call of text_with_spintax_call() with default values."""
         # mock response from SpinRewriter
         mocked_response = u"""{
@@ -58,7 +60,7 @@ class TestApi(unittest.TestCase):
             "nested_spintax":"false",
             "confidence_level":"medium"
         }"""
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # test call
         self.assertEquals(
@@ -66,21 +68,36 @@ class TestApi(unittest.TestCase):
             'This is my {dog|pet|animal}.',
         )
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_text_with_spintax_error(self, urllib2):
+    def test_confidence_level(self):
+        """Test that confidence_level is sent as the confidence level, not
+        as protected terms."""
+        transport = FakeTransport(
+            ApiEmulator('foo@bar.com', 'test_api_key', frequency=0))
+        self.sr.api.transport = transport
+        self.sr.unique_variation(u'My dog.', 'high')
+        self.sr.text_with_spintax(u'My cat.', 'low')
+        results = list(self.sr.unique_variations([u'My pet.'], 'high'))
+        self.assertIsNone(results[0].error)
+        self.assertEqual(
+            [(r['confidence_level'], r['protected_terms'])
+             for r in transport.requests],
+            [('high', ''), ('low', ''), ('high', '')])
+
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_text_with_spintax_error(self, post):
         # mock response from SpinRewriter
         mocked_response = u"""{"status":"ERROR", "response":"Authentication failed. Unique API key is not valid for this user."}"""  # noqa
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # test call
         with self.assertRaises(ex.AuthenticationError):
             self.sr.text_with_spintax('This is my dog.')
 
-    @mock.patch('spinrewriter.urllib2')
-    def test_unique_variation_error(self, urllib2):
+    @mock.patch('spinrewriter.pool.ConnectionPool.post')
+    def test_unique_variation_error(self, post):
         # mock response from SpinRewriter
         mocked_response = u"""{"status":"ERROR", "response":"Authentication failed. Unique API key is not valid for this user."}"""  # noqa
-        urllib2.urlopen.return_value.read.return_value = mocked_response
+        post.return_value = mocked_response
 
         # test call
         with self.assertRaises(ex.AuthenticationError):
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import spintax
+
+import random
+import unittest2 as unittest
+
+
+class TestParse(unittest.TestCase):
+
+    def test_plain_text(self):
+        """Test that text without spintax is a single literal."""
+        template = spintax.parse(u'Just text | here.')
+        self.assertEqual(template.sequence, (u'Just text | here.', ))
+        self.assertEqual(template.render(), u'Just text | here.')
+
+    def test_structure(self):
+        """Test the parsed structure of nested spintax."""
+        template = spintax.parse(u'a {b|{c|d}e|} f')
+        self.assertEqual(template.sequence, (
+            u'a ',
+            ((u'b', ), (((u'c', ), (u'd', )), u'e'), ()),
+            u' f',
+        ))
+        self.assertIsInstance(template.sequence[1], spintax.Choice)
+
+    def test_all_formats(self):
+        """Test that every format of Api.SPINTAX_FORMAT is supported."""
+        for spintax_format, text in [
+            (Api.SPINTAX_FORMAT.pipe_curly, u'{a|{b|c}} | d'),
+            (Api.SPINTAX_FORMAT.tilde_curly, u'{a~{b~c}} | d'),
+            (Api.SPINTAX_FORMAT.pipe_square, u'[a|[b|c]] | d'),
+            (Api.SPINTAX_FORMAT.spin_tag,
+             u'[spin]a|[spin]b|c[/spin][/spin] | d'),
+        ]:
+            template = spintax.parse(text, spintax_format)
+            self.assertEqual(template.to_spintax(), text)
+            variations = set(template.render() for i in range(100))
+            self.assertEqual(variations, set([u'a | d', u'b | d', u'c | d']))
+
+    def test_convert_format(self):
+        """Test that templates can be serialized into another format."""
+        template = spintax.parse(u'{a|{b|c}} d')
+        self.assertEqual(template.to_spintax(Api.SPINTAX_FORMAT.spin_tag),
+                         u'[spin]a|[spin]b|c[/spin][/spin] d')
+        self.assertEqual(repr(template), "<Template u'{a|{b|c}} d'>")
+
+    def test_unicode(self):
+        """Test spintax with non-ascii characters."""
+        template = spintax.parse(u'{über|čez} alles')
+        self.assertIn(template.render(), [u'über alles', u'čez alles'])
+
+    def test_seeded_rendering(self):
+        """Test that rendering is reproducible with a seeded generator."""
+        template = spintax.parse(u'{a|b|c}{d|e|f}{g|h|i}')
+        self.assertEqual(
+            [template.render(random.Random(42)) for i in range(3)],
+            [template.render(random.Random(42))] * 3)
+
+    def test_errors(self):
+        """Test that unbalanced spintax and unknown formats are rejected."""
+        for text in [u'{a|b', u'a|b}', u'{a|{b}']:
+            with self.assertRaises(spintax.SpintaxError):
+                spintax.parse(text)
+        with self.assertRaises(ValueError):
+            spintax.parse(u'[spin]a|b[/spin', Api.SPINTAX_FORMAT.spin_tag)
+        with self.assertRaises(spintax.SpintaxError):
+            spintax.parse(u'a', u'<|>')
+
+
+class TestVariations(unittest.TestCase):
+
+    def test_count(self):
+        """Test counting of variations, including nested groups."""
+        for text, count in [
+            (u'plain text', 1),
+            (u'{a|b}', 2),
+            (u'{a|b} {c|d|e}', 6),
+            (u'{a|{b|c}|}', 4),
+            (u'{a|{b|c} {d|e}}', 5),
+            (u'{a {b|c}|d}{e|f}', 6),
+        ]:
+            self.assertEqual(spintax.parse(text).count, count)
+
+    def test_big_count(self):
+        """Test that counts are exact for huge variation spaces."""
+        template = spintax.parse(u'{a|b|c} ' * 100)
+        self.assertEqual(template.count, 3 ** 100)
+        self.assertEqual(template.variation(0), u'a ' * 100)
+        self.assertEqual(template.variation(3 ** 100 - 1), u'c ' * 100)
+        self.assertEqual(template.variation(3 ** 99), u'a ' * 99 + u'b ')
+
+    def test_variation(self):
+        """Test that every index maps to a distinct combination."""
+        template = spintax.parse(u'{a|{b|c} {d|e}}-{f|g}')
+        variations = [template.variation(i) for i in range(template.count)]
+        self.assertEqual(variations, [
+            u'a-f', u'b d-f', u'c d-f', u'b e-f', u'c e-f',
+            u'a-g', u'b d-g', u'c d-g', u'b e-g', u'c e-g',
+        ])
+
+    def test_variation_out_of_range(self):
+        """Test that indexes outside [0, count) are rejected."""
+        template = spintax.parse(u'{a|b}')
+        with self.assertRaises(IndexError):
+            template.variation(2)
+        with self.assertRaises(IndexError):
+            template.variation(-1)
+
+    def test_unique_variations(self):
+        """Test that the stream yields every variation exactly once."""
+        for text in [u'plain', u'{a|b}', u'{a|b|c}', u'{a|{b|c} {d|e}}-{f|g}',
+                     u'{a|b|c|d|e}{f|g|h}{i|j|k|l|m|n|o}']:
+            template = spintax.parse(text)
+            variations = list(template.unique_variations(seed=1))
+            self.assertEqual(len(variations), template.count)
+            self.assertEqual(
+                sorted(variations),
+                sorted(template.variation(i) for i in range(template.count)))
+
+    def test_unique_variations_seed(self):
+        """Test that the order depends on, and only on, the seed."""
+        template = spintax.parse(u'{a|b|c|d|e}{f|g|h}{i|j|k|l|m|n|o}')
+        first = list(template.unique_variations(seed='foo'))
+        self.assertEqual(first, list(template.unique_variations(seed='foo')))
+        self.assertNotEqual(
+            first, list(template.unique_variations(seed='bar')))
+        self.assertNotEqual(
+            first, [template.variation(i) for i in range(template.count)])
+
+    def test_unique_variations_huge(self):
+        """Test that huge variation spaces are streamed lazily."""
+        template = spintax.parse(u'{a|b|c} ' * 100)
+        stream = template.unique_variations(seed=1)
+        variations = set(next(stream) for i in range(1000))
+        self.assertEqual(len(variations), 1000)
+
+    def test_uniform_render(self):
+        """Test that uniform sampling weighs alternatives by their size."""
+        template = spintax.parse(u'{a|{b|c|d|e|f|g|h|i|j}}')
+        rng = random.Random(1)
+        uniform = [template.render(rng, uniform=True) for i in range(1000)]
+        default = [template.render(rng) for i in range(1000)]
+        self.assertLess(uniform.count(u'a'), 200)
+        self.assertGreater(default.count(u'a'), 400)
+        self.assertEqual(len(set(uniform)), 10)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import SpinRewriter
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.templates import TemplateStore
+from spinrewriter.transport import FakeTransport
+
+import mock
+import random
+import threading
+import time
+import unittest2 as unittest
+
+
+class TestTemplateStore(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.transport = FakeTransport(
+            ApiEmulator('foo@bar.com', 'test_api_key', frequency=0))
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport)
+        self.text = u'My dog is big.'
+        self.variations = set(
+            u'My {0} is {1}.'.format(noun, adjective)
+            for noun in (u'dog', u'pet', u'animal')
+            for adjective in (u'big', u'large', u'huge'))
+
+    def test_render(self):
+        """Test that spintax is fetched once and variations are rendered
+        locally."""
+        store = TemplateStore(self.api, rng=random.Random(1))
+        variations = set(store.unique_variation(self.text)
+                         for i in range(100))
+        self.assertEqual(variations, self.variations)
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertEqual(self.transport.requests[0]['action'],
+                         'text_with_spintax')
+        self.assertEqual(store.fetched, 1)
+        self.assertEqual(store.template(self.text).count, 9)
+
+        store.unique_variation(self.text, confidence_level='high')
+        self.assertEqual(store.fetched, 2)
+
+    def test_track(self):
+        """Test that tracked variations are never issued twice."""
+        store = TemplateStore(self.api, track=True)
+        variations = [store.unique_variation(self.text) for i in range(9)]
+        self.assertEqual(set(variations), self.variations)
+        self.assertEqual(store.issued(self.text), 9)
+        self.assertEqual(store.issued(u'My cat.'), 0)
+        with self.assertRaises(IndexError):
+            store.unique_variation(self.text)
+
+    def test_track_evicted(self):
+        """Test that tracking outlives the LRU cache of templates."""
+        store = TemplateStore(self.api, track=True, maxsize=1)
+        variations = [store.unique_variation(self.text) for i in range(5)]
+        store.unique_variation(u'My cat.')
+        variations += [store.unique_variation(self.text) for i in range(4)]
+        self.assertEqual(set(variations), self.variations)
+        self.assertEqual(store.issued(self.text), 9)
+        self.assertEqual(store.fetched, 2)
+
+    def test_concurrent(self):
+        """Test that concurrent calls for a new text share one entry."""
+        store = TemplateStore(self.api, track=True)
+        text_with_spintax = self.api.text_with_spintax
+
+        def slow(*args, **kwargs):
+            time.sleep(0.05)
+            return text_with_spintax(*args, **kwargs)
+
+        variations = []
+        threads = [threading.Thread(target=lambda: variations.append(
+            store.unique_variation(self.text))) for i in range(9)]
+        with mock.patch.object(self.api, 'text_with_spintax', slow):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(set(variations), self.variations)
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_fetched_meanwhile(self):
+        """Test that an entry stored while fetching is kept."""
+        store = TemplateStore(self.api)
+        entry = store._entry(self.text, u'medium')
+        self.assertIs(store._fetch((self.text, u'medium')), entry)
+        self.assertIs(store._entry(self.text, u'medium'), entry)
+        self.assertEqual(store.fetched, 2)
+
+    def test_seed(self):
+        """Test that stores with the same seed issue the same sequence."""
+        sequences = []
+        for i in range(2):
+            store = TemplateStore(self.api, track=True, seed='foo')
+            sequences.append(
+                [store.unique_variation(self.text) for j in range(9)])
+        self.assertEqual(sequences[0], sequences[1])
+
+    def test_spin_rewriter(self):
+        """Test rendering variations locally through SpinRewriter."""
+        rewriter = SpinRewriter('foo@bar.com', 'test_api_key',
+                                render_locally=True, track_variations=True)
+        rewriter.api.transport = self.transport
+        variations = set(rewriter.unique_variation(self.text)
+                         for i in range(9))
+        self.assertEqual(variations, self.variations)
+        self.assertEqual(len(self.transport.requests), 1)
+        self.assertTrue(rewriter.templates.track)
+        self.assertIsNone(
+            SpinRewriter('foo@bar.com', 'test_api_key').templates)
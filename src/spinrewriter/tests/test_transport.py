@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.pool import ConnectionPool
+from spinrewriter.transport import FakeTransport
+from spinrewriter.transport import Transport
+from spinrewriter.transport import UrllibTransport
+
+import mock
+import unittest2 as unittest
+
+
+class TestTransports(unittest.TestCase):
+
+    def test_base_transport(self):
+        """Test that Transport is an abstract interface."""
+        transport = Transport()
+        with self.assertRaises(NotImplementedError):
+            transport.post('foo=bar')
+        self.assertIsNone(transport.close())
+
+    @mock.patch('spinrewriter.transport.urllib2')
+    def test_urllib_transport(self, urllib2):
+        """Test that UrllibTransport POSTs body with urllib2."""
+        urllib2.urlopen.return_value.read.return_value = '{"foo":"bar"}'
+        transport = UrllibTransport('http://foo.bar/api', timeout=5)
+
+        self.assertEqual(transport.post('foo=bar'), '{"foo":"bar"}')
+        urllib2.urlopen.assert_called_once_with(
+            'http://foo.bar/api', 'foo=bar', 5)
+
+        UrllibTransport('http://foo.bar/api').post('foo=bar')
+        urllib2.urlopen.assert_called_with('http://foo.bar/api', 'foo=bar')
+
+    def test_fake_transport(self):
+        """Test that FakeTransport decodes parameters for its backend and
+        encodes its response as JSON."""
+        backend = mock.Mock()
+        backend.handle.return_value = {'status': 'OK'}
+        transport = FakeTransport(backend)
+
+        params = {'foo': 'b\xc3\xa4r', 'baz': ''}
+        self.assertEqual(transport.post('foo=b%C3%A4r&baz='),
+                         '{"status": "OK"}')
+        backend.handle.assert_called_once_with(params)
+        self.assertEqual(transport.requests, [params])
+
+    def test_default_transport(self):
+        """Test that Api uses a connection pool by default."""
+        api = Api('foo@bar.com', 'test_api_key', pool_size=3)
+        self.assertIsInstance(api.transport, ConnectionPool)
+        self.assertEqual(api.transport.maxsize, 3)
+
+    def test_custom_transport(self):
+        """Test that Api sends requests through the given transport."""
+        transport = FakeTransport(ApiEmulator('foo@bar.com', 'test_api_key'))
+        api = Api('foo@bar.com', 'test_api_key', transport=transport)
+
+        result = api.text_with_spintax(u'This is my über cute dog.')
+        self.assertEqual(
+            result['response'],
+            u'This is my über {cute|adorable|sweet} {dog|pet|animal}.')
+        self.assertEqual(transport.requests[0]['action'], 'text_with_spintax')
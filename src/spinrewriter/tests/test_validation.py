@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from spinrewriter import Api
+from spinrewriter import exceptions as ex
+from spinrewriter import validation
+from spinrewriter.emulator import ApiEmulator
+from spinrewriter.emulator import ERRORS
+from spinrewriter.transport import FakeTransport
+
+import unittest2 as unittest
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_credentials(self):
+        """Test that both credentials are required."""
+        validation.check_credentials('foo@bar.com', 'key')
+        for email, key in [('', 'key'), ('foo@bar.com', None)]:
+            with self.assertRaises(ex.MissingParameterError) as cm:
+                validation.check_credentials(email, key)
+            self.assertEqual(cm.exception.api_error_msg,
+                             ERRORS['missing_params'])
+
+    def test_text(self):
+        """Test word limits."""
+        validation.check_text(u'one two', max_words=2)
+        validation.check_text(u' über alles ', min_words=2)
+        with self.assertRaises(ex.ParamValueError) as cm:
+            validation.check_text(u' \n ')
+        self.assertEqual(cm.exception.api_error_msg, ERRORS['too_short'])
+        with self.assertRaises(ex.ParamValueError) as cm:
+            validation.check_text(u'word ' * 4001)
+        self.assertEqual(cm.exception.api_error_msg, ERRORS['too_long'])
+
+    def test_spintax(self):
+        """Test spintax balance for every format."""
+        for spintax_format, text in [
+            (Api.SPINTAX_FORMAT.pipe_curly, u'{a|{b|c}'),
+            (Api.SPINTAX_FORMAT.tilde_curly, u'a~b}'),
+            (Api.SPINTAX_FORMAT.pipe_square, u'[a|b]]'),
+            (Api.SPINTAX_FORMAT.spin_tag, u'[spin]a|b'),
+        ]:
+            validation.check_spintax(u'{a|b} [c|d] [spin]e|f[/spin]',
+                                     spintax_format)
+            with self.assertRaises(ex.ParamValueError) as cm:
+                validation.check_spintax(text, spintax_format)
+            self.assertEqual(cm.exception.api_error_msg,
+                             ERRORS['spintax_invalid'].format())
+
+
+class TestApi(unittest.TestCase):
+
+    def setUp(self):
+        """Utility code shared among all tests."""
+        self.transport = FakeTransport(
+            ApiEmulator('foo@bar.com', 'test_api_key'))
+        self.api = Api('foo@bar.com', 'test_api_key',
+                       transport=self.transport)
+
+    def test_no_round_trip(self):
+        """Test that invalid requests are not sent."""
+        with self.assertRaises(ex.ParamValueError):
+            self.api.text_with_spintax(u'')
+        with self.assertRaises(ex.ParamValueError):
+            self.api.unique_variation(u'word ' * 4001)
+        with self.assertRaises(ex.ParamValueError):
+            self.api.unique_variation_from_spintax(
+                u'[spin]a|b', spintax_format=Api.SPINTAX_FORMAT.spin_tag)
+        self.api.email_address = ''
+        with self.assertRaises(ex.MissingParameterError):
+            self.api.api_quota()
+        self.assertEqual(self.transport.requests, [])
+
+    def test_valid(self):
+        """Test that valid requests, and spintax in unknown formats, are
+        sent."""
+        self.api.unique_variation_from_spintax(u'{a|b}')
+        with self.assertRaises(ex.ParamValueError):
+            self.api.unique_variation_from_spintax(
+                u'{a|b', spintax_format=u'?')
+        self.assertEqual(len(self.transport.requests), 2)
+
+    def test_spintax_words(self):
+        """Test that spintax is as long as one of its variations."""
+        text = u'{big|large|huge} ' * 3000
+        self.api.unique_variation_from_spintax(text)
+        with self.assertRaises(ex.ParamValueError) as cm:
+            self.api.unique_variation_from_spintax(text * 2)
+        self.assertEqual(cm.exception.api_error_msg, ERRORS['too_long'])
+        self.assertEqual(len(self.transport.requests), 1)
+
+    def test_disabled(self):
+        """Test that validation can be turned off."""
+        self.api.validate = False
+        with self.assertRaises(ex.ParamValueError):
+            self.api.text_with_spintax(u'')
+        self.assertEqual(len(self.transport.requests), 1)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Transports used by :class:`spinrewriter.Api` to talk to the API server.
+
+A transport is any object with a ``post(body)`` method that sends
+url-encoded request parameters to the API and returns the raw (JSON) response
+body, and a ``close()`` method that releases its resources.
+"""
+
+import json
+import urllib2
+import urlparse
+
+
+class Transport(object):
+    """Base class for transports."""
+
+    def post(self, body):
+        """Send url-encoded body to the API and return the raw response.
+
+        :param body: url-encoded request parameters
+        :type body: string
+
+        :return: raw response body
+        :rtype: string
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the transport."""
+
+
+class UrllibTransport(Transport):
+    """Open a new connection with urllib2 for every request."""
+
+    def __init__(self, url, timeout=None):
+        self.url = url
+        self.timeout = timeout
+
+    def post(self, body):
+        if self.timeout is None:  # socket.getdefaulttimeout() applies
+            con = urllib2.urlopen(self.url, body)
+        else:
+            con = urllib2.urlopen(self.url, body, self.timeout)
+        return con.read()
+
+
+class FakeTransport(Transport):
+    """Hand requests to an in-process backend instead of the network.
+
+    The backend is an object with a ``handle(params)`` method that takes
+    a dictionary of request parameters and returns a dictionary of response
+    fields, such as :class:`spinrewriter.emulator.ApiEmulator`.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.requests = []
+        """list of all request parameters that were sent"""
+
+    def post(self, body):
+        params = dict(urlparse.parse_qsl(body, keep_blank_values=True))
+        self.requests.append(params)
+        return json.dumps(self.backend.handle(params))
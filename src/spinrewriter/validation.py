@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Local checks of request parameters.
+
+Requests the API would reject anyway fail here, with the same exception
+types and messages as the API's errors, without spending a round trip, a
+slot of the new-text frequency limit or quota.
+"""
+
+from spinrewriter import exceptions as ex
+from spinrewriter import spintax
+
+import re
+
+
+MISSING_CREDENTIALS = (u'Email address and unique API key are both '
+                       u'required. At least one is missing.')
+TOO_SHORT = u'Original text too short.'
+TOO_LONG = u'Original text too long. Text can have up to {0:,} words.'
+SPINTAX_INVALID = (u'Spinning syntax invalid. With this action you should '
+                   u'provide text with existing valid {first option|second '
+                   u'option} spintax.')
+
+_WORD = re.compile(r'\S+', re.UNICODE)
+
+
+def check_credentials(email_address, api_key):
+    """Check that both credentials are given.
+
+    :raises spinrewriter.exceptions.MissingParameterError: when either is
+        empty
+    """
+    if not email_address or not api_key:
+        raise ex.MissingParameterError(MISSING_CREDENTIALS)
+
+
+def check_text(text, min_words=1, max_words=4000):
+    """Check that the text has an acceptable number of words.
+
+    Counting stops as soon as the limit is exceeded, so checking huge texts
+    is cheap.
+
+    :param text: text to check
+    :type text: string
+    :param min_words: (optional) minimum number of words
+    :type min_words: int
+    :param max_words: (optional) maximum number of words
+    :type max_words: int
+
+    :raises spinrewriter.exceptions.ParamValueError: when the text is too
+        short or too long
+    """
+    words = 0
+    for words, _ in enumerate(_WORD.finditer(text), 1):
+        if words > max_words:
+            raise ex.ParamValueError(TOO_LONG.format(max_words))
+    if words < min_words:
+        raise ex.ParamValueError(TOO_SHORT)
+
+
+def check_spintax(text, spintax_format=u'{|}'):
+    """Check that groups of spintax are balanced.
+
+    :param text: text with spintax
+    :type text: string
+    :param spintax_format: (optional) spintax format of the text, see
+        :data:`spinrewriter.spintax.FORMATS`
+    :type spintax_format: string
+
+    :raises spinrewriter.exceptions.ParamValueError: when spintax is invalid
+    :return: parsed spintax
+    :rtype: spinrewriter.spintax.Template
+    """
+    try:
+        return spintax.parse(text, spintax_format)
+    except spintax.SpintaxError:
+        raise ex.ParamValueError(SPINTAX_INVALID)